@@ -0,0 +1,75 @@
+"""
+Gunicorn configuration for conTrackt.
+
+With GUNICORN_PRELOAD=true (the default) the Django app and the embedding
+model are loaded once in the master process before workers are forked, so
+the model weights are shared copy-on-write instead of being loaded again by
+every worker. See docs/gunicorn-preload.md.
+
+Usage (from the repository root):
+    gunicorn -c backend/conTrackt/gunicorn_conf.py backend.conTrackt.wsgi:application
+"""
+
+import gc
+import os
+import sys
+
+# Make `conTrackt` / `resume` importable no matter where gunicorn is started from.
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# HF tokenizers start a Rust thread pool that is not fork-safe.
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+workers = int(os.environ.get("GUNICORN_WORKERS", 3))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# torch intra-op threads per worker. Keep workers * TORCH_THREADS <= cores.
+TORCH_THREADS = int(os.environ.get("TORCH_THREADS", 1))
+os.environ.setdefault("OMP_NUM_THREADS", str(TORCH_THREADS))
+
+
+def when_ready(server):
+    """
+    Runs in the master after the app is (pre)loaded and before any worker is
+    forked: load the model weights here so workers share them copy-on-write.
+    """
+    if not preload_app:
+        return
+
+    import resume.views  # noqa: F401  (registers the lazy resources)
+    from resume.services import resource_registry
+
+    # Only build the model; running inference here would start torch's
+    # OpenMP pool in the master, which is not safe to fork.
+    results = resource_registry.load(["embedding_model"])
+    server.log.info(f"Preloaded in master: {results}")
+
+    # Move everything allocated so far into the permanent generation so the
+    # cyclic GC never touches (and copies) those pages in the workers.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """
+    Runs in each worker right after fork: re-create everything that holds
+    threads or sockets, then warm up every registered resource in this
+    process, so /ready/ passes before the first request.
+    """
+    from resume.services import resource_registry
+
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(TORCH_THREADS)
+
+    # Qdrant (and any other non-fork-safe) clients are rebuilt on first use.
+    resource_registry.reset_after_fork()
+
+    if preload_app:
+        # Qdrant and the AWS clients were just dropped; readiness needs them all loaded.
+        results = resource_registry.warmup()
+        server.log.info(f"Worker {worker.pid} warmup: {results}")
@@ -104,6 +104,169 @@ AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 S3_CONTRACTS_BUCKET = os.environ.get('S3_CONTRACTS_BUCKET')
 AWS_REGION_NAME = os.environ.get('AWS_REGION_NAME')
 AWS_REGION_BEDROCK = os.environ.get('AWS_REGION_BEDROCK')
+# One S3 and one Bedrock client per process, shared by all requests (see resume/services/aws_clients.py).
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', 50))
+AWS_MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', 5))
+AWS_CONNECT_TIMEOUT = float(os.environ.get('AWS_CONNECT_TIMEOUT', 5))
+AWS_READ_TIMEOUT = float(os.environ.get('AWS_READ_TIMEOUT', 60))
+AWS_BEDROCK_READ_TIMEOUT = float(os.environ.get('AWS_BEDROCK_READ_TIMEOUT', 120))
+AWS_BEDROCK_MAX_ATTEMPTS = int(os.environ.get('AWS_BEDROCK_MAX_ATTEMPTS', 1))
+
+# ✅ Bedrock gateway (per-model rate + adaptive concurrency limits; throttled calls retried, interactive before bulk)
+BEDROCK_RATE_LIMIT = float(os.environ.get('BEDROCK_RATE_LIMIT', 10))
+BEDROCK_BURST = int(os.environ.get('BEDROCK_BURST', 20))
+BEDROCK_INITIAL_CONCURRENCY = int(os.environ.get('BEDROCK_INITIAL_CONCURRENCY', 8))
+BEDROCK_MIN_CONCURRENCY = int(os.environ.get('BEDROCK_MIN_CONCURRENCY', 1))
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get('BEDROCK_MAX_CONCURRENCY', 32))
+BEDROCK_MAX_ATTEMPTS = int(os.environ.get('BEDROCK_MAX_ATTEMPTS', 6))
+BEDROCK_BACKOFF_BASE = float(os.environ.get('BEDROCK_BACKOFF_BASE', 0.5))
+BEDROCK_BACKOFF_CAP = float(os.environ.get('BEDROCK_BACKOFF_CAP', 20))
+BEDROCK_INTERACTIVE_QUEUE_TIMEOUT = float(os.environ.get('BEDROCK_INTERACTIVE_QUEUE_TIMEOUT', 30))
+BEDROCK_BULK_QUEUE_TIMEOUT = float(os.environ.get('BEDROCK_BULK_QUEUE_TIMEOUT', 600))
+# Local stand-in that throttles above BEDROCK_STUB_CAPACITY concurrent calls (no AWS calls are made).
+BEDROCK_STUB = os.environ.get('BEDROCK_STUB', 'false').lower() in ('1', 'true', 'yes')
+BEDROCK_STUB_CAPACITY = int(os.environ.get('BEDROCK_STUB_CAPACITY', 4))
+BEDROCK_STUB_LATENCY = float(os.environ.get('BEDROCK_STUB_LATENCY', 0.2))
+BEDROCK_STUB_THROTTLE_RATE = float(os.environ.get('BEDROCK_STUB_THROTTLE_RATE', 0.0))
+
+# ✅ LLM usage log (model, call site, tokens, latency and cache status of every LLM call; see /llm-usage/)
+LLM_USAGE_ENABLED = os.environ.get('LLM_USAGE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LLM_USAGE_DB = os.environ.get('LLM_USAGE_DB', str(BASE_DIR / 'data' / 'llm_usage.sqlite3'))
+LLM_USAGE_RETENTION_DAYS = float(os.environ.get('LLM_USAGE_RETENTION_DAYS', 90))
+# Rows are written in batches by a background thread every LLM_USAGE_FLUSH_INTERVAL seconds.
+LLM_USAGE_FLUSH_INTERVAL = float(os.environ.get('LLM_USAGE_FLUSH_INTERVAL', 2.0))
+LLM_USAGE_BUFFER_MAX = int(os.environ.get('LLM_USAGE_BUFFER_MAX', 10000))
+
+# ✅ Qdrant
+QDRANT_CLUSTER_URL = os.environ.get('QDRANT_CLUSTER_URL')
+QDRANT_URL = os.environ.get('QDRANT_URL')
+QDRANT_API_KEY = os.environ.get('QDRANT_API_KEY')
+
+# ✅ Cache
+# Set REDIS_URL to share the Django cache (and the embedding cache tier) across workers.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+
+# ✅ Embedding service
+# Concurrent embedding requests are collected for up to
+# EMBEDDING_BATCH_MAX_WAIT_MS and encoded together (max EMBEDDING_BATCH_SIZE texts).
+EMBEDDING_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', 32))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.environ.get('EMBEDDING_BATCH_MAX_WAIT_MS', 5))
+
+# Inference backend: 'torch' (fp32 sentence-transformers) or 'onnx' (ONNX Runtime).
+# The ONNX model is exported (and int8-quantized) into EMBEDDING_ONNX_DIR on first use.
+# Run `python manage.py embedding_parity` before switching to check drift.
+EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'torch')
+EMBEDDING_ONNX_DIR = os.environ.get('EMBEDDING_ONNX_DIR', str(BASE_DIR / 'data' / 'onnx'))
+EMBEDDING_ONNX_QUANTIZE = os.environ.get('EMBEDDING_ONNX_QUANTIZE', 'true').lower() == 'true'
+EMBEDDING_ONNX_THREADS = int(os.environ.get('EMBEDDING_ONNX_THREADS', 0))
+EMBEDDING_PARITY_MAX_DRIFT = float(os.environ.get('EMBEDDING_PARITY_MAX_DRIFT', 0.02))
+
+# Optional out-of-process embedding server (`python manage.py embedding_server`).
+# When EMBEDDING_SERVER_SOCKET is set, web workers send their batches to it
+# instead of loading the model. Its pool size and torch threads are separate
+# from the gunicorn worker settings.
+EMBEDDING_SERVER_SOCKET = os.environ.get('EMBEDDING_SERVER_SOCKET')
+EMBEDDING_SERVER_WORKERS = int(os.environ.get('EMBEDDING_SERVER_WORKERS', 2))
+EMBEDDING_SERVER_TORCH_THREADS = int(os.environ.get('EMBEDDING_SERVER_TORCH_THREADS', 2))
+EMBEDDING_SERVER_TIMEOUT = float(os.environ.get('EMBEDDING_SERVER_TIMEOUT', 60))
+
+# Contracts are embedded as overlapping chunks of at most CHUNK_MAX_TOKENS word-pieces.
+CHUNK_MAX_TOKENS = int(os.environ.get('CHUNK_MAX_TOKENS', 200))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get('CHUNK_OVERLAP_TOKENS', 40))
+
+# Embedding cache: in-process LRU (byte budget) + shared tier in the Django cache.
+EMBEDDING_CACHE_MAX_BYTES = int(os.environ.get('EMBEDDING_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+EMBEDDING_CACHE_SHARED = os.environ.get('EMBEDDING_CACHE_SHARED', 'true' if REDIS_URL else 'false').lower() == 'true'
+EMBEDDING_CACHE_ALIAS = os.environ.get('EMBEDDING_CACHE_ALIAS', 'default')
+EMBEDDING_CACHE_TIMEOUT = int(os.environ.get('EMBEDDING_CACHE_TIMEOUT', 60 * 60 * 24 * 7))
+
+# ✅ PDF text extraction
+# PDFs with at least PDF_PARALLEL_PAGE_THRESHOLD pages are split into page
+# ranges across PDF_EXTRACT_WORKERS processes.
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.environ.get('PDF_PARALLEL_PAGE_THRESHOLD', 40))
+PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', max(1, min(4, os.cpu_count() or 1))))
+
+# ✅ Extracted-text store (compressed files keyed by S3 URI + ETag, LRU byte budget)
+TEXT_STORE_DIR = os.environ.get('TEXT_STORE_DIR', str(BASE_DIR / 'data' / 'text_store'))
+TEXT_STORE_MAX_BYTES = int(os.environ.get('TEXT_STORE_MAX_BYTES', 512 * 1024 * 1024))
+
+# ✅ Search-plan cache (router output per normalized query + category)
+# Kept in an in-process LRU and the default Django cache (shared through Redis when REDIS_URL is set).
+SEARCH_PLAN_CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_PLAN_CACHE_MAX_ENTRIES', 2048))
+SEARCH_PLAN_CACHE_TIMEOUT = int(os.environ.get('SEARCH_PLAN_CACHE_TIMEOUT', 60 * 60 * 24))
+SEARCH_PLAN_CACHE_ALIAS = os.environ.get('SEARCH_PLAN_CACHE_ALIAS', 'default')
+SEARCH_PLAN_CACHE_VERSION = int(os.environ.get('SEARCH_PLAN_CACHE_VERSION', 1))
+
+# ✅ Local query planner (rule-based plans for simple queries, Bedrock only when unsure)
+LOCAL_PLANNER_ENABLED = os.environ.get('LOCAL_PLANNER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LOCAL_PLANNER_INDEX_TTL = int(os.environ.get('LOCAL_PLANNER_INDEX_TTL', 10 * 60))
+# Planned queries are logged here for `python manage.py planner_report` ('' disables the log).
+LOCAL_PLANNER_QUERY_LOG = os.environ.get('LOCAL_PLANNER_QUERY_LOG', str(BASE_DIR / 'data' / 'search_queries.jsonl'))
+LOCAL_PLANNER_QUERY_LOG_MAX_BYTES = int(os.environ.get('LOCAL_PLANNER_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOCAL_PLANNER_QUERY_LOG_BACKUPS = int(os.environ.get('LOCAL_PLANNER_QUERY_LOG_BACKUPS', 3))
+
+# ✅ Answer cache (grounded answers by context hash + normalized question + model; send no_cache=true to bypass)
+ANSWER_CACHE_TIMEOUT = int(os.environ.get('ANSWER_CACHE_TIMEOUT', 60 * 60 * 24))
+ANSWER_CACHE_ALIAS = os.environ.get('ANSWER_CACHE_ALIAS', 'default')
+ANSWER_CACHE_VERSION = int(os.environ.get('ANSWER_CACHE_VERSION', 1))
+
+# ✅ Context assembly (only the passages most relevant to a question are sent to the model)
+RAG_CONTEXT_TOKEN_BUDGET = int(os.environ.get('RAG_CONTEXT_TOKEN_BUDGET', 1500))
+# Passages are the ingestion chunks (CHUNK_MAX_TOKENS / CHUNK_OVERLAP_TOKENS), so their vectors are cached.
+RAG_DENSE_WEIGHT = float(os.environ.get('RAG_DENSE_WEIGHT', 0.7))
+
+# ✅ Question answering (/answer/): documents answered at once, and per-document time limit
+QNA_MAX_CONCURRENCY = int(os.environ.get('QNA_MAX_CONCURRENCY', 4))
+QNA_DOCUMENT_TIMEOUT = float(os.environ.get('QNA_DOCUMENT_TIMEOUT', 60))
+
+# ✅ Multi-document summaries (map-reduce; per-document summaries cached by content hash)
+SUMMARY_CHUNK_CHARS = int(os.environ.get('SUMMARY_CHUNK_CHARS', 12000))
+SUMMARY_MAX_CONCURRENCY = int(os.environ.get('SUMMARY_MAX_CONCURRENCY', 4))
+SUMMARY_DOCUMENT_TIMEOUT = float(os.environ.get('SUMMARY_DOCUMENT_TIMEOUT', 180))
+SUMMARY_CACHE_TIMEOUT = int(os.environ.get('SUMMARY_CACHE_TIMEOUT', 60 * 60 * 24 * 30))
+SUMMARY_CACHE_VERSION = int(os.environ.get('SUMMARY_CACHE_VERSION', 1))
+
+# ✅ Upload handling
+# Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to a temp file by Django
+# and read from there by S3 and the PDF parser, so memory per upload stays bounded.
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.environ.get('FILE_UPLOAD_MAX_MEMORY_SIZE', 2621440))
+S3_MULTIPART_THRESHOLD = int(os.environ.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024))
+S3_MULTIPART_CHUNKSIZE = int(os.environ.get('S3_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024))
+S3_MULTIPART_CONCURRENCY = int(os.environ.get('S3_MULTIPART_CONCURRENCY', 4))
+
+# ✅ Background ingestion (upload with async=true returns 202 + job id)
+# Jobs live in a local SQLite file; uploads wait in INGESTION_SPOOL_DIR.
+# Each web process starts INGESTION_INPROCESS_WORKERS threads on the first
+# async upload; set it to 0 and run `python manage.py ingestion_worker` instead
+# to keep the pipeline off the web workers entirely.
+INGESTION_JOB_DB = os.environ.get('INGESTION_JOB_DB', str(BASE_DIR / 'data' / 'ingestion_jobs.sqlite3'))
+INGESTION_SPOOL_DIR = os.environ.get('INGESTION_SPOOL_DIR', str(BASE_DIR / 'data' / 'ingestion_spool'))
+INGESTION_INPROCESS_WORKERS = int(os.environ.get('INGESTION_INPROCESS_WORKERS', 2))
+INGESTION_POLL_INTERVAL = float(os.environ.get('INGESTION_POLL_INTERVAL', 1.0))
+INGESTION_JOB_STALE_SECONDS = int(os.environ.get('INGESTION_JOB_STALE_SECONDS', 15 * 60))
+INGESTION_JOB_MAX_ATTEMPTS = int(os.environ.get('INGESTION_JOB_MAX_ATTEMPTS', 2))
+# Seconds before a job that Bedrock kept throttling is tried again.
+INGESTION_THROTTLE_RETRY_DELAY = int(os.environ.get('INGESTION_THROTTLE_RETRY_DELAY', 60))
+
+# Bulk upload (POST upload/bulk/): files processed at once, points per Qdrant write.
+BULK_INGEST_CONCURRENCY = int(os.environ.get('BULK_INGEST_CONCURRENCY', 4))
+BULK_UPSERT_BATCH_POINTS = int(os.environ.get('BULK_UPSERT_BATCH_POINTS', 256))
+BULK_INGEST_MAX_FILES = int(os.environ.get('BULK_INGEST_MAX_FILES', 5000))
+# Django rejects multipart requests with more than 100 files by default.
+DATA_UPLOAD_MAX_NUMBER_FILES = BULK_INGEST_MAX_FILES
+
+# Threads shared by all ingestion task graphs (S3 upload, text extraction, Bedrock, embedding, Qdrant stages).
+TASK_GRAPH_WORKERS = int(os.environ.get('TASK_GRAPH_WORKERS', 16))
 
 # ✅ CORS Configuration
 CORS_ALLOW_ALL_ORIGINS = True  # For development only
@@ -8,9 +8,26 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
 import os
+import sys
 
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conTrackt.settings')
 
 application = get_wsgi_application()
+
+# Optionally load the embedding model and connect to Qdrant before the first
+# request instead of on it. See `python manage.py warmup`.
+#
+# Skipped in a preloading gunicorn master: this would run inference before
+# fork. gunicorn_conf.py loads the model there (when_ready) and warms up
+# each worker after fork (post_fork).
+_preloaded_by_gunicorn = (
+    'gunicorn' in sys.modules
+    and os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+)
+if os.environ.get('WARMUP_ON_STARTUP', 'false').lower() == 'true' and not _preloaded_by_gunicorn:
+    import resume.views  # noqa: F401  (registers the lazy resources)
+    from resume.services.resource_registry import warmup
+
+    print(f"🔥 Warmup: {warmup()}")
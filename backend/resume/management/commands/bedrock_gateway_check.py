@@ -0,0 +1,69 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from resume.services.bedrock_gateway import (
+    BedrockGateway, BedrockThrottled, GatedBedrockClient, PRIORITY_BULK, PRIORITY_INTERACTIVE,
+)
+from resume.services.bedrock_stub import StubBedrockRuntime
+from resume.services.llm_usage import llm_usage
+
+MODEL_ID = "meta.llama3-70b-instruct-v1:0"
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a burst of interactive and bulk calls through a fresh Bedrock gateway "
+        "against the local throttling stub (no AWS calls) and reports throttles, "
+        "retries, queue waits and where the concurrency limit settled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interactive", type=int, default=20, help="Interactive calls to send.")
+        parser.add_argument("--bulk", type=int, default=40, help="Bulk (extraction) calls to send.")
+        parser.add_argument("--capacity", type=int, default=4, help="Concurrent calls the stub serves before throttling.")
+        parser.add_argument("--throttle-rate", type=float, default=0.05, help="Share of calls the stub throttles at random.")
+        parser.add_argument("--latency", type=float, default=0.2, help="Seconds per stub call.")
+        parser.add_argument("--threads", type=int, default=32, help="Caller threads.")
+
+    def handle(self, *args, **options):
+        stub = StubBedrockRuntime(
+            capacity=options["capacity"], latency=options["latency"], throttle_rate=options["throttle_rate"],
+        )
+        # Stub calls are not real usage.
+        llm_usage.enabled = False
+        gateway = BedrockGateway(backoff_base=0.05, backoff_cap=1.0)
+        clients = {
+            PRIORITY_INTERACTIVE: GatedBedrockClient(stub, gateway, PRIORITY_INTERACTIVE),
+            PRIORITY_BULK: GatedBedrockClient(stub, gateway, PRIORITY_BULK),
+        }
+        body = json.dumps({"prompt": "stub prompt"})
+
+        def _call(priority):
+            started = time.perf_counter()
+            try:
+                clients[priority].invoke_model(body=body, modelId=MODEL_ID)
+                return priority, True, time.perf_counter() - started
+            except BedrockThrottled:
+                return priority, False, time.perf_counter() - started
+
+        # Bulk first, so interactive calls arrive to a full queue.
+        calls = [PRIORITY_BULK] * options["bulk"] + [PRIORITY_INTERACTIVE] * options["interactive"]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            results = list(pool.map(_call, calls))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{len(calls)} calls in {elapsed:.2f}s; stub: {json.dumps(stub.get_stats())}")
+        for priority, name in ((PRIORITY_INTERACTIVE, "interactive"), (PRIORITY_BULK, "bulk")):
+            latencies = sorted(t for p, ok, t in results if p == priority and ok)
+            failed = sum(1 for p, ok, _ in results if p == priority and not ok)
+            if latencies:
+                p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+                self.stdout.write(
+                    f"  {name:<12} ok={len(latencies)} gave_up={failed} "
+                    f"avg={sum(latencies) / len(latencies):.2f}s p95={p95:.2f}s"
+                )
+            else:
+                self.stdout.write(f"  {name:<12} ok=0 gave_up={failed}")
+        self.stdout.write(json.dumps(gateway.get_stats(), indent=2))
@@ -0,0 +1,81 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from qdrant_client import models
+from resume.services.embedding_backends import compare_backends
+from resume.services.embedding_service import build_backend
+from resume.services.qdrant_service import ALL_COLLECTION_NAMES, CHUNK_POINT_TYPE, get_qdrant
+
+SAMPLE_TEXTS = [
+    "termination clauses",
+    "non-compete terms",
+    "What is the interest rate on the loan agreement?",
+    "Either party may terminate this Agreement upon thirty (30) days written notice.",
+    "The Receiving Party shall hold and maintain the Confidential Information in strictest confidence.",
+    "The Employee shall receive an annual base salary payable in accordance with the Company's payroll practices.",
+    "The Borrower shall repay the principal amount together with accrued interest on or before the Maturity Date.",
+    "This Agreement shall be governed by and construed in accordance with the laws of the State of Delaware.",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares a candidate embedding backend against the torch reference and reports "
+        "cosine drift, so you know whether switching requires re-indexing Qdrant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--candidate", default="onnx", help="Backend to compare against torch.")
+        parser.add_argument("--file", help="Text file with one sample per line (default: chunks from Qdrant).")
+        parser.add_argument("--limit", type=int, default=500, help="Maximum number of samples.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=getattr(settings, "EMBEDDING_PARITY_MAX_DRIFT", 0.02),
+            help="Maximum acceptable p95 cosine drift (1 - cosine similarity).",
+        )
+
+    def _load_corpus(self, options):
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as f:
+                return [line.strip() for line in f if line.strip()][:options["limit"]]
+
+        texts = []
+        try:
+            client = get_qdrant()
+        except ConnectionError as e:
+            self.stdout.write(self.style.WARNING(f"⚠️ Qdrant unavailable, using the built-in samples: {e}"))
+            client = None
+        if client is not None:
+            chunk_filter = models.Filter(must=[
+                models.FieldCondition(key="point_type", match=models.MatchValue(value=CHUNK_POINT_TYPE))
+            ])
+            for collection_name in ALL_COLLECTION_NAMES:
+                try:
+                    records, _ = client.scroll(
+                        collection_name=collection_name,
+                        scroll_filter=chunk_filter,
+                        limit=options["limit"],
+                        with_payload=["chunk_text"],
+                        with_vectors=False,
+                    )
+                    texts.extend(r.payload["chunk_text"] for r in records if r.payload.get("chunk_text"))
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"⚠️ Could not read samples from '{collection_name}': {e}"))
+        return (texts or SAMPLE_TEXTS)[:options["limit"]]
+
+    def handle(self, *args, **options):
+        texts = self._load_corpus(options)
+        self.stdout.write(f"Comparing '{options['candidate']}' against 'torch' on {len(texts)} samples...")
+
+        report = compare_backends(build_backend("torch"), build_backend(options["candidate"]), texts)
+        self.stdout.write(json.dumps(report, indent=2))
+
+        if report.get("p95_cosine_drift", 0.0) > options["threshold"]:
+            self.stdout.write(self.style.ERROR(
+                f"❌ p95 drift exceeds {options['threshold']}: re-index Qdrant before switching EMBEDDING_BACKEND."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Drift within {options['threshold']}: existing Qdrant vectors can be kept."
+            ))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from resume.services.embedding_server import EmbeddingServer
+
+
+class Command(BaseCommand):
+    help = "Runs the out-of-process embedding server on a Unix socket."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=getattr(settings, "EMBEDDING_SERVER_SOCKET", None))
+        parser.add_argument("--workers", type=int, default=getattr(settings, "EMBEDDING_SERVER_WORKERS", 2))
+        parser.add_argument("--threads", type=int, default=getattr(settings, "EMBEDDING_SERVER_TORCH_THREADS", 2),
+                            help="torch intra-op threads per worker process.")
+
+    def handle(self, *args, **options):
+        if not options["socket"]:
+            raise CommandError("Set EMBEDDING_SERVER_SOCKET or pass --socket.")
+
+        server = EmbeddingServer(options["socket"], workers=options["workers"], torch_threads=options["threads"])
+        self.stdout.write(self.style.SUCCESS(
+            f"🚀 Embedding server listening on {options['socket']} "
+            f"({options['workers']} workers x {options['threads']} torch threads)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,25 @@
+import signal
+from django.core.management.base import BaseCommand
+from resume.services.ingestion_service import IngestionWorkerPool, INGESTION_POLL_INTERVAL
+
+
+class Command(BaseCommand):
+    help = "Runs background ingestion jobs (uploads sent with async=true) from the local job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=2, help="Jobs to run concurrently.")
+        parser.add_argument("--poll-interval", type=float, default=INGESTION_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        pool = IngestionWorkerPool(options["threads"], poll_interval=options["poll_interval"])
+
+        def _shutdown(signum, frame):
+            self.stdout.write("Stopping after the current jobs finish...")
+            pool.stop()
+
+        signal.signal(signal.SIGTERM, _shutdown)
+        signal.signal(signal.SIGINT, _shutdown)
+
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(f"✅ Ingestion worker running with {options['threads']} thread(s)."))
+        pool.join()
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from resume.services.llm_usage import LLMUsageLog, GROUP_COLUMNS, LLM_USAGE_DB
+
+COLUMNS = [
+    ("calls", "calls"),
+    ("cache_hit_rate", "hit rate"),
+    ("errors", "errors"),
+    ("input_tokens", "in tokens"),
+    ("output_tokens", "out tokens"),
+    ("total_seconds", "total s"),
+    ("avg_model_latency_ms", "avg ms"),
+    ("p95_latency_ms", "p95 ms"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports LLM calls from the usage log: calls, cache hit rate, input/output "
+        "tokens and latency per call site and model, most total time first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--db", default=LLM_USAGE_DB, help="Usage log (SQLite file).")
+        parser.add_argument("--days", type=float, default=7, help="Only calls from the last N days (0 = all).")
+        parser.add_argument("--by", default="call_site,model_id",
+                            help=f"Comma-separated grouping, from: {', '.join(GROUP_COLUMNS)}.")
+        parser.add_argument("--call-site", default=None, help="Only this call site.")
+        parser.add_argument("--prune", action="store_true", help="Delete rows older than the retention period first.")
+
+    def handle(self, *args, **options):
+        log = LLMUsageLog(path=options["db"])
+        if options["prune"]:
+            self.stdout.write(f"Pruned {log.prune()} old rows.")
+
+        group_by = [c.strip() for c in options["by"].split(",") if c.strip()]
+        try:
+            rows = log.summary(days=options["days"] or None, group_by=group_by, call_site=options["call_site"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not rows:
+            self.stdout.write("No LLM calls recorded in this period.")
+            return
+
+        headers = group_by + [label for _, label in COLUMNS]
+        table = [
+            [str(row[c]) for c in group_by]
+            + ["-" if row[key] is None else str(row[key]) for key, _ in COLUMNS]
+            for row in rows
+        ]
+        widths = [max(len(h), *(len(r[i]) for r in table)) for i, h in enumerate(headers)]
+        self.stdout.write("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+        for r in table:
+            self.stdout.write("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+
+        calls = sum(row["calls"] for row in rows)
+        tokens_in = sum(row["input_tokens"] for row in rows)
+        tokens_out = sum(row["output_tokens"] for row in rows)
+        seconds = sum(row["total_seconds"] or 0 for row in rows)
+        self.stdout.write(
+            f"\nTotal: {calls} calls, {tokens_in} input / {tokens_out} output tokens, {seconds:.1f}s"
+        )
@@ -0,0 +1,86 @@
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from resume.services.bedrock_service import CATEGORY_SPECIFIC_FIELDS, local_planner
+from resume.services.local_planner import LocalQueryPlanner, read_query_log, LOCAL_PLANNER_QUERY_LOG
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays logged search queries through the local rule-based planner and "
+        "reports what fraction it answers without calling the Bedrock router."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", default=LOCAL_PLANNER_QUERY_LOG, help="Search query log (JSON lines).")
+        parser.add_argument("--history", action="store_true",
+                            help="Use the general-chat queries in data/chat_history.json instead of the query log.")
+        parser.add_argument("--file", help="Plain text file with one query per line.")
+        parser.add_argument("--days", type=int, default=None, help="Only queries from the last N days (query log only).")
+        parser.add_argument("--examples", type=int, default=5, help="Deferred queries to show per reason.")
+
+    def _load_queries(self, options):
+        if options["file"]:
+            with open(options["file"], "r", encoding="utf-8") as f:
+                return [{"query": line.strip(), "category": None} for line in f if line.strip()], None
+
+        if options["history"]:
+            with open(os.path.join("data", "chat_history.json"), "r") as f:
+                history = json.load(f)
+            return [
+                {"query": entry["query"], "category": None}
+                for entry in history
+                if entry.get("query") and not entry.get("chat_with_doc")
+            ], None
+
+        cutoff = None
+        if options["days"] is not None:
+            cutoff = (datetime.utcnow() - timedelta(days=options["days"])).isoformat()
+        entries = [e for e in read_query_log(options["log"]) if not cutoff or e.get("timestamp", "") >= cutoff]
+        live = Counter(e.get("planner") for e in entries)
+        return entries, live
+
+    def handle(self, *args, **options):
+        try:
+            entries, live = self._load_queries(options)
+        except FileNotFoundError as e:
+            self.stdout.write(self.style.ERROR(f"❌ No queries to report on: {e}"))
+            return
+        if not entries:
+            self.stdout.write("No queries found.")
+            return
+
+        # Same rules and party index as the web process, but nothing is logged.
+        # The index is built up front: otherwise every name query reports index_unavailable.
+        party_index = local_planner.party_index
+        if not party_index.build():
+            raise CommandError("Could not build the party-name index from Qdrant; the replay would be meaningless.")
+        planner = LocalQueryPlanner(CATEGORY_SPECIFIC_FIELDS, party_index=party_index, query_log="")
+        reasons = Counter()
+        examples = {}
+        with_filters = 0
+        for entry in entries:
+            plan, reason = planner.plan(entry["query"], entry.get("category"))
+            reasons[reason] += 1
+            if plan is not None and plan["filters"]:
+                with_filters += 1
+            if plan is None:
+                examples.setdefault(reason, []).append(entry["query"])
+
+        total = len(entries)
+        handled = reasons.pop("handled", 0)
+        self.stdout.write(f"📊 {total} queries replayed through the local planner.\n")
+        self.stdout.write(f"  Handled locally:  {handled} ({handled / total:.1%}), {with_filters} of them with filters")
+        self.stdout.write(f"  Sent to Bedrock:  {total - handled} ({(total - handled) / total:.1%})")
+        if live:
+            logged_local = live.get("local", 0)
+            self.stdout.write(f"  At query time:    {logged_local} ({logged_local / total:.1%}) were planned locally")
+
+        if reasons:
+            self.stdout.write("\nWhy queries went to Bedrock:")
+            for reason, count in reasons.most_common():
+                self.stdout.write(f"  {reason:<20} {count:>6} ({count / total:.1%})")
+                for query in examples[reason][:options["examples"]]:
+                    self.stdout.write(f"      - {query}")
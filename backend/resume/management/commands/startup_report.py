@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports the app in a fresh interpreter with `-X importtime` and reports "
+        "the per-module import cost of a worker boot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="resume.views", help="Module a worker imports at boot.")
+        parser.add_argument("--top", type=int, default=25, help="How many of the slowest modules to list.")
+
+    def handle(self, *args, **options):
+        script = (
+            "import django; django.setup(); "
+            f"import importlib; importlib.import_module({options['module']!r})"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "conTrackt.settings"))
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            cwd=str(settings.BASE_DIR),
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            self.stdout.write(self.style.ERROR(f"❌ Import failed:\n{proc.stderr[-2000:]}"))
+            return
+
+        # Lines look like: "import time:   self [us] | cumulative | imported package"
+        timings = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "imported package" in line:
+                continue
+            try:
+                self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+                timings.append((name.strip(), int(self_us), int(cumulative_us), len(name) - len(name.lstrip()) - 1))
+            except ValueError:
+                continue
+
+        top_level = [t for t in timings if t[3] == 0]
+        total_ms = sum(t[2] for t in top_level) / 1000.0
+
+        self.stdout.write(f"📊 Importing '{options['module']}' took {total_ms:.0f} ms in total.\n")
+        self.stdout.write(f"Slowest top-level imports (cumulative):")
+        for name, _, cumulative_us, _ in sorted(top_level, key=lambda t: t[2], reverse=True)[:options["top"]]:
+            self.stdout.write(f"  {cumulative_us / 1000.0:9.1f} ms  {name}")
+
+        self.stdout.write(f"\nApp modules (cumulative):")
+        for name, _, cumulative_us, _ in timings:
+            if name.startswith("resume") or name.startswith("conTrackt"):
+                self.stdout.write(f"  {cumulative_us / 1000.0:9.1f} ms  {name}")
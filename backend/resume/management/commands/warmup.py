@@ -0,0 +1,19 @@
+import json
+from django.core.management.base import BaseCommand
+from resume.services import resource_registry
+
+
+class Command(BaseCommand):
+    help = "Loads the embedding model, connects to Qdrant and runs one dummy encode / ping."
+
+    def handle(self, *args, **options):
+        import resume.views  # noqa: F401  (registers the lazy resources)
+
+        results = resource_registry.warmup()
+        for name, result in results.items():
+            if result["ok"]:
+                self.stdout.write(self.style.SUCCESS(f"✅ {name}: warmed up in {result['seconds']}s"))
+            else:
+                self.stdout.write(self.style.ERROR(f"❌ {name}: {result['error']}"))
+
+        self.stdout.write(json.dumps(resource_registry.readiness_report(), indent=2))
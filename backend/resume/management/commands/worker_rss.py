@@ -0,0 +1,70 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _read_memory(pid: int) -> dict:
+    """
+    Reads RSS / PSS / shared / private memory (in kB) for a process from
+    /proc/<pid>/smaps_rollup (Linux only).
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss_kb": fields.get("Rss", 0),
+        "pss_kb": fields.get("Pss", 0),
+        "shared_kb": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_kb": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def _children(pid: int):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The ppid is the 2nd field after the parenthesised command name.
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports per-worker memory for a running gunicorn master. PSS (proportional "
+        "set size) is the number to compare: pages shared copy-on-write are split "
+        "between the processes that share them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("master_pid", type=int, help="PID of the gunicorn master process.")
+
+    def handle(self, *args, **options):
+        master_pid = options["master_pid"]
+        if not os.path.exists(f"/proc/{master_pid}/smaps_rollup"):
+            raise CommandError(f"No /proc/{master_pid}/smaps_rollup (is the PID right, and is this Linux?)")
+
+        rows = [("master", master_pid, _read_memory(master_pid))]
+        rows += [("worker", pid, _read_memory(pid)) for pid in _children(master_pid)]
+
+        self.stdout.write(f"{'role':<8}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'private MB':>12}")
+        for role, pid, mem in rows:
+            self.stdout.write(
+                f"{role:<8}{pid:>8}{mem['rss_kb'] / 1024:>10.1f}{mem['pss_kb'] / 1024:>10.1f}"
+                f"{mem['shared_kb'] / 1024:>11.1f}{mem['private_kb'] / 1024:>12.1f}"
+            )
+
+        workers = [mem for role, _, mem in rows if role == "worker"]
+        if workers:
+            total_pss = sum(mem["pss_kb"] for _, _, mem in rows) / 1024
+            avg_private = sum(mem["private_kb"] for mem in workers) / len(workers) / 1024
+            self.stdout.write(f"\nTotal PSS (master + {len(workers)} workers): {total_pss:.1f} MB")
+            self.stdout.write(f"Average private memory per worker: {avg_private:.1f} MB")
@@ -0,0 +1,125 @@
+# backend/resume/services/answer_cache.py
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+from .search_plan_cache import normalize_query
+
+ANSWER_CACHE_TIMEOUT = getattr(settings, 'ANSWER_CACHE_TIMEOUT', 60 * 60 * 24)  # 1 day
+ANSWER_CACHE_ALIAS = getattr(settings, 'ANSWER_CACHE_ALIAS', 'default')
+# Bump when the RAG prompt changes, so old answers are not reused.
+ANSWER_CACHE_VERSION = getattr(settings, 'ANSWER_CACHE_VERSION', 1)
+
+
+class AnswerCache:
+    """
+    Caches grounded answers in the shared Django cache, keyed by a hash of
+    the context, the normalized question and the model id: the same
+    question on the same document text (e.g. a popular template) is
+    answered once per `timeout`.
+
+    Every lookup returns provenance for the response:
+        {"status": "hit" | "miss" | "bypass", "cached_at": ..., "age_seconds": ...}
+    """
+
+    def __init__(self, timeout: int = ANSWER_CACHE_TIMEOUT, alias: str = ANSWER_CACHE_ALIAS,
+                 version: int = ANSWER_CACHE_VERSION):
+        self.timeout = timeout
+        self.alias = alias
+        self.version = version
+        self._lock = threading.Lock()
+
+        # --- Counters ---
+        self._hits = 0
+        self._misses = 0
+        self._bypasses = 0
+        self._errors = 0
+        self._computed_seconds = 0.0
+        self._saved_seconds = 0.0
+
+    def make_key(self, context: str, query: str, model_id: str) -> str:
+        context_hash = hashlib.sha256((context or "").encode("utf-8")).hexdigest()
+        raw = f"{self.version}\x00{model_id}\x00{normalize_query(query)}\x00{context_hash}"
+        return f"answer:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            return caches[self.alias].get(key)
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+            print(f"⚠️ Answer cache read failed: {e}")
+            return None
+
+    def set(self, key: str, answer: str, seconds: float):
+        entry = {"answer": answer, "cached_at": time.time(), "seconds": round(seconds, 4)}
+        try:
+            caches[self.alias].set(key, entry, timeout=self.timeout)
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+            print(f"⚠️ Answer cache write failed: {e}")
+
+    def hit_provenance(self, entry: Dict) -> Dict:
+        with self._lock:
+            self._hits += 1
+            self._saved_seconds += entry.get("seconds", 0.0)
+        return {
+            "status": "hit",
+            "cached_at": datetime.fromtimestamp(entry["cached_at"], timezone.utc).isoformat(),
+            "age_seconds": round(time.time() - entry["cached_at"], 1),
+            "original_seconds": entry.get("seconds"),
+        }
+
+    def record_miss(self, seconds: float):
+        with self._lock:
+            self._misses += 1
+            self._computed_seconds += seconds
+
+    def record_bypass(self):
+        with self._lock:
+            self._bypasses += 1
+
+    def get_or_compute(self, context: str, query: str, model_id: str,
+                       compute_fn: Callable[[], str], use_cache: bool = True) -> Tuple[str, Dict]:
+        """
+        Returns (answer, provenance). With use_cache=False the model is always
+        called and the result is not stored.
+        """
+        if not use_cache:
+            self.record_bypass()
+            return compute_fn(), {"status": "bypass"}
+
+        key = self.make_key(context, query, model_id)
+        entry = self.get(key)
+        if entry is not None:
+            print(f"✅ Answer cache HIT for '{query}'")
+            return entry["answer"], self.hit_provenance(entry)
+
+        started = time.perf_counter()
+        answer = compute_fn()
+        seconds = time.perf_counter() - started
+        self.record_miss(seconds)
+        self.set(key, answer, seconds)
+        return answer, {"status": "miss", "seconds": round(seconds, 3)}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "timeout": self.timeout,
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypasses": self._bypasses,
+                "errors": self._errors,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "avg_bedrock_seconds": round(self._computed_seconds / self._misses, 4) if self._misses else None,
+                "saved_bedrock_seconds": round(self._saved_seconds, 3),
+            }
+
+
+answer_cache = AnswerCache()
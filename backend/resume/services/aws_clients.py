@@ -0,0 +1,73 @@
+# backend/resume/services/aws_clients.py
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+from . import resource_registry
+
+# Connections kept open per client; several request threads (and the
+# task-graph / fan-out pools) share one client.
+AWS_MAX_POOL_CONNECTIONS = getattr(settings, 'AWS_MAX_POOL_CONNECTIONS', 50)
+AWS_MAX_ATTEMPTS = getattr(settings, 'AWS_MAX_ATTEMPTS', 5)
+AWS_CONNECT_TIMEOUT = getattr(settings, 'AWS_CONNECT_TIMEOUT', 5)
+AWS_READ_TIMEOUT = getattr(settings, 'AWS_READ_TIMEOUT', 60)
+# 70B generations can take longer than the default read timeout.
+AWS_BEDROCK_READ_TIMEOUT = getattr(settings, 'AWS_BEDROCK_READ_TIMEOUT', 120)
+# Bedrock throttles are retried by the gateway (bedrock_gateway.py), which
+# also has to see them to shrink its concurrency limit.
+AWS_BEDROCK_MAX_ATTEMPTS = getattr(settings, 'AWS_BEDROCK_MAX_ATTEMPTS', 1)
+
+
+def _client_config(service: str) -> Config:
+    bedrock = service.startswith('bedrock')
+    return Config(
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=AWS_BEDROCK_READ_TIMEOUT if bedrock else AWS_READ_TIMEOUT,
+        retries={
+            'mode': 'standard' if bedrock else 'adaptive',
+            'max_attempts': AWS_BEDROCK_MAX_ATTEMPTS if bedrock else AWS_MAX_ATTEMPTS,
+        },
+    )
+
+
+def _build_client(service: str, region_name):
+    # A session per client: boto3's default session is not safe to create
+    # clients from concurrently.
+    session = boto3.session.Session(
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+    )
+    return session.client(service, region_name=region_name, config=_client_config(service))
+
+
+def _client_resource(service: str, region_name=None) -> resource_registry.LazyResource:
+    """
+    Registers this process's shared client for `service` in `region_name`.
+
+    Clients are built once per process (credentials resolved and TLS pool
+    opened once) and registered as non-fork-safe resources, so a forked
+    worker builds its own on first use. boto3 clients are thread-safe.
+    """
+    return resource_registry.register(
+        f"aws_{service}_{region_name or 'default'}",
+        lambda: _build_client(service, region_name),
+        fork_safe=False,
+    )
+
+
+S3_REGION = getattr(settings, 'AWS_REGION_NAME', None)
+BEDROCK_REGION = getattr(settings, 'AWS_REGION_BEDROCK', 'us-east-1')
+
+# Registered up front so they show up in readiness and `warmup`.
+s3_client_resource = _client_resource('s3', S3_REGION)
+bedrock_runtime_client_resource = _client_resource('bedrock-runtime', BEDROCK_REGION)
+
+
+def get_s3_client():
+    return s3_client_resource.get()
+
+
+def get_bedrock_runtime_client():
+    return bedrock_runtime_client_resource.get()
@@ -0,0 +1,430 @@
+# backend/resume/services/bedrock_gateway.py
+
+import heapq
+import io
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+from django.conf import settings
+from botocore.exceptions import ClientError
+from .llm_usage import llm_usage, CACHE_NONE
+
+# --- Per-model request rate (token bucket) ---
+BEDROCK_RATE_LIMIT = getattr(settings, 'BEDROCK_RATE_LIMIT', 10.0)  # requests / second
+BEDROCK_BURST = getattr(settings, 'BEDROCK_BURST', 20)
+# --- Per-model concurrency (AIMD: +1 per window of successes, halved on throttling) ---
+BEDROCK_INITIAL_CONCURRENCY = getattr(settings, 'BEDROCK_INITIAL_CONCURRENCY', 8)
+BEDROCK_MIN_CONCURRENCY = getattr(settings, 'BEDROCK_MIN_CONCURRENCY', 1)
+BEDROCK_MAX_CONCURRENCY = getattr(settings, 'BEDROCK_MAX_CONCURRENCY', 32)
+# --- Retries of throttled calls (exponential backoff with full jitter) ---
+BEDROCK_MAX_ATTEMPTS = getattr(settings, 'BEDROCK_MAX_ATTEMPTS', 6)
+BEDROCK_BACKOFF_BASE = getattr(settings, 'BEDROCK_BACKOFF_BASE', 0.5)
+BEDROCK_BACKOFF_CAP = getattr(settings, 'BEDROCK_BACKOFF_CAP', 20.0)
+# How long a call may wait for a slot before giving up.
+BEDROCK_INTERACTIVE_QUEUE_TIMEOUT = getattr(settings, 'BEDROCK_INTERACTIVE_QUEUE_TIMEOUT', 30)
+BEDROCK_BULK_QUEUE_TIMEOUT = getattr(settings, 'BEDROCK_BULK_QUEUE_TIMEOUT', 600)
+# Use the local stub (bedrock_stub.py) instead of AWS, e.g. for load tests.
+BEDROCK_STUB = getattr(settings, 'BEDROCK_STUB', False)
+
+# Lower runs first: user-facing calls (search planning, chat, answers) go
+# ahead of bulk upload extraction.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BULK: "bulk"}
+
+THROTTLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+
+class BedrockThrottled(Exception):
+    """
+    Bedrock kept throttling after every retry, or no slot freed up in time.
+    """
+
+
+def is_throttle(error: Exception) -> bool:
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in THROTTLE_ERROR_CODES
+    # Errors raised mid-stream carry the code in their message.
+    return "throttl" in str(error).lower()
+
+
+class TokenBucket:
+    """
+    Allows `rate` calls per second with bursts of up to `burst`. `reserve()`
+    takes a token and returns how long the caller must wait for it.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit with a priority queue of waiters.
+
+    The limit grows by about one slot per `limit` successful calls and is
+    halved on throttling (at most once per `cooldown`, so one burst of
+    throttles counts once). Waiters are served lowest priority value first,
+    then in arrival order.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, cooldown: float = 1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while not (self._waiters[0] == entry and self.in_flight < int(self.limit)):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                heapq.heappop(self._waiters)
+                self.in_flight += 1
+                return True
+            finally:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def release(self, outcome: str):
+        """
+        `outcome` is "ok", "throttled" or "error" (errors do not move the limit).
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            elif outcome == "throttled":
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            self._cond.notify_all()
+
+    def queued(self) -> Dict[str, int]:
+        with self._cond:
+            counts = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiters:
+                counts[PRIORITY_NAMES.get(priority, str(priority))] += 1
+            return counts
+
+
+class _ModelState:
+    def __init__(self):
+        self.bucket = TokenBucket(BEDROCK_RATE_LIMIT, BEDROCK_BURST)
+        self.limiter = AdaptiveLimiter(BEDROCK_INITIAL_CONCURRENCY, BEDROCK_MIN_CONCURRENCY, BEDROCK_MAX_CONCURRENCY)
+        self.counters = {
+            name: {"calls": 0, "ok": 0, "throttles": 0, "retries": 0, "errors": 0, "gave_up": 0, "queue_timeouts": 0}
+            for name in PRIORITY_NAMES.values()
+        }
+        self.queue_waits = {name: deque(maxlen=500) for name in PRIORITY_NAMES.values()}
+
+
+class _StreamBody:
+    """
+    Wraps a response stream so the gateway slot is held until it is
+    consumed or closed.
+    """
+
+    def __init__(self, body, on_done: Callable[[str], None]):
+        self._body = body
+        self._on_done = on_done
+        self._done = False
+
+    def _finish(self, outcome: str):
+        if not self._done:
+            self._done = True
+            self._on_done(outcome)
+
+    def __iter__(self):
+        try:
+            for event in self._body:
+                yield event
+        except Exception as e:
+            self._finish("throttled" if is_throttle(e) else "error")
+            raise
+        self._finish("ok")
+
+    def close(self):
+        try:
+            close = getattr(self._body, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish("error")
+
+
+class BedrockGateway:
+    """
+    Every Bedrock invocation in the process goes through here. Per model it
+    keeps a token bucket (request rate) and an adaptive concurrency limit;
+    throttled calls back off and retry, and interactive callers are let in
+    before bulk ones.
+    """
+
+    def __init__(self, max_attempts: int = BEDROCK_MAX_ATTEMPTS, backoff_base: float = BEDROCK_BACKOFF_BASE,
+                 backoff_cap: float = BEDROCK_BACKOFF_CAP):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._models: Dict[str, _ModelState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, model_id: str) -> _ModelState:
+        with self._lock:
+            state = self._models.get(model_id)
+            if state is None:
+                state = self._models[model_id] = _ModelState()
+            return state
+
+    def _count(self, state: _ModelState, priority_name: str, key: str):
+        with self._lock:
+            state.counters[priority_name][key] += 1
+
+    def _acquire(self, state: _ModelState, priority: int, priority_name: str):
+        timeout = BEDROCK_INTERACTIVE_QUEUE_TIMEOUT if priority == PRIORITY_INTERACTIVE else BEDROCK_BULK_QUEUE_TIMEOUT
+        started = time.perf_counter()
+        if not state.limiter.acquire(priority, timeout):
+            self._count(state, priority_name, "queue_timeouts")
+            raise BedrockThrottled(f"No Bedrock capacity after waiting {timeout}s ({priority_name}).")
+        delay = state.bucket.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            state.queue_waits[priority_name].append(time.perf_counter() - started)
+
+    def call(self, model_id: str, priority: int, invoke: Callable[[], Any], stream: bool = False):
+        """
+        Runs `invoke()` (one Bedrock API call) under the model's limits.
+        For streams the slot is released when the response body is consumed.
+        """
+        state = self._state(model_id)
+        priority_name = PRIORITY_NAMES.get(priority, "bulk")
+        self._count(state, priority_name, "calls")
+
+        def _release(outcome: str):
+            state.limiter.release(outcome)
+            if outcome == "ok":
+                self._count(state, priority_name, "ok")
+
+        for attempt in range(1, self.max_attempts + 1):
+            self._acquire(state, priority, priority_name)
+            try:
+                response = invoke()
+            except Exception as e:
+                if not is_throttle(e):
+                    state.limiter.release("error")
+                    self._count(state, priority_name, "errors")
+                    raise
+                state.limiter.release("throttled")
+                self._count(state, priority_name, "throttles")
+                if attempt == self.max_attempts:
+                    self._count(state, priority_name, "gave_up")
+                    raise BedrockThrottled(f"Bedrock throttled {model_id} {attempt} times: {e}") from e
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1)))
+                print(f"⚠️ Bedrock throttled ({priority_name}, attempt {attempt}); retrying in {delay:.2f}s")
+                self._count(state, priority_name, "retries")
+                time.sleep(delay)
+                continue
+
+            if stream:
+                response["body"] = _StreamBody(response["body"], _release)
+            else:
+                _release("ok")
+            return response
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            models = dict(self._models)
+        stats = {}
+        for model_id, state in models.items():
+            with self._lock:
+                counters = {name: dict(c) for name, c in state.counters.items()}
+                waits = {name: sorted(w) for name, w in state.queue_waits.items()}
+            for name, samples in waits.items():
+                counters[name]["queue_wait_avg_ms"] = round(sum(samples) / len(samples) * 1000, 1) if samples else None
+                counters[name]["queue_wait_p95_ms"] = (
+                    round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 1) if samples else None
+                )
+            stats[model_id] = {
+                "concurrency_limit": round(state.limiter.limit, 2),
+                "in_flight": state.limiter.in_flight,
+                "queued": state.limiter.queued(),
+                "rate_limit": state.bucket.rate,
+                "by_priority": counters,
+            }
+        return stats
+
+
+def _token_counts(data: Dict):
+    """
+    (input_tokens, output_tokens) from a response body or stream chunk:
+    Llama's own counts, or the invocation metrics Bedrock adds to the
+    last stream chunk.
+    """
+    metrics = data.get("amazon-bedrock-invocationMetrics") or {}
+    return (
+        data.get("prompt_token_count", metrics.get("inputTokenCount")),
+        data.get("generation_token_count", metrics.get("outputTokenCount")),
+    )
+
+
+class _AccountedStream:
+    """
+    Passes stream events through, picking up the token counts, and records
+    the call in `llm_usage` once the stream ends.
+    """
+
+    def __init__(self, body, on_done: Callable[[str, Optional[int], Optional[int]], None]):
+        self._body = body
+        self._on_done = on_done
+        self._done = False
+        self._input_tokens = None
+        self._output_tokens = None
+
+    def _finish(self, status: str):
+        if not self._done:
+            self._done = True
+            self._on_done(status, self._input_tokens, self._output_tokens)
+
+    def __iter__(self):
+        try:
+            for event in self._body:
+                chunk = event.get("chunk") if isinstance(event, dict) else None
+                if chunk:
+                    try:
+                        input_tokens, output_tokens = _token_counts(json.loads(chunk.get("bytes")))
+                        self._input_tokens = input_tokens if input_tokens is not None else self._input_tokens
+                        self._output_tokens = output_tokens if output_tokens is not None else self._output_tokens
+                    except (TypeError, ValueError):
+                        pass
+                yield event
+        except Exception as e:
+            self._finish("throttled" if is_throttle(e) else "error")
+            raise
+        self._finish("ok")
+
+    def close(self):
+        try:
+            self._body.close()
+        finally:
+            self._finish("cancelled")
+
+
+class GatedBedrockClient:
+    """
+    Drop-in for a bedrock-runtime client whose invoke calls go through the
+    gateway with a fixed priority. Anything else is passed to the client.
+
+    The invoke methods also take `call_site` and `cache` (not sent to AWS):
+    every call is recorded in `llm_usage` with its tokens and latency.
+    """
+
+    def __init__(self, client, gateway: BedrockGateway, priority: int):
+        self._client = client
+        self._gateway = gateway
+        self.priority = priority
+
+    def invoke_model(self, call_site: str = "unknown", cache: str = CACHE_NONE, **kwargs):
+        model_id = kwargs.get("modelId")
+        started = time.perf_counter()
+        try:
+            response = self._gateway.call(model_id, self.priority, lambda: self._client.invoke_model(**kwargs))
+        except Exception as e:
+            llm_usage.record(model_id, call_site, cache, status="throttled" if isinstance(e, BedrockThrottled) else "error",
+                             latency=time.perf_counter() - started)
+            raise
+
+        # Bedrock reports token counts in headers; older responses only in the body.
+        headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+        input_tokens = headers.get("x-amzn-bedrock-input-token-count")
+        output_tokens = headers.get("x-amzn-bedrock-output-token-count")
+        if input_tokens is None or output_tokens is None:
+            raw = response["body"].read()
+            response["body"] = io.BytesIO(raw)
+            try:
+                input_tokens, output_tokens = _token_counts(json.loads(raw))
+            except (TypeError, ValueError):
+                pass
+        llm_usage.record(
+            model_id, call_site, cache,
+            input_tokens=None if input_tokens is None else int(input_tokens),
+            output_tokens=None if output_tokens is None else int(output_tokens),
+            latency=time.perf_counter() - started,
+        )
+        return response
+
+    def invoke_model_with_response_stream(self, call_site: str = "unknown", cache: str = CACHE_NONE, **kwargs):
+        model_id = kwargs.get("modelId")
+        started = time.perf_counter()
+
+        def _record(status, input_tokens=None, output_tokens=None):
+            llm_usage.record(model_id, call_site, cache, status=status, input_tokens=input_tokens,
+                             output_tokens=output_tokens, latency=time.perf_counter() - started, stream=True)
+
+        try:
+            response = self._gateway.call(
+                model_id,
+                self.priority,
+                lambda: self._client.invoke_model_with_response_stream(**kwargs),
+                stream=True,
+            )
+        except Exception as e:
+            _record("throttled" if isinstance(e, BedrockThrottled) else "error")
+            raise
+        response["body"] = _AccountedStream(response["body"], _record)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+bedrock_gateway = BedrockGateway()
+
+
+def get_gated_bedrock_client(priority: int = PRIORITY_INTERACTIVE, gateway: Optional[BedrockGateway] = None):
+    """
+    The process's bedrock-runtime client (or the local stub when
+    BEDROCK_STUB is set), wrapped so calls go through `gateway`.
+    """
+    if BEDROCK_STUB:
+        from .bedrock_stub import stub_bedrock_runtime
+        client = stub_bedrock_runtime
+    else:
+        from .aws_clients import get_bedrock_runtime_client
+        client = get_bedrock_runtime_client()
+    return GatedBedrockClient(client, gateway or bedrock_gateway, priority)
@@ -1,9 +1,17 @@
 # services/bedrock_service.py
-import boto3
 import json
 import re
+import threading
+import time
+from collections import deque
 from django.conf import settings
 from botocore.exceptions import ClientError
+from .bedrock_gateway import get_gated_bedrock_client, PRIORITY_INTERACTIVE
+from .search_plan_cache import search_plan_cache
+from .answer_cache import answer_cache
+from .context_assembly import context_assembler
+from .llm_usage import llm_usage, CACHE_HIT, CACHE_LOCAL, CACHE_MISS, CACHE_BYPASS
+from .local_planner import LocalQueryPlanner, LOCAL_PLANNER_ENABLED
 
 # --- All possible filter keys from your CATEGORY_FIELDS ---
 # We tell Bedrock these are the only keys it can use
@@ -33,32 +41,110 @@ ALL_FILTER_KEYS = list(set(
     key for keys_list in CATEGORY_SPECIFIC_FIELDS.values() for key in keys_list
 ))
 
+# Rule-based planner tried before the router (see local_planner.py).
+local_planner = LocalQueryPlanner(CATEGORY_SPECIFIC_FIELDS)
+
+RAG_MODEL_ID = 'meta.llama3-70b-instruct-v1:0'
+PLANNER_MODEL_ID = 'meta.llama3-70b-instruct-v1:0'
+
+
+class StreamMetrics:
+    """
+    Time-to-first-token and total time of streamed answers, over the last
+    `window` streams (for percentiles) and since the process started.
+    """
+
+    def __init__(self, window: int = 500):
+        self._ttft = deque(maxlen=window)
+        self._total = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._streams = 0
+        self._failed = 0
+
+    def record(self, ttft, total: float, completed: bool):
+        with self._lock:
+            self._streams += 1
+            if not completed:
+                self._failed += 1
+            if ttft is not None:
+                self._ttft.append(ttft)
+            self._total.append(total)
+
+    @staticmethod
+    def _percentile(values, q: float):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    def get_stats(self):
+        with self._lock:
+            ttft, total = list(self._ttft), list(self._total)
+            return {
+                "streams": self._streams,
+                "failed_or_aborted": self._failed,
+                "ttft_p50_seconds": self._percentile(ttft, 0.5),
+                "ttft_p95_seconds": self._percentile(ttft, 0.95),
+                "ttft_avg_seconds": round(sum(ttft) / len(ttft), 3) if ttft else None,
+                "total_p50_seconds": self._percentile(total, 0.5),
+                "total_p95_seconds": self._percentile(total, 0.95),
+            }
+
+
+answer_stream_metrics = StreamMetrics()
+
 class BedrockService:
     
-    def __init__(self):
+    def __init__(self, priority: int = PRIORITY_INTERACTIVE):
         """
-        Initialize the Bedrock client
+        Initialize the Bedrock client. Calls go through the shared gateway
+        (rate / concurrency limits, throttle retries) at `priority`.
         """
         self.region_name = getattr(settings, 'AWS_REGION_BEDROCK', 'us-east-1')
         try:
-            self.bedrock_runtime = boto3.client(
-                'bedrock-runtime',
-                region_name=self.region_name,
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-            )
+            self.bedrock_runtime = get_gated_bedrock_client(priority)
         except AttributeError:
             raise Exception("FATAL ERROR: AWS keys not found in Django settings.")
         except ClientError as e:
             raise Exception(f"FATAL ERROR: Could not connect to Bedrock: {e}")
 
-    def get_search_plan(self, natural_query: str, category: str = None):
+    def get_search_plan(self, natural_query: str, category: str = None, call_site: str = "search_plan"):
         """
         Calls Bedrock (LLAMA 3) to convert a natural query into a structured
         JSON search plan (semantic_query + filters).
         
         If a 'category' is provided, it restricts the LLM to *only*
         the keys for that category.
+
+        The local rule-based planner is tried first; Bedrock is only called
+        when it is not confident. Plans are cached by normalized query +
+        category (see search_plan_cache); fallback plans from a failed call
+        are not cached. Every plan is logged in llm_usage under `call_site`.
+        """
+        reason = "disabled"
+        if LOCAL_PLANNER_ENABLED:
+            plan, reason = local_planner.plan(natural_query, category)
+            if plan is not None:
+                print(f"✅ Local planner handled '{natural_query}' -> {plan['filters']}")
+                local_planner.record(natural_query, category, "local", reason)
+                llm_usage.record(PLANNER_MODEL_ID, call_site, CACHE_LOCAL)
+                return plan
+
+        local_planner.record(natural_query, category, "bedrock", reason)
+        called = []
+
+        def _compute():
+            called.append(True)
+            return self._plan_with_bedrock(natural_query, category, call_site)
+
+        plan = search_plan_cache.get_or_compute(natural_query, category, _compute)
+        if not called:
+            llm_usage.record(PLANNER_MODEL_ID, call_site, CACHE_HIT)
+        return plan
+
+    def _plan_with_bedrock(self, natural_query: str, category: str = None, call_site: str = "search_plan"):
+        """
+        Returns (plan, ok). `ok` is False when the fallback plan was used.
         """
         print(f"Calling Bedrock Router (Llama 3) for query: '{natural_query}'")
         
@@ -133,7 +219,7 @@ class BedrockService:
         Response:
         """
 
-        model_id = 'meta.llama3-70b-instruct-v1:0' 
+        model_id = PLANNER_MODEL_ID
         # ... (rest of the function is unchanged) ...
         body = json.dumps({
             "prompt": f"<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\n{system_prompt}<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n{user_prompt}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n",
@@ -142,7 +228,9 @@ class BedrockService:
             "top_p": 0.9,
         })
         try:
-            response = self.bedrock_runtime.invoke_model(body=body, modelId=model_id)
+            response = self.bedrock_runtime.invoke_model(
+                body=body, modelId=model_id, call_site=call_site, cache=CACHE_MISS,
+            )
             response_body = json.loads(response['body'].read())
             json_plan_str = response_body['generation']
             
@@ -153,17 +241,15 @@ class BedrockService:
             
             json_plan_str = re.sub(r",\s*([}\]])", r"\1", json_plan_str)
             print(f"Bedrock search plan: {json_plan_str}")
-            return json.loads(json_plan_str)
+            return json.loads(json_plan_str), True
         except Exception as e:
             print(f"Error calling Bedrock router: {e}")
-            return {"semantic_query": natural_query, "filters": {}}                
+            return {"semantic_query": natural_query, "filters": {}}, False                
         
-    def get_answer_from_context(self, context: str, query: str) -> str:
+    def _build_rag_request(self, context: str, query: str):
         """
-        Calls Bedrock (Llama 3 70B) to answer a query based *only* on the provided context.
+        Returns (model_id, body) for a grounded answer to `query` over `context`.
         """
-        print(f"Calling Bedrock RAG (Llama 3-70b) for query: '{query}'")
-        
         # This system prompt is CRITICAL for grounding the model.
         system_prompt = (
             "You are an expert contract analysis assistant. You must answer the user's question based"
@@ -183,7 +269,7 @@ class BedrockService:
         """
 
         # We use the 8B model here. It's fast and excellent for RAG.
-        model_id = 'meta.llama3-70b-instruct-v1:0'
+        model_id = RAG_MODEL_ID
         
         body = json.dumps({
             "prompt": f"<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\n{system_prompt}<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n{user_prompt}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n",
@@ -191,13 +277,95 @@ class BedrockService:
             "temperature": 0.1, # Low temp for factual, grounded answers
             "top_p": 0.9,
         })
+        return model_id, body
+
+    def get_answer_from_context(self, context: str, query: str, use_cache: bool = True,
+                                call_site: str = "rag_answer") -> str:
+        """
+        Calls Bedrock (Llama 3 70B) to answer a query based *only* on the provided context.
+        """
+        return self.get_answer_with_provenance(context, query, use_cache=use_cache, call_site=call_site)[0]
+
+    def get_answer_with_provenance(self, context: str, query: str, use_cache: bool = True,
+                                   call_site: str = "rag_answer"):
+        """
+        Returns (answer, provenance). Answers are cached by context hash +
+        normalized query + model id (see answer_cache); `provenance` says
+        whether this one was a cache hit, a miss, or bypassed (use_cache=False).
+
+        `call_site` names the endpoint in the LLM usage log (see llm_usage).
+        """
+        cache_status = CACHE_MISS if use_cache else CACHE_BYPASS
+        answer, provenance = answer_cache.get_or_compute(
+            context,
+            query,
+            RAG_MODEL_ID,
+            lambda: self._answer_with_bedrock(context, query, call_site, cache_status),
+            use_cache=use_cache,
+        )
+        if provenance["status"] == "hit":
+            llm_usage.record(RAG_MODEL_ID, call_site, CACHE_HIT)
+        return answer, provenance
+
+    def answer_from_document(self, text: str, query: str, use_cache: bool = True,
+                             call_site: str = "rag_answer"):
+        """
+        Returns (answer, provenance, context_info) for a question about a
+        whole document. The answer cache is keyed on the full text plus the
+        assembly settings and checked first; only on a miss are the relevant
+        passages picked (see context_assembly) and sent to the model, so
+        `context_info` is None for cache hits.
+        """
+        cache_status = CACHE_MISS if use_cache else CACHE_BYPASS
+        context_info = {}
+
+        def _compute():
+            context, info = context_assembler.assemble(text, query)
+            context_info.update(info)
+            return self._answer_with_bedrock(context, query, call_site, cache_status)
+
+        answer, provenance = answer_cache.get_or_compute(
+            context_assembler.cache_context(text),
+            query,
+            RAG_MODEL_ID,
+            _compute,
+            use_cache=use_cache,
+        )
+        if provenance["status"] == "hit":
+            llm_usage.record(RAG_MODEL_ID, call_site, CACHE_HIT)
+        return answer, provenance, context_info or None
+
+    def lookup_cached_answer(self, context: str, query: str, call_site: str = "rag_answer"):
+        """
+        Returns (answer, provenance) when this question was already answered
+        on this context, else None. Used by the streaming path.
+        """
+        key = answer_cache.make_key(context, query, RAG_MODEL_ID)
+        entry = answer_cache.get(key)
+        if entry is None:
+            return None
+        llm_usage.record(RAG_MODEL_ID, call_site, CACHE_HIT)
+        return entry["answer"], answer_cache.hit_provenance(entry)
+
+    def cache_answer(self, context: str, query: str, answer: str, seconds: float):
+        key = answer_cache.make_key(context, query, RAG_MODEL_ID)
+        answer_cache.record_miss(seconds)
+        answer_cache.set(key, answer, seconds)
+        return {"status": "miss", "seconds": round(seconds, 3)}
+
+    def _answer_with_bedrock(self, context: str, query: str, call_site: str = "rag_answer",
+                             cache_status: str = CACHE_MISS) -> str:
+        print(f"Calling Bedrock RAG (Llama 3-70b) for query: '{query}'")
+        model_id, body = self._build_rag_request(context, query)
         
         try:
             response = self.bedrock_runtime.invoke_model(
                 body=body,
                 modelId=model_id,
                 contentType='application/json',
-                accept='application/json'
+                accept='application/json',
+                call_site=call_site,
+                cache=cache_status,
             )
             
             response_body = json.loads(response.get('body').read())
@@ -207,5 +375,54 @@ class BedrockService:
         
         except Exception as e:
             print(f"Error invoking Llama 3 for RAG: {e}")
-            raise e        
+            raise e
+
+    def stream_answer_from_context(self, context: str, query: str, call_site: str = "rag_answer",
+                                   cache_status: str = CACHE_MISS):
+        """
+        Same answer as `get_answer_from_context`, but yields the generation
+        piece by piece as Bedrock produces it (invoke_model_with_response_stream).
 
+        Time-to-first-token and total time of every stream are recorded in
+        `answer_stream_metrics`.
+        """
+        print(f"Streaming Bedrock RAG (Llama 3-70b) for query: '{query}'")
+        model_id, body = self._build_rag_request(context, query)
+
+        started = time.perf_counter()
+        first_token_at = None
+        completed = False
+        stream = None
+        try:
+            response = self.bedrock_runtime.invoke_model_with_response_stream(
+                body=body,
+                modelId=model_id,
+                contentType='application/json',
+                accept='application/json',
+                call_site=call_site,
+                cache=cache_status,
+            )
+            stream = response.get('body')
+            for event in stream:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                data = json.loads(chunk.get('bytes'))
+                text = data.get('generation') or ''
+                if text:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    yield text
+            completed = True
+        except Exception as e:
+            print(f"Error streaming Llama 3 for RAG: {e}")
+            raise
+        finally:
+            # Releases the connection if the client went away mid-stream.
+            if stream is not None and not completed:
+                stream.close()
+            answer_stream_metrics.record(
+                ttft=None if first_token_at is None else first_token_at - started,
+                total=time.perf_counter() - started,
+                completed=completed,
+            )
@@ -0,0 +1,99 @@
+# backend/resume/services/bedrock_stub.py
+
+import io
+import json
+import random
+import threading
+import time
+from django.conf import settings
+from botocore.exceptions import ClientError
+
+BEDROCK_STUB_CAPACITY = getattr(settings, 'BEDROCK_STUB_CAPACITY', 4)
+BEDROCK_STUB_LATENCY = getattr(settings, 'BEDROCK_STUB_LATENCY', 0.2)
+BEDROCK_STUB_THROTTLE_RATE = getattr(settings, 'BEDROCK_STUB_THROTTLE_RATE', 0.0)
+
+STUB_GENERATION = '{"semantic_query": "stub answer", "filters": {}}'
+
+
+class StubBedrockRuntime:
+    """
+    Local stand-in for the bedrock-runtime client, for exercising the
+    gateway without AWS. It serves at most `capacity` calls at once and
+    answers anything beyond that (plus a random `throttle_rate` share of
+    calls) with a ThrottlingException, like Bedrock under load.
+    """
+
+    def __init__(self, capacity: int = BEDROCK_STUB_CAPACITY, latency: float = BEDROCK_STUB_LATENCY,
+                 throttle_rate: float = BEDROCK_STUB_THROTTLE_RATE, generation: str = STUB_GENERATION):
+        self.capacity = capacity
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.generation = generation
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _enter(self, operation: str):
+        with self._lock:
+            self.calls += 1
+            if self.in_flight >= self.capacity or random.random() < self.throttle_rate:
+                self.throttled += 1
+                raise ClientError(
+                    {"Error": {"Code": "ThrottlingException", "Message": "Too many requests, please wait before trying again."}},
+                    operation,
+                )
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _result(self, body: str) -> dict:
+        prompt = json.loads(body or "{}").get("prompt", "")
+        return {
+            "generation": self.generation,
+            "prompt_token_count": len(prompt) // 4,
+            "generation_token_count": len(self.generation) // 4,
+            "stop_reason": "stop",
+        }
+
+    def invoke_model(self, body=None, modelId=None, **kwargs):
+        self._enter("InvokeModel")
+        try:
+            time.sleep(self.latency)
+            return {"body": io.BytesIO(json.dumps(self._result(body)).encode("utf-8"))}
+        finally:
+            self._exit()
+
+    def invoke_model_with_response_stream(self, body=None, modelId=None, **kwargs):
+        self._enter("InvokeModelWithResponseStream")
+        result = self._result(body)
+        words = result["generation"].split(" ")
+
+        def _events():
+            try:
+                for i, word in enumerate(words):
+                    time.sleep(self.latency / len(words))
+                    piece = word if i == 0 else f" {word}"
+                    yield {"chunk": {"bytes": json.dumps({"generation": piece}).encode("utf-8")}}
+                final = dict(result, generation="")
+                yield {"chunk": {"bytes": json.dumps(final).encode("utf-8")}}
+            finally:
+                self._exit()
+
+        return {"body": _events()}
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+stub_bedrock_runtime = StubBedrockRuntime()
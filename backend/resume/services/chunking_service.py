@@ -0,0 +1,59 @@
+# backend/resume/services/chunking_service.py
+
+from typing import Dict, List
+from django.conf import settings
+from .embedding_service import get_tokenizer
+
+# all-MiniLM-L6-v2 truncates at 256 word-pieces (including [CLS]/[SEP]),
+# so chunks are kept comfortably below that.
+CHUNK_MAX_TOKENS = getattr(settings, 'CHUNK_MAX_TOKENS', 200)
+CHUNK_OVERLAP_TOKENS = getattr(settings, 'CHUNK_OVERLAP_TOKENS', 40)
+
+
+def split_into_chunks(
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+) -> List[Dict]:
+    """
+    Splits `text` into overlapping windows of at most `max_tokens` word-pieces,
+    as counted by the embedding model's own tokenizer.
+
+    Each chunk is a slice of the original text, returned as:
+        {"index": 0, "text": "...", "start": 0, "end": 812, "token_count": 200}
+    """
+    if not text or not text.strip():
+        return []
+
+    max_tokens = max(1, int(max_tokens))
+    overlap_tokens = max(0, min(int(overlap_tokens), max_tokens - 1))
+
+    encoding = get_tokenizer()(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False,
+    )
+    offsets = encoding["offset_mapping"]
+    if not offsets:
+        return []
+
+    chunks = []
+    step = max_tokens - overlap_tokens
+    start_token = 0
+    while start_token < len(offsets):
+        end_token = min(start_token + max_tokens, len(offsets))
+        char_start = offsets[start_token][0]
+        char_end = offsets[end_token - 1][1]
+        chunks.append({
+            "index": len(chunks),
+            "text": text[char_start:char_end],
+            "start": char_start,
+            "end": char_end,
+            "token_count": end_token - start_token,
+        })
+        if end_token == len(offsets):
+            break
+        start_token += step
+
+    return chunks
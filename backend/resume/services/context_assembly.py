@@ -0,0 +1,184 @@
+# backend/resume/services/context_assembly.py
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from .chunking_service import split_into_chunks, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+from .embedding_service import get_text_embeddings
+
+# Contract text sent to the model per question, in (MiniLM) tokens. Documents
+# shorter than this are sent whole.
+RAG_CONTEXT_TOKEN_BUDGET = getattr(settings, 'RAG_CONTEXT_TOKEN_BUDGET', 1500)
+# Weight of the embedding similarity vs. the lexical (BM25) score.
+RAG_DENSE_WEIGHT = getattr(settings, 'RAG_DENSE_WEIGHT', 0.7)
+RAG_PASSAGE_CACHE_TIMEOUT = getattr(settings, 'RAG_PASSAGE_CACHE_TIMEOUT', 60 * 60 * 24 * 7)  # 1 week
+
+PASSAGE_SEPARATOR = "\n\n[...]\n\n"
+_WORD = re.compile(r"\w+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "the", "this", "to", "what", "when", "where", "which", "who",
+    "will", "with", "there", "any", "can", "i", "me", "my", "our", "we", "you",
+}
+
+
+def _terms(text: str) -> List[str]:
+    return [t for t in _WORD.findall(text.casefold()) if t not in _STOPWORDS]
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _bm25(query_terms: List[str], passages: List[List[str]], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    n = len(passages)
+    avg_len = sum(len(p) for p in passages) / n if n else 0.0
+    df = Counter(term for p in passages for term in set(p))
+    scores = []
+    for terms in passages:
+        tf = Counter(terms)
+        score = 0.0
+        for term in set(query_terms):
+            if term not in tf:
+                continue
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(terms) / (avg_len or 1)))
+        scores.append(score)
+    return scores
+
+
+class ContextAssembler:
+    """
+    Picks the passages of a contract that matter for one question, instead
+    of sending the whole text to the model:
+
+      1. split the document into the same overlapping windows ingestion
+         embeds (CHUNK_MAX_TOKENS / CHUNK_OVERLAP_TOKENS), so passage vectors
+         are usually already in the embedding cache (boundaries cached per
+         document content hash)
+      2. score each passage against the question: MiniLM cosine similarity
+         blended with BM25
+      3. take the best passages until RAG_CONTEXT_TOKEN_BUDGET is used up and
+         join them in document order (adjacent passages merge back together)
+    """
+
+    def __init__(self, token_budget: int = RAG_CONTEXT_TOKEN_BUDGET, passage_tokens: int = CHUNK_MAX_TOKENS,
+                 passage_overlap: int = CHUNK_OVERLAP_TOKENS, dense_weight: float = RAG_DENSE_WEIGHT):
+        self.token_budget = token_budget
+        self.passage_tokens = passage_tokens
+        self.passage_overlap = max(0, min(passage_overlap, passage_tokens - 1))
+        self.dense_weight = dense_weight
+        self._lock = threading.Lock()
+
+        # --- Counters ---
+        self._calls = 0
+        self._trimmed = 0
+        self._chars_in = 0
+        self._chars_out = 0
+
+    def _passage_bounds(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Returns [(start, end, token_count)] for `text`, cached by its hash.
+        """
+        key = f"passages:{self.passage_tokens}:{self.passage_overlap}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+        try:
+            bounds = cache.get(key)
+        except Exception as e:
+            print(f"⚠️ Passage cache read failed: {e}")
+            bounds = None
+        if bounds is not None:
+            return bounds
+
+        bounds = [
+            (chunk["start"], chunk["end"], chunk["token_count"])
+            for chunk in split_into_chunks(text, max_tokens=self.passage_tokens, overlap_tokens=self.passage_overlap)
+        ]
+        try:
+            cache.set(key, bounds, timeout=RAG_PASSAGE_CACHE_TIMEOUT)
+        except Exception as e:
+            print(f"⚠️ Passage cache write failed: {e}")
+        return bounds
+
+    def cache_context(self, text: str) -> str:
+        """
+        What answers about `text` are cached under: the full text plus the
+        assembly settings, so a cached answer is found without assembling.
+        """
+        settings_part = f"{self.token_budget}:{self.passage_tokens}:{self.passage_overlap}:{self.dense_weight}"
+        return f"assembled:{settings_part}\x00{text}"
+
+    def assemble(self, text: str, query: str) -> Tuple[str, Dict]:
+        """
+        Returns (context, info). `info` has the passage counts and the
+        token sizes before and after.
+        """
+        bounds = self._passage_bounds(text)
+        # Consecutive passages share `passage_overlap` tokens.
+        overlap = self.passage_overlap
+        total_tokens = sum(tokens for _, _, tokens in bounds) - overlap * max(0, len(bounds) - 1)
+        info = {"passages": len(bounds), "selected": len(bounds), "tokens": total_tokens, "full_tokens": total_tokens}
+
+        if total_tokens <= self.token_budget:
+            self._record(text, text, trimmed=False)
+            return text, info
+
+        passages = [text[start:end] for start, end, _ in bounds]
+        query_vector, *passage_vectors = get_text_embeddings([query] + passages)
+        dense = [_cosine(query_vector, v) for v in passage_vectors]
+        lexical = _bm25(_terms(query), [_terms(p) for p in passages])
+        top_lexical = max(lexical) or 1.0
+        scores = [
+            self.dense_weight * d + (1 - self.dense_weight) * (l / top_lexical)
+            for d, l in zip(dense, lexical)
+        ]
+
+        chosen, used = set(), 0
+        for i in sorted(range(len(passages)), key=lambda i: scores[i], reverse=True):
+            tokens = bounds[i][2] - overlap * ((i - 1 in chosen) + (i + 1 in chosen))
+            if used + tokens > self.token_budget:
+                continue
+            chosen.add(i)
+            used += tokens
+
+        parts = []
+        for i in sorted(chosen):
+            start, end, _ = bounds[i]
+            if parts and parts[-1][1] == i - 1:
+                # Adjacent passages: extend the previous span through this one.
+                parts[-1] = (parts[-1][0], i, parts[-1][2], end)
+            else:
+                parts.append((i, i, start, end))
+        context = PASSAGE_SEPARATOR.join(text[start:end] for _, _, start, end in parts)
+
+        info.update(selected=len(chosen), tokens=used)
+        self._record(text, context, trimmed=True)
+        print(f"✂️ Context trimmed to {len(chosen)}/{len(bounds)} passages ({used}/{total_tokens} tokens)")
+        return context, info
+
+    def _record(self, text: str, context: str, trimmed: bool):
+        with self._lock:
+            self._calls += 1
+            self._trimmed += int(trimmed)
+            self._chars_in += len(text)
+            self._chars_out += len(context)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "token_budget": self.token_budget,
+                "calls": self._calls,
+                "trimmed": self._trimmed,
+                "chars_in": self._chars_in,
+                "chars_out": self._chars_out,
+                "reduction": round(1 - self._chars_out / self._chars_in, 4) if self._chars_in else 0.0,
+            }
+
+
+context_assembler = ContextAssembler()
@@ -0,0 +1,189 @@
+# backend/resume/services/embedding_backends.py
+
+import math
+import os
+import time
+from typing import Dict, List
+
+HF_MODEL_PREFIX = "sentence-transformers/"
+
+
+class TorchEmbeddingBackend:
+    """
+    The reference backend: sentence-transformers on PyTorch (fp32).
+    """
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        # Imported here so that importing this module does not pull in torch.
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.tokenizer = self.model.tokenizer
+
+    def encode(self, texts: List[str], batch_size: int = 32):
+        return self.model.encode(texts, batch_size=batch_size)
+
+
+class OnnxEmbeddingBackend:
+    """
+    ONNX Runtime backend with dynamic int8 quantization, for CPU-only hosts.
+
+    On first use the Hugging Face model is exported to ONNX (and quantized)
+    under `onnx_dir`; later boots load the exported file directly. Pooling
+    matches all-MiniLM-L6-v2's sentence-transformers pipeline: mean pooling
+    over the attention mask followed by L2 normalization.
+    """
+    name = "onnx"
+
+    def __init__(self, model_name: str, onnx_dir: str, quantize: bool = True, intra_op_threads: int = 0, max_seq_length: int = 256):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND='onnx' requires the 'onnxruntime' and 'onnx' packages."
+            ) from e
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.hf_model_id = model_name if "/" in model_name else HF_MODEL_PREFIX + model_name
+        self.max_seq_length = max_seq_length
+        self.quantize = quantize
+        self.tokenizer = AutoTokenizer.from_pretrained(self.hf_model_id)
+
+        model_path = self._ensure_exported(onnx_dir)
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _ensure_exported(self, onnx_dir: str) -> str:
+        safe_name = self.hf_model_id.replace("/", "__")
+        fp32_path = os.path.join(onnx_dir, f"{safe_name}.onnx")
+        int8_path = os.path.join(onnx_dir, f"{safe_name}.int8.onnx")
+        target_path = int8_path if self.quantize else fp32_path
+        if os.path.exists(target_path):
+            return target_path
+
+        from filelock import FileLock
+
+        os.makedirs(onnx_dir, exist_ok=True)
+        # Workers booting together export once; the others wait here and then
+        # find the finished file. Files are written under a temporary name
+        # and moved into place, so a final path is never half-written.
+        with FileLock(os.path.join(onnx_dir, f"{safe_name}.lock")):
+            if os.path.exists(target_path):
+                return target_path
+            if not os.path.exists(fp32_path):
+                self._write_atomically(fp32_path, self._export)
+            if self.quantize:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                print(f"⏳ Quantizing {fp32_path} to int8...")
+                self._write_atomically(
+                    int8_path,
+                    lambda path: quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8),
+                )
+                print(f"✅ Quantized model written to {int8_path}")
+        return target_path
+
+    @staticmethod
+    def _write_atomically(path: str, write_fn):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            write_fn(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _export(self, fp32_path: str):
+        import torch
+        from transformers import AutoModel
+
+        print(f"⏳ Exporting {self.hf_model_id} to ONNX...")
+        model = AutoModel.from_pretrained(self.hf_model_id)
+        model.eval()
+        sample = self.tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+                dynamo=False,
+            )
+        print(f"✅ ONNX model written to {fp32_path}")
+
+    def encode(self, texts: List[str], batch_size: int = 32):
+        import numpy as np
+
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            encoded = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            summed = (token_embeddings * mask).sum(axis=1)
+            counts = np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled = summed / counts
+            norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            outputs.append((pooled / norms).astype(np.float32))
+
+        return np.concatenate(outputs, axis=0) if outputs else np.zeros((0, 0), dtype=np.float32)
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def compare_backends(reference, candidate, texts: List[str], batch_size: int = 32) -> Dict:
+    """
+    Encodes `texts` with both backends and reports the cosine drift of the
+    candidate's vectors against the reference, plus the encode time of each.
+    """
+    started = time.perf_counter()
+    reference_vectors = reference.encode(texts, batch_size=batch_size)
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    candidate_vectors = candidate.encode(texts, batch_size=batch_size)
+    candidate_seconds = time.perf_counter() - started
+
+    drifts = sorted(
+        1.0 - _cosine(list(ref), list(cand))
+        for ref, cand in zip(reference_vectors, candidate_vectors)
+    )
+    if not drifts:
+        return {"texts": 0}
+
+    return {
+        "texts": len(drifts),
+        "mean_cosine_drift": sum(drifts) / len(drifts),
+        "p95_cosine_drift": drifts[min(len(drifts) - 1, int(len(drifts) * 0.95))],
+        "max_cosine_drift": drifts[-1],
+        f"{reference.name}_seconds": round(reference_seconds, 3),
+        f"{candidate.name}_seconds": round(candidate_seconds, 3),
+        "speedup": round(reference_seconds / candidate_seconds, 2) if candidate_seconds else None,
+    }
@@ -0,0 +1,187 @@
+# backend/resume/services/embedding_cache.py
+
+import hashlib
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from django.conf import settings
+from django.core.cache import caches
+
+EMBEDDING_CACHE_MAX_BYTES = getattr(settings, 'EMBEDDING_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+EMBEDDING_CACHE_SHARED = getattr(settings, 'EMBEDDING_CACHE_SHARED', False)
+EMBEDDING_CACHE_ALIAS = getattr(settings, 'EMBEDDING_CACHE_ALIAS', 'default')
+EMBEDDING_CACHE_TIMEOUT = getattr(settings, 'EMBEDDING_CACHE_TIMEOUT', 60 * 60 * 24 * 7)  # 7 days
+
+# Rough per-entry overhead of the OrderedDict slot, key string and bytes object.
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes text before hashing so trivially different strings
+    (unicode forms, extra whitespace) share a cache entry.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    return array('f', vector).tobytes()
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    vector = array('f')
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache for embedding vectors.
+
+    Keys are a SHA-256 of the model name plus the normalized text. Vectors are
+    stored as packed float32 bytes in two tiers:
+      1. an in-process LRU bounded by `max_bytes`
+      2. an optional shared Django cache (Redis via django-redis in production)
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_bytes: int = EMBEDDING_CACHE_MAX_BYTES,
+        shared: bool = EMBEDDING_CACHE_SHARED,
+        shared_alias: str = EMBEDDING_CACHE_ALIAS,
+        shared_timeout: int = EMBEDDING_CACHE_TIMEOUT,
+    ):
+        self.model_name = model_name
+        self.max_bytes = int(max_bytes)
+        self.shared = shared
+        self.shared_alias = shared_alias
+        self.shared_timeout = shared_timeout
+
+        self._lru: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # --- Counters ---
+        self._lru_hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._shared_errors = 0
+
+    def make_key(self, text: str) -> str:
+        digest = hashlib.sha256(f"{self.model_name}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+        return f"emb:{digest}"
+
+    # ------------------------------------------------------------
+    # In-process LRU tier
+    # ------------------------------------------------------------
+    def _lru_get(self, key: str) -> Optional[bytes]:
+        data = self._lru.get(key)
+        if data is not None:
+            self._lru.move_to_end(key)
+        return data
+
+    def _lru_put(self, key: str, data: bytes):
+        size = len(data) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        previous = self._lru.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous) + _ENTRY_OVERHEAD_BYTES
+        self._lru[key] = data
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._lru:
+            _, evicted = self._lru.popitem(last=False)
+            self._bytes -= len(evicted) + _ENTRY_OVERHEAD_BYTES
+            self._evictions += 1
+
+    # ------------------------------------------------------------
+    # Shared tier
+    # ------------------------------------------------------------
+    def _shared_get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        if not self.shared or not keys:
+            return {}
+        try:
+            return caches[self.shared_alias].get_many(keys)
+        except Exception as e:
+            self._shared_errors += 1
+            print(f"⚠️ Shared embedding cache read failed: {e}")
+            return {}
+
+    def _shared_set_many(self, entries: Dict[str, bytes]):
+        if not self.shared or not entries:
+            return
+        try:
+            caches[self.shared_alias].set_many(entries, timeout=self.shared_timeout)
+        except Exception as e:
+            self._shared_errors += 1
+            print(f"⚠️ Shared embedding cache write failed: {e}")
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    def get_or_compute(self, texts: List[str], compute_fn: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        Returns one vector per text, calling `compute_fn` only for texts
+        missing from both tiers (each distinct miss is computed once).
+        """
+        keys = [self.make_key(text) for text in texts]
+        found: Dict[str, bytes] = {}
+
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                data = self._lru_get(key)
+                if data is not None:
+                    found[key] = data
+                    self._lru_hits += 1
+
+        shared_lookup = list(dict.fromkeys(k for k in keys if k not in found))
+        shared_found = self._shared_get_many(shared_lookup)
+        if shared_found:
+            with self._lock:
+                for key, data in shared_found.items():
+                    found[key] = data
+                    self._lru_put(key, data)
+                self._shared_hits += len(shared_found)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = compute_fn(list(missing.values()))
+            computed = {key: pack_vector(vector) for key, vector in zip(missing.keys(), vectors)}
+            with self._lock:
+                self._misses += len(missing)
+                for key, data in computed.items():
+                    self._lru_put(key, data)
+            self._shared_set_many(computed)
+            found.update(computed)
+
+        return [unpack_vector(found[key]) for key in keys]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            hits = self._lru_hits + self._shared_hits
+            lookups = hits + self._misses
+            return {
+                "model": self.model_name,
+                "lru_entries": len(self._lru),
+                "lru_bytes": self._bytes,
+                "lru_max_bytes": self.max_bytes,
+                "lru_hits": self._lru_hits,
+                "shared_enabled": self.shared,
+                "shared_hits": self._shared_hits,
+                "shared_errors": self._shared_errors,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
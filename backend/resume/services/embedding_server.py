@@ -0,0 +1,180 @@
+# backend/resume/services/embedding_server.py
+"""
+Out-of-process embedding server.
+
+A pool of model processes listens on a Unix socket, so slow encodes (large
+uploads) never run on a web worker's request thread. Run it with:
+
+    python manage.py embedding_server
+
+and point the web workers at it with EMBEDDING_SERVER_SOCKET. The embedding
+service then transparently sends its batches here instead of encoding locally.
+
+Wire format (both directions): 4-byte big-endian length + body.
+    request:  JSON {"texts": [...], "batch_size": 32}
+    response: JSON {"ok": true, "count": n, "dim": d}, then one more frame with
+              the n*d vectors packed as float32 (or {"ok": false, "error": "..."})
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import struct
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+_LENGTH = struct.Struct(">I")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("Embedding server connection closed.")
+        received += count
+    return bytes(buffer)
+
+
+def send_frame(sock: socket.socket, body: bytes):
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return _recv_exact(sock, size)
+
+
+# ------------------------------------------------------------
+# Pool worker side
+# ------------------------------------------------------------
+_worker_backend = None
+
+
+def _init_worker(torch_threads: int):
+    global _worker_backend
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    from .embedding_service import EMBEDDING_BACKEND, build_backend
+    _worker_backend = build_backend(EMBEDDING_BACKEND)
+    _worker_backend.encode(["warmup"])
+    print(f"✅ Embedding worker {os.getpid()} ready ({EMBEDDING_BACKEND}, {torch_threads} torch threads).")
+
+
+def _encode_in_worker(texts: List[str], batch_size: int):
+    import numpy as np
+    vectors = np.asarray(_worker_backend.encode(texts, batch_size=batch_size), dtype=np.float32)
+    dim = vectors.shape[1] if vectors.ndim == 2 else 0
+    return dim, vectors.tobytes()
+
+
+# ------------------------------------------------------------
+# Server side
+# ------------------------------------------------------------
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        while True:
+            try:
+                request = json.loads(recv_frame(sock))
+            except (ConnectionError, OSError):
+                return
+            try:
+                texts = request["texts"]
+                batch_size = int(request.get("batch_size", 32))
+                dim, packed = self.server.pool.submit(_encode_in_worker, texts, batch_size).result()
+                send_frame(sock, json.dumps({"ok": True, "count": len(texts), "dim": dim}).encode())
+                send_frame(sock, packed)
+            except Exception as e:
+                print(f"❌ Embedding server request failed: {e}")
+                send_frame(sock, json.dumps({"ok": False, "error": str(e)}).encode())
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, workers: int = 2, torch_threads: int = 1):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        # The parent never loads the model itself, so forking workers is safe.
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(torch_threads,),
+        )
+        super().__init__(socket_path, _EmbeddingRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+# ------------------------------------------------------------
+# Client side
+# ------------------------------------------------------------
+class EmbeddingServerClient:
+    """
+    Client used by the embedding service when EMBEDDING_SERVER_SOCKET is set.
+    Keeps one persistent connection and reconnects once on failure.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._sock = sock
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def _request(self, texts: List[str], batch_size: int):
+        if self._sock is None:
+            self._connect()
+        send_frame(self._sock, json.dumps({"texts": texts, "batch_size": batch_size}).encode())
+        header = json.loads(recv_frame(self._sock))
+        if not header.get("ok"):
+            raise RuntimeError(f"Embedding server error: {header.get('error')}")
+        return header, recv_frame(self._sock)
+
+    def encode(self, texts: List[str], batch_size: int = 32):
+        """
+        Returns one float32 `array` per text (each supports `.tolist()`).
+        """
+        with self._lock:
+            try:
+                header, packed = self._request(texts, batch_size)
+            except (ConnectionError, OSError):
+                self.close()
+                header, packed = self._request(texts, batch_size)
+
+        vectors = array('f')
+        vectors.frombytes(packed)
+        dim = header["dim"]
+        return [vectors[i * dim:(i + 1) * dim] for i in range(header["count"])]
+
+    def ping(self):
+        return self.encode(["ping"])
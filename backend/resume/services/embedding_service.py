@@ -1,14 +1,288 @@
-from sentence_transformers import SentenceTransformer
 import os
 import re
-from typing import Dict
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+from django.conf import settings
+from .embedding_cache import EmbeddingCache
+from . import resource_registry
+from .embedding_backends import TorchEmbeddingBackend, OnnxEmbeddingBackend, HF_MODEL_PREFIX
+from .embedding_server import EmbeddingServerClient
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# --- Inference backend ---
+# 'torch' (sentence-transformers, fp32) or 'onnx' (ONNX Runtime, int8 by default).
+EMBEDDING_BACKEND = getattr(settings, 'EMBEDDING_BACKEND', 'torch')
+EMBEDDING_ONNX_DIR = getattr(settings, 'EMBEDDING_ONNX_DIR', os.path.join('data', 'onnx'))
+EMBEDDING_ONNX_QUANTIZE = getattr(settings, 'EMBEDDING_ONNX_QUANTIZE', True)
+EMBEDDING_ONNX_THREADS = getattr(settings, 'EMBEDDING_ONNX_THREADS', 0)
+
+
+def build_backend(name: str = EMBEDDING_BACKEND):
+    """
+    Builds an embedding backend by name. Backends expose `encode(texts, batch_size)`
+    and the model's `tokenizer`.
+    """
+    if name == 'torch':
+        return TorchEmbeddingBackend(MODEL_NAME)
+    if name == 'onnx':
+        return OnnxEmbeddingBackend(
+            MODEL_NAME,
+            EMBEDDING_ONNX_DIR,
+            quantize=EMBEDDING_ONNX_QUANTIZE,
+            intra_op_threads=EMBEDDING_ONNX_THREADS,
+        )
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}'. Options are: torch, onnx")
+
+
+# --- Out-of-process mode ---
+# When set, batches are sent to `manage.py embedding_server` over this Unix
+# socket and the web process never loads the model itself.
+EMBEDDING_SERVER_SOCKET = getattr(settings, 'EMBEDDING_SERVER_SOCKET', None)
+EMBEDDING_SERVER_TIMEOUT = getattr(settings, 'EMBEDDING_SERVER_TIMEOUT', 60)
+
+
+def _load_tokenizer():
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(HF_MODEL_PREFIX + MODEL_NAME)
+
+
+if EMBEDDING_SERVER_SOCKET:
+    # The client holds a socket, so it is rebuilt after a fork.
+    model_resource = resource_registry.register(
+        'embedding_server',
+        lambda: EmbeddingServerClient(EMBEDDING_SERVER_SOCKET, timeout=EMBEDDING_SERVER_TIMEOUT),
+        warmup=lambda client: client.ping(),
+        fork_safe=False,
+    )
+    # The chunker still needs the tokenizer locally (no torch required).
+    tokenizer_resource = resource_registry.register('embedding_tokenizer', _load_tokenizer)
+else:
+    # The model is loaded on first use (or by an explicit warmup), not at import.
+    model_resource = resource_registry.register(
+        'embedding_model',
+        build_backend,
+        warmup=lambda m: m.encode(["warmup"]),
+    )
+    tokenizer_resource = None
+
+
+def get_model():
+    """
+    Returns the active encoder: a local backend, or the embedding server client.
+    Either way it exposes `encode(texts, batch_size)`.
+    """
+    return model_resource.get()
+
+
+def get_tokenizer():
+    if tokenizer_resource is not None:
+        return tokenizer_resource.get()
+    return get_model().tokenizer
+
+
+# --- Micro-batching settings ---
+# Requests that arrive within EMBEDDING_BATCH_MAX_WAIT_MS of each other are
+# encoded together, up to EMBEDDING_BATCH_SIZE texts per forward pass.
+EMBEDDING_BATCH_SIZE = getattr(settings, 'EMBEDDING_BATCH_SIZE', 32)
+EMBEDDING_BATCH_MAX_WAIT_MS = getattr(settings, 'EMBEDDING_BATCH_MAX_WAIT_MS', 5)
+
+
+class _EmbeddingRequest:
+    """
+    One caller's texts, waiting for the batcher to fill in its vectors.
+    """
+    __slots__ = ("texts", "vectors", "error", "done", "enqueued_at")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.vectors = None
+        self.error = None
+        self.done = threading.Event()
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """
+    Collects embedding requests from concurrent callers and runs them
+    through a single `encode` call per batch.
+
+    A background thread takes the first waiting request, keeps collecting
+    for up to `max_wait_ms` (or until `max_batch_size` texts are queued),
+    encodes everything at once and hands each caller its own slice.
+    """
+
+    def __init__(self, encode_fn, max_batch_size: int = 32, max_wait_ms: float = 5):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._worker_pid = None
+
+        # --- Metrics ---
+        self._requests = 0
+        self._texts = 0
+        self._batches = 0
+        self._max_batch = 0
+        self._batch_size_histogram: Dict[str, int] = {}
+        self._queue_wait_total = 0.0
+        self._encode_time_total = 0.0
+
+    def _ensure_worker(self):
+        # The worker thread does not survive a fork, so restart it in children.
+        if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+            return
+        self._worker_pid = os.getpid()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: List[str]) -> List[List[float]]:
+        """
+        Queues `texts` for the next batch and blocks until their vectors are ready.
+        """
+        if not texts:
+            return []
+        request = _EmbeddingRequest(list(texts))
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append(request)
+            self._requests += 1
+            self._texts += len(request.texts)
+            self._cond.notify()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.vectors
+
+    def _collect_batch(self) -> List[_EmbeddingRequest]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            batch = [self._pending.popleft()]
+            batch_texts = len(batch[0].texts)
+            deadline = time.perf_counter() + self.max_wait
+
+            while batch_texts < self.max_batch_size:
+                if not self._pending:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=remaining)
+                    continue
+                request = self._pending.popleft()
+                batch.append(request)
+                batch_texts += len(request.texts)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            all_texts = [text for request in batch for text in request.texts]
+
+            try:
+                embeddings = self.encode_fn(all_texts, self.max_batch_size)
+                offset = 0
+                for request in batch:
+                    count = len(request.texts)
+                    request.vectors = [vec.tolist() for vec in embeddings[offset:offset + count]]
+                    offset += count
+            except Exception as e:
+                print(f"❌ Embedding batch of {len(all_texts)} texts failed: {e}")
+                for request in batch:
+                    request.error = e
+
+            finished = time.perf_counter()
+            with self._cond:
+                self._record_batch(batch, len(all_texts), started, finished)
+
+            for request in batch:
+                request.done.set()
+
+    def _record_batch(self, batch, batch_texts, started, finished):
+        self._batches += 1
+        self._max_batch = max(self._max_batch, batch_texts)
+        bucket = 1
+        while bucket < batch_texts:
+            bucket *= 2
+        bucket_key = f"<={bucket}"
+        self._batch_size_histogram[bucket_key] = self._batch_size_histogram.get(bucket_key, 0) + 1
+        self._queue_wait_total += sum(started - request.enqueued_at for request in batch)
+        self._encode_time_total += finished - started
+
+    def get_metrics(self) -> Dict:
+        with self._cond:
+            batches = self._batches or 1
+            requests = self._requests or 1
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_depth": len(self._pending),
+                "queued_texts": sum(len(r.texts) for r in self._pending),
+                "requests": self._requests,
+                "texts": self._texts,
+                "batches": self._batches,
+                "avg_batch_size": round(self._texts / batches, 2) if self._batches else 0.0,
+                "max_observed_batch_size": self._max_batch,
+                "batch_size_histogram": dict(self._batch_size_histogram),
+                "avg_queue_wait_ms": round(self._queue_wait_total / requests * 1000.0, 3),
+                "avg_encode_ms": round(self._encode_time_total / batches * 1000.0, 3),
+            }
+
+
+def _encode_batch(texts: List[str], batch_size: int):
+    return get_model().encode(texts, batch_size=batch_size)
+
+
+batcher = EmbeddingBatcher(
+    _encode_batch,
+    max_batch_size=EMBEDDING_BATCH_SIZE,
+    max_wait_ms=EMBEDDING_BATCH_MAX_WAIT_MS,
+)
+
+
+# Backends produce slightly different vectors, so they never share cache entries.
+embedding_cache = EmbeddingCache(f"{MODEL_NAME}:{EMBEDDING_BACKEND}")
 
-# Initialize the model once when the file is imported
-model = SentenceTransformer('all-MiniLM-L6-v2') 
 
 def get_text_embedding(text):
     """
     Converts text into vector embeddings using a pre-loaded model.
+    Concurrent callers are batched together into one forward pass.
+    """
+    return get_text_embeddings([text])[0]
+
+
+def get_text_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Bulk version of `get_text_embedding`. Returns one vector per input text,
+    in the same order. Cached texts skip the model entirely.
+    """
+    if not texts:
+        return []
+    return embedding_cache.get_or_compute(texts, batcher.submit)
+
+
+def get_embedding_metrics() -> Dict:
+    """
+    Queue depth and batch-size statistics for the embedding batcher.
+    """
+    return dict(
+        batcher.get_metrics(),
+        backend=EMBEDDING_BACKEND,
+        server_socket=EMBEDDING_SERVER_SOCKET,
+    )
+
+
+def get_embedding_cache_stats() -> Dict:
+    """
+    Hit / miss counters and LRU size for the embedding cache.
     """
-    embedding = model.encode(text)
-    return embedding.tolist()
\ No newline at end of file
+    return embedding_cache.get_stats()
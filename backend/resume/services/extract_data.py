@@ -1,11 +1,13 @@
 # services/extract_data.py
-import boto3
 import json
-import io
 import re
-import fitz  # PyMuPDF
 from django.conf import settings
 from botocore.exceptions import ClientError
+from .bedrock_gateway import get_gated_bedrock_client, BedrockThrottled, PRIORITY_BULK
+from .pdf_extraction import ExtractedText, extract_pdf_text
+
+# Only the start of a contract is sent to Bedrock for field extraction.
+BEDROCK_EXTRACTION_CHARS = 4000
 
 class ContractExtractor:
     
@@ -39,78 +41,35 @@ class ContractExtractor:
         """
         self.region_name = getattr(settings, 'AWS_REGION_BEDROCK', 'us-east-1')
         try:
-            # We only need the Bedrock runtime
-            self.bedrock_runtime = boto3.client(
-                'bedrock-runtime',
-                region_name=self.region_name,
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-            )
+            # We only need the Bedrock runtime. Extraction is bulk work, so
+            # interactive calls (search, chat) are served first.
+            self.bedrock_runtime = get_gated_bedrock_client(PRIORITY_BULK)
         except AttributeError:
             raise Exception("FATAL ERROR: AWS keys not found in Django settings.")
         except ClientError as e:
             raise Exception(f"FATAL ERROR: Could not connect to Bedrock: {e}")
 
-    # --- 3. 🔥 UPDATED 'process_contract' ---
-    def process_contract(self, file_buffer: io.BytesIO, category: str, s3_url: str):
+    def extract_fields(self, contract_text: str, category: str) -> dict:
         """
-        Main function to run the full extraction pipeline.
-        1. Extract text with Fitz
-        2. Extract data with Bedrock
-        3. Build the final payload
+        Runs only the Bedrock field extraction (step 2) for a singular category
+        key. Only the first BEDROCK_EXTRACTION_CHARS characters are used, so
+        the caller can pass just the first pages.
         """
-        print(f"Processing contract with category: {category}") # 'employee_contract' (singular)
-        
-        # --- ADD THIS LOOKUP ---
         collection_name = self.CATEGORY_TO_COLLECTION_MAP.get(category)
         if not collection_name:
             raise ValueError(f"Invalid category key provided: {category}")
-        print(f"   -> Mapped to collection: {collection_name}") # 'employee_contracts' (plural)
+        return self._extract_data_with_bedrock(contract_text, collection_name)
 
-        # 1. NEW: Use Fitz to get text
-        contract_text = self._extract_text_with_fitz(file_buffer)
-        if not contract_text:
-            raise ValueError("Fitz (PyMuPDF) failed to extract any text.")
-            
-        # 2. KEPT: Use Bedrock, but pass the PLURAL collection_name
-        extracted_data = self._extract_data_with_bedrock(contract_text, collection_name)
-        
-        # 3. MOVED: Build the final payload
-        #    Pass BOTH names: singular 'category' and plural 'collection_name'
-        payload = self._build_payload(category, collection_name, s3_url, extracted_data, contract_text)
-        
-        # Return both, since the view needs the raw text for embedding
-        return payload, contract_text
-
-    def _extract_text_with_fitz(self, file_buffer: io.BytesIO):
+    def build_payload(self, category: str, s3_url: str, extracted_data: dict, extracted: ExtractedText) -> dict:
         """
-        REPLACES TEXTRACT:
-        Uses Fitz (PyMuPDF) to extract text directly from the file buffer.
+        Builds the final payload (step 3) from the extracted fields and text.
         """
-        print("Starting text extraction with Fitz (PyMuPDF)...")
-        full_text = ""
-        try:
-            # Ensure the buffer pointer is at the beginning
-            file_buffer.seek(0) 
-            
-            # --- THIS IS THE CORRECTED LINE ---
-            # 'file_type' was renamed to 'filetype'
-            with fitz.open(stream=file_buffer, filetype="pdf") as doc:
-                for page in doc:
-                    full_text += page.get_text()            
-            if not full_text:
-                print("⚠️ Fitz ran but extracted no text. Check if PDF is image-based.")
-            
-            print("Fitz text extraction successful.")
-            return full_text
-        
-        except Exception as e:
-            # --- THIS IS THE CRITICAL CHANGE ---
-            # Now, instead of failing silently, it will tell you *why*
-            print(f"❌ Error during Fitz extraction: {e}")
-            print("   This might be a corrupted file, a non-PDF file, or a broken install.")
-            return None # Return None on failure
-        
+        collection_name = self.CATEGORY_TO_COLLECTION_MAP.get(category)
+        #    Pass BOTH names: singular 'category' and plural 'collection_name'
+        payload = self._build_payload(category, collection_name, s3_url, extracted_data, extracted.text)
+        payload["page_offsets"] = extracted.page_offsets
+        return payload
+
     # --- 4. 🔥 UPDATED '_extract_data_with_bedrock' ---
     #    Renamed 'category' param to 'collection_name' for clarity
     def _extract_data_with_bedrock(self, contract_text, collection_name):
@@ -148,9 +107,9 @@ class ContractExtractor:
         
         Find the most logical value from the text for each requested key.
 
-        Contract Text (first 4000 chars):
+        Contract Text (first {BEDROCK_EXTRACTION_CHARS} chars):
         ---
-        {contract_text[:4000]} 
+        {contract_text[:BEDROCK_EXTRACTION_CHARS]} 
         ---
         
         Return *only* the JSON object.
@@ -170,7 +129,8 @@ class ContractExtractor:
                 body=body,
                 modelId=model_id,
                 contentType='application/json',
-                accept='application/json'
+                accept='application/json',
+                call_site="extract_fields",
             )
             
             response_body = json.loads(response['body'].read())
@@ -189,6 +149,11 @@ class ContractExtractor:
             print("Bedrock call successful.")
             return json.loads(extracted_json_string)
         
+        except BedrockThrottled:
+            # Not "no fields found": let the ingestion stage fail so the job
+            # can be retried instead of storing an empty extraction.
+            print("❌ Bedrock kept throttling extraction; giving up.")
+            raise
         except Exception as e:
             print(f"Error calling Bedrock or parsing JSON: {e}")
             return {}
@@ -222,17 +187,8 @@ class ContractExtractor:
         """
         Opens a PDF from in-memory bytes and extracts all text using Fitz.
         """
-        full_text = ""
         try:
-            # Open the PDF from a byte stream
-            pdf_stream = io.BytesIO(pdf_bytes)
-            doc = fitz.open(stream=pdf_stream, filetype="pdf")
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                full_text += page.get_text()
-            
-            doc.close()
+            full_text = extract_pdf_text(pdf_bytes).text
             print(f"Successfully extracted {len(full_text)} chars from PDF bytes.")
             return full_text
             
@@ -0,0 +1,100 @@
+# backend/resume/services/fanout.py
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from django.conf import settings
+
+# Documents answered at once per /answer/ request (each is an S3 read plus a Bedrock call).
+QNA_MAX_CONCURRENCY = getattr(settings, 'QNA_MAX_CONCURRENCY', 4)
+# Seconds one document may take once its work has started.
+QNA_DOCUMENT_TIMEOUT = getattr(settings, 'QNA_DOCUMENT_TIMEOUT', 60)
+
+
+class FanOutTimeout(Exception):
+    """
+    An item did not finish within its own timeout, or before the deadline
+    of the whole fan-out.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        super().__init__(f"Timed out after {seconds:g}s")
+
+
+def map_concurrently(
+    fn: Callable[[Any], Any],
+    items: Sequence[Any],
+    max_concurrency: int = QNA_MAX_CONCURRENCY,
+    timeout: float = QNA_DOCUMENT_TIMEOUT,
+    deadline: Optional[float] = None,
+) -> List[Tuple[bool, Any]]:
+    """
+    Runs `fn(item)` for every item on at most `max_concurrency` threads and
+    returns [(ok, result_or_exception)] in the order of `items`.
+
+    Each item gets its own `timeout`, counted from when its work starts (not
+    while it waits for a free thread). A timed-out item is reported as
+    (False, FanOutTimeout); its thread is left to finish in the background.
+
+    Because a timed-out item keeps its thread busy, the items queued behind
+    it could start late; `deadline` (default: ceil(items / threads) * timeout)
+    bounds the whole call, and whatever has not finished by then, running or
+    still queued, is reported as (False, FanOutTimeout).
+    """
+    if not items:
+        return []
+    workers = max(1, min(max_concurrency, len(items)))
+    if deadline is None:
+        deadline = math.ceil(len(items) / workers) * timeout
+    ends_at = time.perf_counter() + deadline
+    results: List[Tuple[bool, Any]] = [None] * len(items)
+    started_at = {}
+    lock = threading.Lock()
+
+    def _run(index: int, item: Any):
+        with lock:
+            started_at[index] = time.perf_counter()
+        return fn(item)
+
+    executor = ThreadPoolExecutor(
+        max_workers=workers,
+        thread_name_prefix="fanout",
+    )
+    try:
+        pending = {executor.submit(_run, i, item): i for i, item in enumerate(items)}
+        while pending:
+            now = time.perf_counter()
+            with lock:
+                running = [started_at[i] for i in pending.values() if i in started_at]
+            # Wake up when the oldest running item would reach its timeout.
+            wake_at = min([s + timeout for s in running] + [ends_at])
+            wake_in = max(0.0, wake_at - now)
+            done, _ = wait(list(pending), timeout=wake_in, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    results[index] = (True, future.result())
+                except Exception as e:
+                    results[index] = (False, e)
+
+            now = time.perf_counter()
+            with lock:
+                expired = [f for f, i in pending.items() if i in started_at and now - started_at[i] >= timeout]
+            for future in expired:
+                index = pending.pop(future)
+                future.cancel()
+                results[index] = (False, FanOutTimeout(timeout))
+
+            if pending and now >= ends_at:
+                for future, index in pending.items():
+                    future.cancel()
+                    results[index] = (False, FanOutTimeout(deadline))
+                pending.clear()
+    finally:
+        # Don't wait for timed-out items; their results are no longer needed.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
@@ -9,13 +9,44 @@ from qdrant_client import QdrantClient
 from qdrant_client.http import models as rest
 from django.conf import settings
 from .embedding_service import get_text_embedding
-from dotenv import load_dotenv
+from . import resource_registry
 
 
-load_dotenv()
-QDRANT_URL = os.getenv("QDRANT_URL")  
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_URL = getattr(settings, "QDRANT_URL", None)
+QDRANT_API_KEY = getattr(settings, "QDRANT_API_KEY", None)
 EMBED_VECTOR_SIZE = 384
+HISTORY_COLLECTION_NAME = "chat_history"
+
+
+def _connect_history_qdrant():
+    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    _ensure_history_collection(client)
+    return client
+
+
+def _ensure_history_collection(client: QdrantClient):
+    try:
+        collections = [c.name for c in client.get_collections().collections]
+        if HISTORY_COLLECTION_NAME not in collections:
+            print(f"📦 Creating Qdrant collection for chat history: {HISTORY_COLLECTION_NAME}")
+            client.create_collection(
+                collection_name=HISTORY_COLLECTION_NAME,
+                vectors_config=rest.VectorParams(
+                    size=EMBED_VECTOR_SIZE,
+                    distance=rest.Distance.COSINE,
+                ),
+            )
+    except Exception as e:
+        print(f"⚠️ Could not verify or create Qdrant collection: {e}")
+
+
+# One client per process; the collection check runs once instead of per request.
+history_qdrant_resource = resource_registry.register(
+    'history_qdrant',
+    _connect_history_qdrant,
+    warmup=lambda client: client.get_collections(),
+    fork_safe=False,
+)
 
 
 class ChatHistoryManager:
@@ -25,15 +56,15 @@ class ChatHistoryManager:
     """
 
     def __init__(self):
-        # Initialize Qdrant client
+        # Shared Qdrant client (created, and the collection verified, on first use)
         try:
-            self.client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+            self.client = history_qdrant_resource.get()
         except Exception as e:
             print(f"❌ WARNING: Failed to initialize Qdrant client for history: {e}")
             self.client = None
 
         self.embedding_size = EMBED_VECTOR_SIZE
-        self.collection_name = "chat_history"
+        self.collection_name = HISTORY_COLLECTION_NAME
         self.local_file = os.path.join("data", "chat_history.json")
 
         # Ensure local storage exists
@@ -42,10 +73,7 @@ class ChatHistoryManager:
             with open(self.local_file, "w") as f:
                 json.dump([], f)
 
-        # Ensure Qdrant collection
-        if self.client:
-            self._ensure_collection()
-        else:
+        if not self.client:
             print("⚠️ Skipping Qdrant collection setup due to client error.")
 
     # ------------------------------------------------------------
@@ -54,19 +82,7 @@ class ChatHistoryManager:
     def _ensure_collection(self):
         if not self.client:
             return
-        try:
-            collections = [c.name for c in self.client.get_collections().collections]
-            if self.collection_name not in collections:
-                print(f"📦 Creating Qdrant collection for chat history: {self.collection_name}")
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=rest.VectorParams(
-                        size=self.embedding_size,
-                        distance=rest.Distance.COSINE,
-                    ),
-                )
-        except Exception as e:
-            print(f"⚠️ Could not verify or create Qdrant collection: {e}")
+        _ensure_history_collection(self.client)
 
     # ------------------------------------------------------------
     # ✅ Get embedding from model
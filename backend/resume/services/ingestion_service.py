@@ -0,0 +1,814 @@
+# backend/resume/services/ingestion_service.py
+
+import mimetypes
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+from django.conf import settings
+from django.core.cache import cache
+from .job_queue import job_queue, INGESTION_JOB_STALE_SECONDS, INGESTION_JOB_MAX_ATTEMPTS
+from .s3_service import upload_contract_to_s3, delete_s3_object
+from .extract_data import ContractExtractor, BEDROCK_EXTRACTION_CHARS
+from .bedrock_gateway import BedrockThrottled
+from .pdf_extraction import ExtractedText, extract_pdf_head, extract_pdf_pages
+from .task_graph import TaskGraph, TaskFailed
+from .embedding_service import get_text_embedding, get_text_embeddings
+from .chunking_service import split_into_chunks
+from .qdrant_service import (
+    build_contract_points,
+    upsert_points,
+    find_contract_by_hash,
+    delete_contract,
+    CONTRACT_CATEGORY_MAP,
+    CONTENT_HASH_FIELD,
+    QDRANT_UPSERT_BATCH_SIZE,
+)
+from .text_store import store_contract_text
+from .bedrock_service import local_planner
+from .upload_source import UploadSource, UPLOAD_SPOOL_MAX_MEMORY
+
+# Uploaded files wait here until an ingestion worker picks them up.
+INGESTION_SPOOL_DIR = getattr(settings, 'INGESTION_SPOOL_DIR', os.path.join('data', 'ingestion_spool'))
+# Worker threads started inside each web process on the first async upload.
+# Set to 0 when running `manage.py ingestion_worker` separately.
+INGESTION_INPROCESS_WORKERS = getattr(settings, 'INGESTION_INPROCESS_WORKERS', 2)
+INGESTION_POLL_INTERVAL = getattr(settings, 'INGESTION_POLL_INTERVAL', 1.0)
+# A job that failed because Bedrock kept throttling is retried after this many
+# seconds (until INGESTION_JOB_MAX_ATTEMPTS is used up).
+INGESTION_THROTTLE_RETRY_DELAY = getattr(settings, 'INGESTION_THROTTLE_RETRY_DELAY', 60)
+
+# Bulk uploads: files in flight at once, and points per Qdrant write.
+BULK_INGEST_CONCURRENCY = getattr(settings, 'BULK_INGEST_CONCURRENCY', 4)
+BULK_UPSERT_BATCH_POINTS = getattr(settings, 'BULK_UPSERT_BATCH_POINTS', QDRANT_UPSERT_BATCH_SIZE)
+BULK_INGEST_MAX_FILES = getattr(settings, 'BULK_INGEST_MAX_FILES', 5000)
+
+INGEST_CONTRACT_JOB = "ingest_contract"
+BULK_INGEST_JOB = "bulk_ingest"
+
+# --- List / alert caches filled by the list views ---
+ALL_CONTRACTS_CACHE_KEY = "all_contracts_list"
+ALERTS_CACHE_KEY = "alerts_reminders"
+CATEGORY_CACHE_KEY_PREFIX = "contracts_list"
+
+# Error text returned to the client for a failure in each stage.
+STAGE_ERROR_MESSAGES = {
+    "s3_upload": "S3 upload failed",
+    "extract_head": "Failed to process contract",
+    "extract_fields": "Failed to process contract",
+    "extract_text": "Failed to process contract",
+    "embed": "Embedding generation failed",
+    "build_points": "Failed to save data to Qdrant",
+    "upsert": "Failed to save data to Qdrant",
+}
+
+
+class IngestionError(Exception):
+    """
+    A pipeline stage failed. `str(error)` is the message shown to the client.
+    """
+
+    def __init__(self, stage: str, cause: Exception):
+        self.stage = stage
+        self.cause = cause
+        super().__init__(f"{STAGE_ERROR_MESSAGES.get(stage, stage)}: {cause}")
+
+
+def invalidate_contract_caches(categories: List[str]):
+    """
+    Drops the cached contract lists (all, per-category) and alerts so the
+    next request sees newly ingested contracts.
+    """
+    try:
+        print("Invalidating caches due to new upload...")
+        keys_to_delete = [ALL_CONTRACTS_CACHE_KEY, ALERTS_CACHE_KEY]
+        keys_to_delete += [f"{CATEGORY_CACHE_KEY_PREFIX}_{category}" for category in sorted(set(categories))]
+        cache.delete_many(keys_to_delete)
+        # New parties become known to the local query planner on the next search.
+        local_planner.party_index.mark_stale()
+        print("✅ Caches invalidated.")
+    except Exception as e:
+        # Don't fail the upload, just log the warning
+        print(f"⚠️ Warning: Failed to invalidate cache: {e}")
+
+
+def build_s3_key(collection_name: str, file_name: str) -> str:
+    return f"{collection_name}/{uuid.uuid4()}-{file_name}"
+
+
+def build_ingestion_graph(
+    source: UploadSource,
+    file_name: str,
+    content_type: str,
+    contract_category: str,
+    s3_key: str,
+    on_stage: Optional[Callable[[str, Dict], None]] = None,
+    extractor: Optional[ContractExtractor] = None,
+    write: bool = True,
+    content_sha256: Optional[str] = None,
+) -> TaskGraph:
+    """
+    The upload pipeline as a dependency graph. The S3 URI is known from the
+    key up front, so nothing waits on the upload except the final upsert:
+
+        s3_upload ─────────────────────────────────────┐
+        extract_head ─┬─> extract_fields ──────────────┤
+                      └─> extract_text ─┬─> embed ─────┴─> build_points ─> upsert ─> store_text
+                                        └─────────────────────────────────────────────┘
+
+    With `write=False` the graph stops at build_points, so the caller can
+    batch the points of many contracts into fewer Qdrant writes.
+    """
+    collection_name = CONTRACT_CATEGORY_MAP[contract_category]
+    bucket_name = settings.S3_CONTRACTS_BUCKET
+    s3_url = f"s3://{bucket_name}/{s3_key}"
+    extractor = extractor or ContractExtractor()
+
+    def s3_upload():
+        with source.open() as file_obj:
+            uploaded_url = upload_contract_to_s3(file_obj, bucket_name, s3_key, content_type)
+        if not uploaded_url:
+            raise Exception("S3 upload returned no URL.")
+        return uploaded_url
+
+    def extract_head():
+        # Bedrock only reads the start of the contract: parse just enough pages.
+        return extract_pdf_head(source.pdf, BEDROCK_EXTRACTION_CHARS)
+
+    def extract_fields(extract_head):
+        head_text = "".join(extract_head)
+        if not head_text:
+            return {}
+        return extractor.extract_fields(head_text, contract_category)
+
+    def extract_text(extract_head):
+        pages = list(extract_head) + extract_pdf_pages(source.pdf, start=len(extract_head))
+        extracted = ExtractedText(pages)
+        if not extracted.text:
+            raise ValueError("Fitz (PyMuPDF) failed to extract any text.")
+        print(f"Fitz text extraction successful ({extracted.page_count} pages).")
+        return extracted
+
+    def embed(extract_text):
+        # MiniLM truncates at 256 word-pieces, so the contract is embedded
+        # as overlapping chunks. The parent point keeps the first chunk's vector.
+        chunks = split_into_chunks(extract_text.text)
+        if chunks:
+            chunk_vectors = get_text_embeddings([chunk["text"] for chunk in chunks])
+            embedding = chunk_vectors[0]
+        else:
+            chunk_vectors = []
+            embedding = get_text_embedding(extract_text.text)
+        if not embedding:
+            raise ValueError("Failed to generate text embedding.")
+        return embedding, chunks, chunk_vectors
+
+    def build_points(s3_upload, extract_fields, extract_text, embed):
+        embedding, chunks, chunk_vectors = embed
+        payload = extractor.build_payload(contract_category, s3_url, extract_fields, extract_text)
+        payload[CONTENT_HASH_FIELD] = content_sha256 or source.sha256()
+        point_id = str(uuid.uuid4())
+        points = build_contract_points(collection_name, point_id, embedding, payload, chunks, chunk_vectors)
+        return {"qdrant_id": point_id, "chunks": len(chunks), "payload": payload, "points": points}
+
+    def upsert(build_points):
+        upsert_points(collection_name, build_points["points"])
+
+    def store_text(upsert, extract_text):
+        # Keep the extracted text so QnA / document chat never re-parse this PDF.
+        store_contract_text(s3_url, extract_text.text)
+
+    graph = TaskGraph(
+        on_start=(lambda name: on_stage(name, {"status": "running", "started_at": time.time()})) if on_stage else None,
+        on_finish=on_stage,
+    )
+    graph.add("s3_upload", s3_upload)
+    graph.add("extract_head", extract_head)
+    graph.add("extract_fields", extract_fields, deps=["extract_head"])
+    graph.add("extract_text", extract_text, deps=["extract_head"])
+    graph.add("embed", embed, deps=["extract_text"])
+    graph.add("build_points", build_points, deps=["s3_upload", "extract_fields", "extract_text", "embed"])
+    if write:
+        graph.add("upsert", upsert, deps=["build_points"])
+        graph.add("store_text", store_text, deps=["upsert", "extract_text"])
+    return graph
+
+
+def find_duplicate(collection_name: str, content_sha256: str):
+    """
+    The existing parent point for these exact bytes, or None. A failed lookup
+    is logged and treated as "not a duplicate" so ingestion still proceeds.
+    """
+    try:
+        return find_contract_by_hash(collection_name, content_sha256)
+    except Exception as e:
+        print(f"⚠️ Duplicate lookup failed, ingesting anyway: {e}")
+        return None
+
+
+def _replace_previous(collection_name: str, previous, new_s3_url: Optional[str]):
+    # Forced re-ingestion: the new point (and S3 object) replaces the old one.
+    if previous is None:
+        return
+    try:
+        delete_contract(collection_name, previous.id)
+    except Exception as e:
+        print(f"⚠️ Failed to delete replaced point {previous.id}: {e}")
+        # Keep the file: the old point still references it.
+        return
+    old_s3_url = (previous.payload or {}).get("s3_url")
+    if old_s3_url and old_s3_url != new_s3_url:
+        try:
+            delete_s3_object(old_s3_url)
+        except Exception as e:
+            print(f"⚠️ Failed to delete replaced S3 object {old_s3_url}: {e}")
+
+
+def _discard_failed_upload(graph: TaskGraph, s3_url: str):
+    """
+    After a failed ingestion graph: deletes the contract's S3 object, unless
+    the upsert finished (the stored point references it).
+    """
+    # An upload still in flight would otherwise land after the delete.
+    graph.wait_for_abandoned()
+    timings = graph.timings()
+    if "s3_upload" not in timings or timings.get("upsert", {}).get("status") == "done":
+        return
+    try:
+        delete_s3_object(s3_url)
+    except Exception as e:
+        print(f"⚠️ Failed to delete the S3 object of a failed upload {s3_url}: {e}")
+
+
+def _duplicate_result(collection_name: str, existing, seconds: float) -> Dict:
+    payload = dict(existing.payload or {})
+    print(f"♻️ Duplicate upload: same file already stored as point {existing.id} in '{collection_name}'.")
+    return {
+        "collection_name": collection_name,
+        "qdrant_id": str(existing.id),
+        "s3_url": payload.get("s3_url"),
+        "chunks": payload.get("chunk_count", 0),
+        "data": payload,
+        "duplicate": True,
+        "timings": {"dedupe_lookup": {"start": 0.0, "end": seconds, "seconds": seconds, "status": "done"}},
+        "critical_path": ["dedupe_lookup"],
+        "total_seconds": seconds,
+    }
+
+
+def ingest_contract(
+    source: UploadSource,
+    file_name: str,
+    content_type: str,
+    contract_category: str,
+    s3_key: Optional[str] = None,
+    on_stage: Optional[Callable[[str, Dict], None]] = None,
+    invalidate_caches: bool = True,
+    force: bool = False,
+) -> Dict:
+    """
+    Runs the full upload pipeline for one contract (see build_ingestion_graph),
+    then invalidates the list caches. Independent stages run concurrently;
+    `timings` and `critical_path` in the result show where the time went.
+
+    If the same bytes were already ingested into this collection, the
+    existing point is returned (`duplicate: True`) and S3, Bedrock and
+    embedding are skipped. `force=True` re-processes the file and replaces
+    the existing point.
+
+    Raises IngestionError (with the failing stage) on failure; the uploaded
+    S3 object is deleted then, unless the point was already written.
+    """
+    collection_name = CONTRACT_CATEGORY_MAP[contract_category]
+    s3_key = s3_key or build_s3_key(collection_name, file_name)
+
+    lookup_started = time.perf_counter()
+    content_sha256 = source.sha256()
+    existing = find_duplicate(collection_name, content_sha256)
+    if existing is not None and not force:
+        return _duplicate_result(collection_name, existing, round(time.perf_counter() - lookup_started, 3))
+
+    def report_stage(name, state):
+        if on_stage is not None:
+            try:
+                on_stage(name, state)
+            except Exception as e:
+                print(f"⚠️ Failed to record stage '{name}': {e}")
+
+    graph = build_ingestion_graph(
+        source, file_name, content_type, contract_category, s3_key, report_stage,
+        content_sha256=content_sha256,
+    )
+    try:
+        results = graph.run()
+    except TaskFailed as e:
+        _discard_failed_upload(graph, f"s3://{settings.S3_CONTRACTS_BUCKET}/{s3_key}")
+        raise IngestionError(e.task, e.cause) from e.cause
+    _replace_previous(collection_name, existing, results["s3_upload"])
+    if invalidate_caches:
+        invalidate_contract_caches([contract_category])
+
+    upserted = results["build_points"]
+    return {
+        "collection_name": collection_name,
+        "qdrant_id": upserted["qdrant_id"],
+        "s3_url": results["s3_upload"],
+        "chunks": upserted["chunks"],
+        "data": upserted["payload"],
+        "duplicate": False,
+        "timings": graph.timings(),
+        "critical_path": graph.critical_path(),
+        "total_seconds": graph.total_seconds,
+    }
+
+
+# ------------------------------------------------------------
+# Bulk ingestion (many files or a zip archive)
+# ------------------------------------------------------------
+def resolve_category(value: Optional[str]) -> Optional[str]:
+    """
+    Accepts a singular category key ('nda') or a collection name ('ndas').
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value in CONTRACT_CATEGORY_MAP:
+        return value
+    for category, collection_name in CONTRACT_CATEGORY_MAP.items():
+        if value == collection_name:
+            return category
+    return None
+
+
+def _spool_uploaded_file(uploaded_file, path: str):
+    with open(path, "wb") as f:
+        for chunk in uploaded_file.chunks():
+            f.write(chunk)
+
+
+def _list_archive_members(archive_path: str, archive_categories: Dict[str, str], default_category: Optional[str]):
+    """
+    One item per file in the zip. A file's category comes from `archive_categories`
+    (by path or file name), else its top-level folder ('nda/x.pdf', 'ndas/x.pdf'),
+    else `default_category`.
+    """
+    items, errors = [], []
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            base_name = os.path.basename(name)
+            if info.is_dir() or not base_name or base_name.startswith(".") or name.startswith("__MACOSX/"):
+                continue
+            folder = name.split("/", 1)[0] if "/" in name else None
+            category = (
+                resolve_category(archive_categories.get(name) or archive_categories.get(base_name))
+                or resolve_category(folder)
+                or default_category
+            )
+            if not category:
+                errors.append({"file_name": name, "status": "failed", "error": "No valid contract_category for this file."})
+                continue
+            items.append({
+                "file_name": base_name,
+                "archive": archive_path,
+                "member": name,
+                "content_type": mimetypes.guess_type(base_name)[0] or "application/octet-stream",
+                "contract_category": category,
+            })
+    return items, errors
+
+
+def spool_bulk_upload(
+    files: List,
+    categories: List[Optional[str]],
+    archive=None,
+    archive_categories: Optional[Dict[str, str]] = None,
+    default_category: Optional[str] = None,
+    spool_name: Optional[str] = None,
+):
+    """
+    Writes uploaded files (and/or a zip archive) to a spool directory and
+    returns (spool_dir, items, errors). Items are JSON-serializable, so they
+    can be handed to a background job as-is.
+    """
+    default_category = resolve_category(default_category)
+    spool_dir = os.path.join(INGESTION_SPOOL_DIR, spool_name or f"bulk-{uuid.uuid4()}")
+    os.makedirs(spool_dir, exist_ok=True)
+    items, errors = [], []
+
+    for index, uploaded_file in enumerate(files):
+        category = resolve_category(categories[index] if index < len(categories) else None) or default_category
+        if not category:
+            errors.append({"file_name": uploaded_file.name, "status": "failed", "error": "No valid contract_category for this file."})
+            continue
+        path = os.path.join(spool_dir, f"{index}.upload")
+        _spool_uploaded_file(uploaded_file, path)
+        items.append({
+            "file_name": uploaded_file.name,
+            "path": path,
+            "content_type": uploaded_file.content_type,
+            "contract_category": category,
+        })
+
+    if archive is not None:
+        archive_path = os.path.join(spool_dir, "archive.zip")
+        _spool_uploaded_file(archive, archive_path)
+        archive_items, archive_errors = _list_archive_members(archive_path, archive_categories or {}, default_category)
+        items.extend(archive_items)
+        errors.extend(archive_errors)
+
+    return spool_dir, items, errors
+
+
+def bulk_ingest(
+    items: List[Dict],
+    errors: Optional[List[Dict]] = None,
+    concurrency: int = BULK_INGEST_CONCURRENCY,
+    batch_points: int = BULK_UPSERT_BATCH_POINTS,
+    on_progress: Optional[Callable[[Dict], None]] = None,
+    force: bool = False,
+) -> Dict:
+    """
+    Ingests many contracts. Up to `concurrency` files go through the pipeline
+    at once (one shared Bedrock client); their points are buffered per
+    collection and written to Qdrant in batches of about `batch_points`
+    points. The list / alert caches are invalidated once at the end.
+
+    Files already ingested (same bytes, same collection), and repeats within
+    the upload, are reported as duplicates and skipped unless `force=True`.
+
+    A failed file does not stop the others; each gets its own result entry,
+    and the object it uploaded to S3, if any, is deleted.
+    """
+    started = time.perf_counter()
+    results: List[Optional[Dict]] = [None] * len(items)
+    buffers: Dict[str, Dict[str, List]] = {}
+    extractor = ContractExtractor()
+    archives = {}
+    archive_lock = threading.Lock()
+    progress = {"total": len(items), "done": 0, "failed": 0, "duplicates": 0}
+    seen_hashes: Dict[str, int] = {}
+    seen_lock = threading.Lock()
+
+    def load(index, item):
+        """
+        Returns (UploadSource, temp path to delete afterwards or None).
+        Large zip members are extracted to disk rather than into memory.
+        """
+        if "member" not in item:
+            return UploadSource.from_path(item["path"]), None
+        with archive_lock:
+            archive = archives.get(item["archive"])
+            if archive is None:
+                archive = archives[item["archive"]] = zipfile.ZipFile(item["archive"])
+            info = archive.getinfo(item["member"])
+            if info.file_size <= UPLOAD_SPOOL_MAX_MEMORY:
+                return UploadSource.from_bytes(archive.read(info)), None
+            path = os.path.join(os.path.dirname(item["archive"]), f"member-{index}.upload")
+            with archive.open(info) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            return UploadSource.from_path(path), path
+
+    def prepare(index, item):
+        source, temp_path = load(index, item)
+        try:
+            return _prepare(index, item, source)
+        finally:
+            if temp_path:
+                os.remove(temp_path)
+
+    def _prepare(index, item, source):
+        collection_name = CONTRACT_CATEGORY_MAP[item["contract_category"]]
+        content_sha256 = source.sha256()
+        with seen_lock:
+            first_index = seen_hashes.setdefault(f"{collection_name}:{content_sha256}", index)
+        if first_index != index:
+            return {"duplicate_of": items[first_index].get("member") or items[first_index]["file_name"]}
+        existing = find_duplicate(collection_name, content_sha256)
+        if existing is not None and not force:
+            return {"existing": existing}
+        s3_key = build_s3_key(collection_name, item["file_name"])
+        graph = build_ingestion_graph(
+            source,
+            item["file_name"],
+            item["content_type"],
+            item["contract_category"],
+            s3_key,
+            extractor=extractor,
+            write=False,
+            content_sha256=content_sha256,
+        )
+        try:
+            graph_results = graph.run()
+        except TaskFailed:
+            _discard_failed_upload(graph, f"s3://{settings.S3_CONTRACTS_BUCKET}/{s3_key}")
+            raise
+        graph_results["replaces"] = existing
+        return graph_results
+
+    def flush(collection_name):
+        buffer = buffers.pop(collection_name, None)
+        if not buffer:
+            return
+        try:
+            upsert_points(collection_name, buffer["points"], batch_size=batch_points)
+        except Exception as e:
+            for index, s3_url, _, _ in buffer["entries"]:
+                results[index].update(status="failed", error=f"{STAGE_ERROR_MESSAGES['upsert']}: {e}", qdrant_id=None)
+                progress["failed"] += 1
+                # Nothing references the uploaded file now.
+                try:
+                    delete_s3_object(s3_url)
+                    results[index]["s3_url"] = None
+                except Exception as delete_error:
+                    print(f"⚠️ Failed to delete the S3 object of a failed upload {s3_url}: {delete_error}")
+            return
+        for index, s3_url, contract_text, replaces in buffer["entries"]:
+            results[index]["status"] = "succeeded"
+            # Keep the extracted text so QnA / document chat never re-parse this PDF.
+            store_contract_text(s3_url, contract_text)
+            _replace_previous(collection_name, replaces, s3_url)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="bulk-ingest") as pool:
+            futures = {pool.submit(prepare, index, item): index for index, item in enumerate(items)}
+            for future in as_completed(futures):
+                index = futures.pop(future)
+                item = items[index]
+                entry = {"file_name": item.get("member") or item["file_name"], "contract_category": item["contract_category"]}
+                results[index] = entry
+                try:
+                    graph_results = future.result()
+                except TaskFailed as e:
+                    entry.update(status="failed", error=str(IngestionError(e.task, e.cause)))
+                    progress["failed"] += 1
+                except Exception as e:
+                    entry.update(status="failed", error=f"{STAGE_ERROR_MESSAGES['extract_text']}: {e}")
+                    progress["failed"] += 1
+                else:
+                    if "duplicate_of" in graph_results or "existing" in graph_results:
+                        existing = graph_results.get("existing")
+                        entry.update(
+                            status="duplicate",
+                            qdrant_id=str(existing.id) if existing is not None else None,
+                            duplicate_of=graph_results.get("duplicate_of"),
+                        )
+                        progress["duplicates"] += 1
+                    else:
+                        built = graph_results["build_points"]
+                        collection_name = CONTRACT_CATEGORY_MAP[item["contract_category"]]
+                        entry.update(
+                            status="pending",
+                            qdrant_id=built["qdrant_id"],
+                            chunks=built["chunks"],
+                            s3_url=graph_results["s3_upload"],
+                        )
+                        buffer = buffers.setdefault(collection_name, {"points": [], "entries": []})
+                        buffer["points"].extend(built["points"])
+                        buffer["entries"].append(
+                            (index, entry["s3_url"], graph_results["extract_text"].text, graph_results["replaces"])
+                        )
+                        if len(buffer["points"]) >= batch_points:
+                            flush(collection_name)
+
+                progress["done"] += 1
+                if on_progress is not None:
+                    try:
+                        on_progress(dict(progress))
+                    except Exception as e:
+                        print(f"⚠️ Failed to report bulk progress: {e}")
+
+        for collection_name in list(buffers):
+            flush(collection_name)
+    finally:
+        for archive in archives.values():
+            archive.close()
+
+    succeeded = [entry for entry in results if entry and entry.get("status") == "succeeded"]
+    if succeeded:
+        invalidate_contract_caches([entry["contract_category"] for entry in succeeded])
+
+    all_results = list(errors or []) + results
+    failed = [entry for entry in all_results if entry and entry.get("status") == "failed"]
+    return {
+        "summary": {
+            "total": len(all_results),
+            "succeeded": len(succeeded),
+            "duplicates": progress["duplicates"],
+            "failed": len(failed),
+            "seconds": round(time.perf_counter() - started, 3),
+        },
+        "results": all_results,
+    }
+
+
+# ------------------------------------------------------------
+# Background ingestion jobs
+# ------------------------------------------------------------
+def _spool_upload(job_id: str, source: UploadSource) -> str:
+    os.makedirs(INGESTION_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(INGESTION_SPOOL_DIR, f"{job_id}.upload")
+    source.save_to(path)
+    return path
+
+
+def enqueue_contract_ingestion(source: UploadSource, file_name: str, content_type: str, contract_category: str,
+                               force: bool = False) -> str:
+    """
+    Persists the upload and queues it for a background ingestion worker.
+    Returns the job id.
+    """
+    job_id = str(uuid.uuid4())
+    collection_name = CONTRACT_CATEGORY_MAP[contract_category]
+    spool_path = _spool_upload(job_id, source)
+    job_queue.enqueue(INGEST_CONTRACT_JOB, {
+        "spool_path": spool_path,
+        "file_name": file_name,
+        "content_type": content_type,
+        "contract_category": contract_category,
+        "s3_key": build_s3_key(collection_name, file_name),
+        "force": force,
+    }, job_id=job_id)
+    print(f"📥 Queued ingestion job {job_id} for '{file_name}'.")
+    if INGESTION_INPROCESS_WORKERS > 0:
+        inprocess_workers.start()
+        inprocess_workers.notify()
+    return job_id
+
+
+def run_ingestion_job(job: Dict) -> Dict:
+    payload = job["payload"]
+    return ingest_contract(
+        UploadSource.from_path(payload["spool_path"]),
+        payload["file_name"],
+        payload["content_type"],
+        payload["contract_category"],
+        s3_key=payload["s3_key"],
+        force=payload.get("force", False),
+        on_stage=lambda stage, state: job_queue.update_stage(job["id"], stage, state),
+    )
+
+
+def enqueue_bulk_ingestion(spool_dir: str, items: List[Dict], errors: List[Dict], force: bool = False) -> str:
+    """
+    Queues an already spooled bulk upload (see spool_bulk_upload). Returns the job id.
+    """
+    job_id = str(uuid.uuid4())
+    job_queue.enqueue(BULK_INGEST_JOB, {
+        "spool_dir": spool_dir,
+        "items": items,
+        "errors": errors,
+        "force": force,
+    }, job_id=job_id)
+    print(f"📥 Queued bulk ingestion job {job_id} ({len(items)} files).")
+    if INGESTION_INPROCESS_WORKERS > 0:
+        inprocess_workers.start()
+        inprocess_workers.notify()
+    return job_id
+
+
+def run_bulk_ingestion_job(job: Dict) -> Dict:
+    payload = job["payload"]
+    return bulk_ingest(
+        payload["items"],
+        payload.get("errors"),
+        on_progress=lambda progress: job_queue.update_stage(job["id"], "files", dict(progress, status="running")),
+        force=payload.get("force", False),
+    )
+
+
+JOB_HANDLERS = {
+    INGEST_CONTRACT_JOB: run_ingestion_job,
+    BULK_INGEST_JOB: run_bulk_ingestion_job,
+}
+
+
+def format_job(job: Dict) -> Dict:
+    """
+    The client-facing view of a job (no local file paths).
+    """
+    payload = job["payload"]
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "file_name": payload.get("file_name"),
+        "contract_category": payload.get("contract_category"),
+        "file_count": len(payload["items"]) if "items" in payload else None,
+        "current_stage": job["current_stage"],
+        "stages": job["stages"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+class IngestionWorkerPool:
+    """
+    Threads that claim jobs from the job queue and run them. Used inside web
+    processes (started lazily, restarted after a fork) and by
+    `manage.py ingestion_worker`.
+    """
+
+    def __init__(self, threads: int, poll_interval: float = INGESTION_POLL_INTERVAL):
+        self.threads = max(1, int(threads))
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._pid = None
+
+    def start(self):
+        with self._lock:
+            # Threads do not survive fork: a forked child starts its own.
+            if self._pid == os.getpid() and all(t.is_alive() for t in self._workers):
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            try:
+                requeued = job_queue.requeue_stale()
+                if requeued:
+                    print(f"♻️ Re-queued {requeued} stale ingestion job(s).")
+            except Exception as e:
+                print(f"⚠️ Failed to re-queue stale ingestion jobs: {e}")
+            self._workers = [
+                threading.Thread(target=self._run, name=f"ingestion-worker-{i}", daemon=True)
+                for i in range(self.threads)
+            ]
+            for worker in self._workers:
+                worker.start()
+            print(f"✅ Started {self.threads} ingestion worker thread(s) in process {self._pid}.")
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def join(self):
+        for worker in self._workers:
+            worker.join()
+
+    def _run(self):
+        worker_name = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        last_stale_check = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                job = job_queue.claim(worker_name, kinds=list(JOB_HANDLERS))
+            except Exception as e:
+                print(f"❌ Failed to claim ingestion job: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                if time.monotonic() - last_stale_check > INGESTION_JOB_STALE_SECONDS:
+                    last_stale_check = time.monotonic()
+                    try:
+                        job_queue.requeue_stale()
+                    except Exception as e:
+                        print(f"⚠️ Failed to re-queue stale ingestion jobs: {e}")
+                continue
+            self._process(job)
+
+    def _process(self, job: Dict):
+        print(f"⚙️ Running {job['kind']} job {job['id']} (attempt {job['attempts']})...")
+        started = time.perf_counter()
+        retrying = False
+        try:
+            result = JOB_HANDLERS[job["kind"]](job)
+            job_queue.complete(job["id"], result)
+            print(f"✅ Job {job['id']} finished in {time.perf_counter() - started:.2f}s.")
+        except Exception as e:
+            throttled = isinstance(getattr(e, "cause", e), BedrockThrottled)
+            if throttled and job["attempts"] < INGESTION_JOB_MAX_ATTEMPTS:
+                print(f"⏳ Job {job['id']} throttled by Bedrock; retrying in {INGESTION_THROTTLE_RETRY_DELAY}s.")
+                job_queue.retry(job["id"], str(e), INGESTION_THROTTLE_RETRY_DELAY)
+                retrying = True
+            else:
+                print(f"❌ Job {job['id']} failed: {e}")
+                job_queue.fail(job["id"], str(e))
+        finally:
+            # A job that will be retried still needs its spooled upload.
+            if not retrying:
+                spool_path = job["payload"].get("spool_path")
+                if spool_path:
+                    try:
+                        os.remove(spool_path)
+                    except FileNotFoundError:
+                        pass
+                spool_dir = job["payload"].get("spool_dir")
+                if spool_dir:
+                    shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+inprocess_workers = IngestionWorkerPool(INGESTION_INPROCESS_WORKERS or 1)
@@ -0,0 +1,209 @@
+# backend/resume/services/job_queue.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+
+INGESTION_JOB_DB = getattr(settings, 'INGESTION_JOB_DB', os.path.join('data', 'ingestion_jobs.sqlite3'))
+# A running job whose heartbeat is older than this is assumed lost (crashed worker) and re-queued.
+INGESTION_JOB_STALE_SECONDS = getattr(settings, 'INGESTION_JOB_STALE_SECONDS', 15 * 60)
+INGESTION_JOB_MAX_ATTEMPTS = getattr(settings, 'INGESTION_JOB_MAX_ATTEMPTS', 2)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    stages TEXT NOT NULL DEFAULT '{}',
+    current_stage TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL,
+    run_after REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """
+    A small durable job queue in a local SQLite file, so background
+    ingestion needs no external broker.
+
+    Several processes (gunicorn workers, `manage.py ingestion_worker`) can
+    share one file: a job is claimed with a single UPDATE inside an
+    IMMEDIATE transaction, so exactly one worker gets it.
+    """
+
+    def __init__(self, path: str = INGESTION_JOB_DB):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread (and per process: a forked child opens its own).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    # Files created before retries were delayed lack run_after.
+                    columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+                    if "run_after" not in columns:
+                        conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL")
+                    self._initialized = True
+        return conn
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        self._connection().execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, kind, JOB_QUEUED, json.dumps(payload), time.time()),
+        )
+        return job_id
+
+    def claim(self, worker: str, kinds: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically marks the oldest queued job as running and returns it,
+        or None when the queue is empty. Jobs put back by `retry` wait until
+        their delay is over.
+        """
+        conn = self._connection()
+        now = time.time()
+        kind_filter = ""
+        params: List[Any] = [JOB_QUEUED, now]
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE status = ? AND (run_after IS NULL OR run_after <= ?){kind_filter} "
+                "ORDER BY created_at LIMIT 1",
+                params,
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, started_at = ?, heartbeat_at = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (JOB_RUNNING, worker, now, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def update_stage(self, job_id: str, stage: str, state: Dict[str, Any]):
+        """
+        Records the state/timing of one pipeline stage and refreshes the heartbeat.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            stages = json.loads(row["stages"]) if row and row["stages"] else {}
+            stages[stage] = state
+            conn.execute(
+                "UPDATE jobs SET stages = ?, current_stage = ?, heartbeat_at = ? WHERE id = ?",
+                (json.dumps(stages), stage, time.time(), job_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, job_id: str, result: Dict[str, Any]):
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, current_stage = NULL, finished_at = ? WHERE id = ?",
+            (JOB_SUCCEEDED, json.dumps(result, default=str), time.time(), job_id),
+        )
+
+    def fail(self, job_id: str, error: str):
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+            (JOB_FAILED, error, time.time(), job_id),
+        )
+
+    def retry(self, job_id: str, error: str, delay: float = 0.0):
+        """
+        Puts a job that failed for a passing reason back in the queue; it can
+        be claimed again after `delay` seconds. `error` stays visible meanwhile.
+        """
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, error = ?, worker = NULL, current_stage = NULL, run_after = ? WHERE id = ?",
+            (JOB_QUEUED, error, time.time() + delay, job_id),
+        )
+
+    def requeue_stale(self, stale_seconds: float = INGESTION_JOB_STALE_SECONDS,
+                      max_attempts: int = INGESTION_JOB_MAX_ATTEMPTS) -> int:
+        """
+        Puts jobs whose worker stopped heart-beating back in the queue (or
+        fails them once they have used up their attempts). Returns the number
+        of jobs touched.
+        """
+        conn = self._connection()
+        cutoff = time.time() - stale_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            failed = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+                (JOB_FAILED, "Worker stopped responding.", time.time(), JOB_RUNNING, cutoff, max_attempts),
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat_at < ?",
+                (JOB_QUEUED, JOB_RUNNING, cutoff),
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return failed + requeued
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["stages"] = json.loads(job["stages"]) if job["stages"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+job_queue = JobQueue()
@@ -0,0 +1,272 @@
+# backend/resume/services/llm_usage.py
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+from django.conf import settings
+
+LLM_USAGE_ENABLED = getattr(settings, 'LLM_USAGE_ENABLED', True)
+LLM_USAGE_DB = getattr(settings, 'LLM_USAGE_DB', os.path.join('data', 'llm_usage.sqlite3'))
+# Rows older than this are deleted (checked every LLM_USAGE_PRUNE_EVERY records).
+LLM_USAGE_RETENTION_DAYS = getattr(settings, 'LLM_USAGE_RETENTION_DAYS', 90)
+LLM_USAGE_PRUNE_EVERY = 1000
+# Rows are buffered in memory and written by a background thread every
+# LLM_USAGE_FLUSH_INTERVAL seconds (or once LLM_USAGE_FLUSH_BATCH are waiting).
+LLM_USAGE_FLUSH_INTERVAL = getattr(settings, 'LLM_USAGE_FLUSH_INTERVAL', 2.0)
+LLM_USAGE_FLUSH_BATCH = 500
+# Rows beyond this while the file cannot be written are dropped (oldest first).
+LLM_USAGE_BUFFER_MAX = getattr(settings, 'LLM_USAGE_BUFFER_MAX', 10000)
+
+# `cache` column values.
+CACHE_MISS = "miss"      # a cache was consulted, then the model was called
+CACHE_BYPASS = "bypass"  # the caller asked for no cache (no_cache=true)
+CACHE_HIT = "hit"        # served from a cache, no model call
+CACHE_LOCAL = "local"    # answered without the model (local query planner)
+CACHE_NONE = "none"      # no cache in front of this call site
+
+GROUP_COLUMNS = ("call_site", "model_id", "cache", "status", "day")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    model_id TEXT NOT NULL,
+    call_site TEXT NOT NULL,
+    cache TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stream INTEGER NOT NULL DEFAULT 0,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    latency_ms REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS llm_calls_created ON llm_calls (created_at);
+"""
+
+
+class LLMUsageLog:
+    """
+    One row per LLM call (and per cache hit that saved one) in a local
+    SQLite file: model id, call site, cache status, input / output tokens
+    and latency. Shared by all processes on the host, like the job queue.
+
+    `record()` only appends to an in-memory buffer, so request threads
+    never wait on SQLite; a background thread per process writes the rows
+    in batches. Recording never raises: a failed write is printed and the
+    rows are retried on the next flush (up to LLM_USAGE_BUFFER_MAX).
+    """
+
+    def __init__(self, path: str = LLM_USAGE_DB, enabled: bool = LLM_USAGE_ENABLED,
+                 flush_interval: float = LLM_USAGE_FLUSH_INTERVAL, buffer_max: int = LLM_USAGE_BUFFER_MAX):
+        self.path = path
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = deque(maxlen=buffer_max)
+        self._wake = threading.Event()
+        self._flusher = None
+        self._pid = None
+
+        # --- Counters ---
+        self._recorded = 0
+        self._written = 0
+        self._dropped = 0
+        self._write_errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread (and per process: a forked child opens its own).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+        return conn
+
+    def record(self, model_id: str, call_site: str, cache: str = CACHE_NONE, status: str = "ok",
+               input_tokens: Optional[int] = None, output_tokens: Optional[int] = None,
+               latency: float = 0.0, stream: bool = False):
+        """
+        `latency` is in seconds, measured around the whole call (queueing
+        and retries in the Bedrock gateway included).
+        """
+        if not self.enabled:
+            return
+        row = (time.time(), model_id or "unknown", call_site or "unknown", cache, status, int(stream),
+               input_tokens, output_tokens, round(latency * 1000, 1))
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: rows copied from the parent are the parent's to write.
+                self._buffer.clear()
+                self._pid = os.getpid()
+                self._flusher = None
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped += 1
+            self._buffer.append(row)
+            self._recorded += 1
+            full = len(self._buffer) >= LLM_USAGE_FLUSH_BATCH
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run_flusher, name="llm-usage-flush", daemon=True)
+                self._flusher.start()
+        if full:
+            self._wake.set()
+
+    def _run_flusher(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Writes the buffered rows in one transaction. Returns how many were
+        written; on failure they go back to the buffer.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+                self._buffer.clear()
+            if not rows:
+                return 0
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(
+                        "INSERT INTO llm_calls (created_at, model_id, call_site, cache, status, stream, "
+                        "input_tokens, output_tokens, latency_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            except Exception as e:
+                with self._lock:
+                    self._write_errors += 1
+                    # Keep the oldest rows first; newer ones recorded meanwhile follow.
+                    pending = rows + list(self._buffer)
+                    self._buffer.clear()
+                    overflow = max(0, len(pending) - self._buffer.maxlen)
+                    self._dropped += overflow
+                    self._buffer.extend(pending[overflow:])
+                print(f"⚠️ LLM usage write failed ({len(rows)} rows kept for the next flush): {e}")
+                return 0
+
+            with self._lock:
+                before = self._written
+                self._written += len(rows)
+                prune = before // LLM_USAGE_PRUNE_EVERY != self._written // LLM_USAGE_PRUNE_EVERY
+            if prune:
+                try:
+                    self.prune()
+                except Exception as e:
+                    print(f"⚠️ LLM usage prune failed: {e}")
+            return len(rows)
+
+    def prune(self, retention_days: float = LLM_USAGE_RETENTION_DAYS) -> int:
+        cutoff = time.time() - retention_days * 86400
+        return self._connection().execute("DELETE FROM llm_calls WHERE created_at < ?", (cutoff,)).rowcount
+
+    def summary(self, days: Optional[float] = 1, group_by: Sequence[str] = ("call_site", "model_id"),
+                call_site: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Aggregates per `group_by` (any of GROUP_COLUMNS) over the last
+        `days` (None = everything), most total latency first.
+        """
+        unknown = [c for c in group_by if c not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cannot group by {', '.join(unknown)}; choose from {', '.join(GROUP_COLUMNS)}.")
+        # Include this process's rows that are still waiting to be written.
+        self.flush()
+
+        columns = [
+            "date(created_at, 'unixepoch') AS day" if c == "day" else c
+            for c in group_by
+        ]
+        where, params = [], []
+        if days is not None:
+            where.append("created_at >= ?")
+            params.append(time.time() - days * 86400)
+        if call_site:
+            where.append("call_site = ?")
+            params.append(call_site)
+
+        select = ", ".join(columns + [
+            "COUNT(*) AS calls",
+            "SUM(cache IN ('hit', 'local')) AS cache_hits",
+            "SUM(status != 'ok') AS errors",
+            "SUM(status = 'throttled') AS throttled",
+            "COALESCE(SUM(input_tokens), 0) AS input_tokens",
+            "COALESCE(SUM(output_tokens), 0) AS output_tokens",
+            "ROUND(SUM(latency_ms) / 1000.0, 3) AS total_seconds",
+            "ROUND(AVG(CASE WHEN cache NOT IN ('hit', 'local') THEN latency_ms END), 1) AS avg_model_latency_ms",
+            "MAX(latency_ms) AS max_latency_ms",
+        ])
+        sql = f"SELECT {select} FROM llm_calls"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if group_by:
+            sql += f" GROUP BY {', '.join(group_by)}"
+        sql += " ORDER BY total_seconds DESC"
+
+        rows = [dict(row) for row in self._connection().execute(sql, params).fetchall()]
+        for row in rows:
+            row["cache_hit_rate"] = round(row["cache_hits"] / row["calls"], 4) if row["calls"] else 0.0
+            row["p95_latency_ms"] = self._p95_latency(row, group_by, where, params)
+        return rows
+
+    def _p95_latency(self, row: Dict[str, Any], group_by: Sequence[str], where: List[str], params: List[Any]):
+        conditions = list(where) + ["cache NOT IN ('hit', 'local')"]
+        values = list(params)
+        for column in group_by:
+            conditions.append("date(created_at, 'unixepoch') = ?" if column == "day" else f"{column} = ?")
+            values.append(row[column])
+        where_sql = " AND ".join(conditions)
+        count = self._connection().execute(f"SELECT COUNT(*) FROM llm_calls WHERE {where_sql}", values).fetchone()[0]
+        if not count:
+            return None
+        offset = min(count - 1, int(0.95 * count))
+        found = self._connection().execute(
+            f"SELECT latency_ms FROM llm_calls WHERE {where_sql} ORDER BY latency_ms LIMIT 1 OFFSET ?",
+            values + [offset],
+        ).fetchone()
+        return found[0] if found else None
+
+    def get_stats(self) -> Dict:
+        """
+        In-memory counters only: cheap enough for every metrics scrape. The
+        per-call-site totals are in `summary()` (staff-only llm-usage/ view
+        and the llm_usage_report command).
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "recorded": self._recorded,
+                "written": self._written,
+                "buffered": len(self._buffer),
+                "dropped": self._dropped,
+                "write_errors": self._write_errors,
+            }
+
+
+llm_usage = LLMUsageLog()
+# Write what is still buffered when the process exits normally.
+atexit.register(llm_usage.flush)
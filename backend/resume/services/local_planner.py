@@ -0,0 +1,460 @@
+# backend/resume/services/local_planner.py
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from django.conf import settings
+from .qdrant_service import iter_contract_payloads, CONTRACT_CATEGORY_MAP
+
+LOCAL_PLANNER_ENABLED = getattr(settings, 'LOCAL_PLANNER_ENABLED', True)
+# How long the in-memory index of party names is reused before it is rebuilt from Qdrant.
+LOCAL_PLANNER_INDEX_TTL = getattr(settings, 'LOCAL_PLANNER_INDEX_TTL', 10 * 60)
+# After a failed index build, wait this long before trying again.
+LOCAL_PLANNER_INDEX_RETRY = getattr(settings, 'LOCAL_PLANNER_INDEX_RETRY', 30)
+# Every planned search query is appended here (JSON lines) for `manage.py planner_report`.
+# Set to '' to disable.
+LOCAL_PLANNER_QUERY_LOG = getattr(settings, 'LOCAL_PLANNER_QUERY_LOG', os.path.join('data', 'search_queries.jsonl'))
+# The log is rotated at this size (to .1, .2, ...); only this many rotated files are kept.
+LOCAL_PLANNER_QUERY_LOG_MAX_BYTES = getattr(settings, 'LOCAL_PLANNER_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024)
+LOCAL_PLANNER_QUERY_LOG_BACKUPS = getattr(settings, 'LOCAL_PLANNER_QUERY_LOG_BACKUPS', 3)
+
+# --- Document-type phrases -> the `category` filter value ---
+CATEGORY_KEYWORDS = {
+    'loan_agreement': re.compile(r"\bloans?(?:\s+(?:agreements?|contracts?))?\b", re.I),
+    'nda': re.compile(
+        r"\bndas?\b|\bnon[-\s]?disclosure(?:\s+agreements?)?\b|\bconfidentiality\s+agreements?\b", re.I
+    ),
+    'employee_contract': re.compile(r"\bemploy(?:ee|ment)\s+(?:contracts?|agreements?)\b", re.I),
+}
+
+# --- Words that say which role a name plays (used to pick one field when a name fits several) ---
+ROLE_PHRASES = {
+    'lender_name': re.compile(r"\blenders?\b", re.I),
+    'borrower_name': re.compile(r"\bborrowers?\b", re.I),
+    'disclosing_party': re.compile(r"\bdisclos(?:ing|er|ers)\b", re.I),
+    'receiving_party': re.compile(r"\breceiv(?:ing|er|ers)\b|\brecipients?\b", re.I),
+    'employer_name': re.compile(r"\bemployers?\b", re.I),
+    'employee_name': re.compile(r"\bemployees?\b", re.I),
+}
+
+# Payload fields whose values are names we can look up in the query.
+NAME_FIELD_SUFFIXES = ("_name", "_party", "_title")
+DATE_FIELD_SUFFIX = "_date"
+
+# Extracted values that are roles, not names ("the Company"), and never become filters.
+GENERIC_VALUES = {
+    "n/a", "na", "none", "null", "unknown", "not specified", "not mentioned",
+    "company", "the company", "client", "the client", "employer", "the employer",
+    "employee", "the employee", "lender", "the lender", "borrower", "the borrower",
+    "party", "the party", "recipient", "the recipient", "discloser", "the discloser",
+}
+
+# Capitalised words that do not name anybody.
+COMMON_CAPITALIZED = {"i", "nda", "ndas", "pdf", "usd", "llm"}
+# Words after "with" / "between" / ... that do not start a name.
+RELATION_STOPWORDS = {
+    "a", "an", "the", "all", "any", "each", "every", "our", "their", "its", "his", "her",
+    "no", "respect", "regard", "regards", "regarding", "them", "us", "me", "it",
+    "lenders", "borrowers", "employees", "employers", "parties", "vendors", "clients",
+    "customers", "contractors", "third", "other", "another",
+}
+RELATION_WORDS = re.compile(r"\b(?:with|between|involving|named|called|by|from|against)\s+([\w&.'-]+)", re.I)
+
+_MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+# Full dates we can turn into the payload's MM/DD/YYYY form.
+FULL_DATE_PATTERNS = [
+    (re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b"), "%m/%d/%Y"),
+    (re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b"), "%Y-%m-%d"),
+    (re.compile(rf"\b(?:{_MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b", re.I), None),
+    (re.compile(rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{_MONTHS})\.?,?\s+\d{{4}}\b", re.I), None),
+]
+# Anything else that talks about a date or period (needs the router to interpret).
+DATE_EXPRESSION = re.compile(
+    rf"\b\d{{1,2}}[/.-]\d{{1,2}}(?:[/.-]\d{{2,4}})?\b"
+    rf"|\b(?:{_MONTHS})\.?\s+\d{{1,4}}\b|\b\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?(?:{_MONTHS})\b"
+    rf"|\b(?:19|20)\d{{2}}\b"
+    rf"|\b(?:today|tomorrow|yesterday)\b|\b(?:next|last|this|coming|past)\s+(?:\d+\s+)?(?:days?|weeks?|months?|quarters?|years?)\b",
+    re.I,
+)
+NUMERIC_EXPRESSION = re.compile(r"\d|[$€£₹%]|\b(?:k|million|billion|lakh|crore|thousand)\b", re.I)
+QUOTED_TEXT = re.compile(r'"[^"]+"|“[^”]+”')
+TOKEN = re.compile(r"[\w&]+(?:[.-][\w&]+)*")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def _tokens(text: str) -> List[str]:
+    return [t.casefold() for t in TOKEN.findall(text)]
+
+
+def _parse_full_date(text: str) -> Optional[str]:
+    cleaned = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", text, flags=re.I).replace(",", " ").replace(".", " ")
+    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    for fmt in ("%m/%d/%Y", "%Y-%m-%d", "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y"):
+        try:
+            return datetime.strptime(cleaned, fmt).strftime("%m/%d/%Y")
+        except ValueError:
+            continue
+    return None
+
+
+class PartyIndex:
+    """
+    In-memory index of the names stored in contract payloads (parties,
+    employees, job titles), keyed by first token so a query is matched in
+    one pass over its words.
+
+    Built by scrolling Qdrant in a background thread, started on first use
+    (queries go to Bedrock until it is ready); once older than `ttl` it is
+    rebuilt the same way while the old one keeps answering.
+    """
+
+    def __init__(self, category_fields: Dict[str, List[str]], ttl: float = LOCAL_PLANNER_INDEX_TTL,
+                 retry: float = LOCAL_PLANNER_INDEX_RETRY):
+        self.ttl = ttl
+        self.retry = retry
+        # category -> the name fields the router may filter on
+        self.name_fields = {
+            category: [f for f in fields if f.endswith(NAME_FIELD_SUFFIXES)]
+            for category, fields in category_fields.items()
+        }
+        self._entries: Optional[Dict[str, List[Tuple[Tuple[str, ...], str, Set[Tuple[str, str]]]]]] = None
+        self._values = 0
+        self._built_at = 0.0
+        self._failed_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List[Tuple[Tuple[str, ...], str, Set[Tuple[str, str]]]]]:
+        by_value: Dict[Tuple[str, ...], Dict] = {}
+        for category, fields in self.name_fields.items():
+            collection = CONTRACT_CATEGORY_MAP.get(category)
+            if not collection or not fields:
+                continue
+            for payload in iter_contract_payloads(collection, fields):
+                for field in fields:
+                    value = _normalize(str(payload.get(field) or ""))
+                    if len(value) < 3 or value.casefold() in GENERIC_VALUES:
+                        continue
+                    tokens = tuple(_tokens(value))
+                    if not tokens:
+                        continue
+                    entry = by_value.setdefault(tokens, {"value": value, "fields": set()})
+                    entry["fields"].add((field, category))
+
+        entries: Dict[str, List] = {}
+        for tokens, entry in by_value.items():
+            entries.setdefault(tokens[0], []).append((tokens, entry["value"], entry["fields"]))
+        for candidates in entries.values():
+            # Longest names first, so "Acme Holdings" wins over "Acme".
+            candidates.sort(key=lambda c: len(c[0]), reverse=True)
+        return entries
+
+    def _rebuild(self) -> bool:
+        started = time.perf_counter()
+        try:
+            entries = self._load()
+        except Exception as e:
+            print(f"⚠️ Local planner could not build the party-name index: {e}")
+            with self._lock:
+                self._failed_at = time.monotonic()
+                self._refreshing = False
+            return False
+        with self._lock:
+            self._entries = entries
+            self._values = sum(len(c) for c in entries.values())
+            self._built_at = time.monotonic()
+            self._refreshing = False
+        print(f"✅ Party-name index built: {self._values} names in {time.perf_counter() - started:.2f}s")
+        return True
+
+    def build(self) -> bool:
+        """
+        Builds the index now, in the calling thread (for management commands,
+        which cannot wait for the background build). Returns False if Qdrant
+        could not be read.
+        """
+        with self._lock:
+            self._refreshing = True
+        return self._rebuild()
+
+    def _ensure_fresh(self) -> bool:
+        """
+        Returns True when an index is available, starting a background build
+        when there is none yet (or it is older than `ttl`). Never blocks on Qdrant.
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = self._entries is not None
+            if self._refreshing:
+                return available
+            if available and now - self._built_at <= self.ttl:
+                return True
+            if not available and self._failed_at and now - self._failed_at < self.retry:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._rebuild, name="party-index", daemon=True).start()
+        return available
+
+    def mark_stale(self):
+        """
+        Called after uploads, so the next query rebuilds the index.
+        """
+        with self._lock:
+            self._built_at = 0.0
+
+    def match(self, tokens: List[str]) -> Optional[List[Tuple[int, int, str, Set[Tuple[str, str]]]]]:
+        """
+        Returns (start, end, value, {(field, category)}) for every indexed name
+        in `tokens` (longest match wins), or None when no index is available.
+        """
+        if not self._ensure_fresh():
+            return None
+        entries = self._entries
+        matches = []
+        i = 0
+        while i < len(tokens):
+            for candidate_tokens, value, fields in entries.get(tokens[i], ()):
+                n = len(candidate_tokens)
+                if tuple(tokens[i:i + n]) == candidate_tokens:
+                    matches.append((i, i + n, value, fields))
+                    i += n
+                    break
+            else:
+                i += 1
+        return matches
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "names": self._values,
+                "ready": self._entries is not None,
+                "age_seconds": round(time.monotonic() - self._built_at, 1) if self._entries is not None else None,
+                "ttl": self.ttl,
+            }
+
+
+class LocalQueryPlanner:
+    """
+    Rule-based planner tried before the Bedrock router. It returns the same
+    {semantic_query, filters} plan, built from:
+
+      - document-type keywords ("loan agreement", "NDA", ...) -> `category`
+      - names found in the party index -> that name's payload field
+      - a full date next to a date field's name ("effective date 01/15/2024")
+
+    `plan()` returns (plan, reason). The plan is None whenever the query holds
+    something the rules cannot place for certain (an unknown name, an
+    ambiguous role, numbers, relative dates, quoted text); `reason` says
+    which, and the caller falls back to Bedrock.
+    """
+
+    def __init__(self, category_fields: Dict[str, List[str]], party_index: Optional[PartyIndex] = None,
+                 query_log: str = LOCAL_PLANNER_QUERY_LOG):
+        self.category_fields = category_fields
+        self.party_index = party_index or PartyIndex(category_fields)
+        self.query_log = query_log
+        # "with effective date ...", "with salary ..." name a field, not a party.
+        self._field_words = {w for fields in category_fields.values() for f in fields for w in f.split("_")}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+        # --- Counters ---
+        self._handled = 0
+        self._deferred: Counter = Counter()
+        self._handled_with_filters = 0
+
+    # ------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------
+    def _allowed_fields(self, category: Optional[str]) -> Set[str]:
+        if category and category in self.category_fields:
+            return set(self.category_fields[category])
+        return {f for fields in self.category_fields.values() for f in fields}
+
+    def _date_fields_mentioned(self, query: str, allowed: Set[str]) -> List[str]:
+        fields = []
+        for field in sorted(allowed):
+            if field.endswith(DATE_FIELD_SUFFIX):
+                phrase = re.escape(field.replace("_", " ")).replace(r"\ ", r"\s+")
+                if re.search(rf"\b{phrase}\b", query, re.I):
+                    fields.append(field)
+        return fields
+
+    def _plan(self, query: str, category: Optional[str]) -> Tuple[Optional[Dict], str]:
+        if QUOTED_TEXT.search(query):
+            return None, "quoted_text"
+
+        allowed = self._allowed_fields(category)
+        filters: Dict[str, str] = {}
+        rest = query
+
+        # --- Document type ---
+        mentioned = [c for c, pattern in CATEGORY_KEYWORDS.items() if pattern.search(query)]
+        if len(mentioned) > 1:
+            return None, "several_categories"
+        if mentioned:
+            if category and mentioned[0] != category:
+                return None, "category_conflict"
+            filters["category"] = mentioned[0]
+            rest = CATEGORY_KEYWORDS[mentioned[0]].sub(" ", rest)
+        target_category = category or (mentioned[0] if mentioned else None)
+
+        # --- Dates ---
+        full_dates = []
+        for pattern, _ in FULL_DATE_PATTERNS:
+            for m in pattern.finditer(rest):
+                full_dates.append(m.group(0))
+                rest = rest.replace(m.group(0), " ")
+        if full_dates:
+            date_fields = self._date_fields_mentioned(query, allowed)
+            parsed = _parse_full_date(full_dates[0])
+            if len(full_dates) > 1 or len(date_fields) != 1 or parsed is None:
+                return None, "date"
+            filters[date_fields[0]] = parsed
+        if DATE_EXPRESSION.search(rest):
+            return None, "date"
+        if NUMERIC_EXPRESSION.search(rest):
+            return None, "number"
+
+        # --- Names ---
+        words = list(TOKEN.finditer(rest))
+        tokens = [w.group(0).casefold() for w in words]
+        matches = self.party_index.match(tokens)
+        if matches is None:
+            return None, "index_unavailable"
+        covered = set()
+        for start, end, value, fields in matches:
+            candidates = {f for f, c in fields if f in allowed and (not target_category or c == target_category)}
+            if len(candidates) > 1:
+                by_role = {f for f in candidates if f in ROLE_PHRASES and ROLE_PHRASES[f].search(query)}
+                if len(by_role) == 1:
+                    candidates = by_role
+            if len(candidates) != 1:
+                return None, "ambiguous_name"
+            field = candidates.pop()
+            if field in filters and filters[field] != value:
+                return None, "ambiguous_name"
+            filters[field] = value
+            covered.update(range(start, end))
+
+        # --- Anything that still looks like a name ---
+        first_word = words[0].start() if words else 0
+        for i, word in enumerate(words):
+            text = word.group(0)
+            if i in covered or word.start() == first_word:
+                continue
+            if text[:1].isupper() and text.casefold() not in COMMON_CAPITALIZED:
+                return None, "unknown_name"
+        known_words = {words[i].group(0).casefold() for i in covered} | self._field_words
+        for m in RELATION_WORDS.finditer(rest):
+            following = m.group(1).casefold()
+            if following not in RELATION_STOPWORDS and following not in known_words:
+                return None, "unknown_name"
+
+        return {"semantic_query": query, "filters": filters}, "handled"
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    def plan(self, natural_query: str, category: Optional[str] = None) -> Tuple[Optional[Dict], str]:
+        query = _normalize(natural_query)
+        try:
+            plan, reason = self._plan(query, category)
+        except Exception as e:
+            print(f"⚠️ Local planner failed, deferring to Bedrock: {e}")
+            plan, reason = None, "error"
+        with self._lock:
+            if plan is not None:
+                self._handled += 1
+                if plan["filters"]:
+                    self._handled_with_filters += 1
+            else:
+                self._deferred[reason] += 1
+        return plan, reason
+
+    def _rotate_log(self):
+        """
+        Moves a full query log to .1 (.1 to .2, ...), dropping the oldest.
+        """
+        if os.path.getsize(self.query_log) < LOCAL_PLANNER_QUERY_LOG_MAX_BYTES:
+            return
+        for n in range(LOCAL_PLANNER_QUERY_LOG_BACKUPS, 0, -1):
+            older = f"{self.query_log}.{n - 1}" if n > 1 else self.query_log
+            if os.path.exists(older):
+                os.replace(older, f"{self.query_log}.{n}")
+        if LOCAL_PLANNER_QUERY_LOG_BACKUPS <= 0 and os.path.exists(self.query_log):
+            os.remove(self.query_log)
+
+    def record(self, natural_query: str, category: Optional[str], planner: str, reason: str):
+        """
+        Appends one planned query to the query log (best effort), rotating
+        it at LOCAL_PLANNER_QUERY_LOG_MAX_BYTES.
+        """
+        if not self.query_log:
+            return
+        line = json.dumps({
+            "timestamp": datetime.utcnow().isoformat(),
+            "query": natural_query,
+            "category": category,
+            "planner": planner,
+            "reason": reason,
+        })
+        try:
+            with self._log_lock:
+                directory = os.path.dirname(self.query_log)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.query_log):
+                    self._rotate_log()
+                with open(self.query_log, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write the search query log: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            deferred = sum(self._deferred.values())
+            total = self._handled + deferred
+            return {
+                "enabled": LOCAL_PLANNER_ENABLED,
+                "queries": total,
+                "handled_locally": self._handled,
+                "handled_with_filters": self._handled_with_filters,
+                "sent_to_bedrock": deferred,
+                "handled_fraction": round(self._handled / total, 4) if total else 0.0,
+                "deferred_reasons": dict(self._deferred),
+                "party_index": self.party_index.get_stats(),
+            }
+
+
+def read_query_log(path: str = LOCAL_PLANNER_QUERY_LOG) -> Iterable[Dict]:
+    """
+    Yields the entries of a query log written by `LocalQueryPlanner.record`,
+    oldest first, including its rotated files.
+    """
+    rotated = [f"{path}.{n}" for n in range(LOCAL_PLANNER_QUERY_LOG_BACKUPS, 0, -1)]
+    paths = [p for p in rotated if os.path.exists(p)]
+    if os.path.exists(path) or not paths:
+        paths.append(path)
+    for log_path in paths:
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
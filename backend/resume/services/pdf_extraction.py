@@ -0,0 +1,198 @@
+# backend/resume/services/pdf_extraction.py
+
+import bisect
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Union
+import fitz  # PyMuPDF
+from django.conf import settings
+
+# Documents with fewer pages than this are parsed in-process.
+PDF_PARALLEL_PAGE_THRESHOLD = getattr(settings, 'PDF_PARALLEL_PAGE_THRESHOLD', 40)
+PDF_EXTRACT_WORKERS = getattr(settings, 'PDF_EXTRACT_WORKERS', max(1, min(4, os.cpu_count() or 1)))
+
+# A PDF is passed around either as its bytes or as the path of a file on disk
+# (e.g. a spooled upload). Paths are opened by MuPDF directly, without reading
+# the whole file into Python memory.
+PdfSource = Union[bytes, str, os.PathLike]
+
+
+def open_pdf(pdf: PdfSource):
+    if isinstance(pdf, (str, os.PathLike)):
+        return fitz.open(os.fspath(pdf), filetype="pdf")
+    return fitz.open(stream=pdf, filetype="pdf")
+
+
+class ExtractedText:
+    """
+    Text of a PDF, joined once, with the character offset at which each page starts.
+    """
+    __slots__ = ("text", "page_offsets")
+
+    def __init__(self, pages: List[str]):
+        offsets = []
+        position = 0
+        for page in pages:
+            offsets.append(position)
+            position += len(page)
+        self.text = "".join(pages)
+        self.page_offsets = offsets
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_offsets)
+
+    def page_for_offset(self, offset: int) -> int:
+        """
+        0-based page number containing character `offset`.
+        """
+        return page_for_offset(self.page_offsets, offset)
+
+
+def page_for_offset(page_offsets: List[int], offset: int) -> int:
+    """
+    0-based page number containing character `offset`, given each page's start offset.
+    """
+    return max(0, bisect.bisect_right(page_offsets, offset) - 1)
+
+
+# ------------------------------------------------------------
+# Pool worker side (runs in a separate process)
+# ------------------------------------------------------------
+def _extract_page_range(shm_name: str, size: int, start: int, stop: int) -> List[str]:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return [doc.load_page(i).get_text() for i in range(start, stop)]
+
+
+def _extract_page_range_from_path(path: str, start: int, stop: int) -> List[str]:
+    with fitz.open(path, filetype="pdf") as doc:
+        return [doc.load_page(i).get_text() for i in range(start, stop)]
+
+
+# ------------------------------------------------------------
+# Parent side
+# ------------------------------------------------------------
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A pool inherited through fork (e.g. a gunicorn worker) is unusable.
+        if _pool is None or _pool_pid != os.getpid():
+            # forkserver: workers start from a clean process, not a copy of a
+            # multi-threaded web worker.
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["fitz"])
+            _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS, mp_context=context)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _page_ranges(start: int, stop: int, parts: int):
+    total = stop - start
+    parts = max(1, min(parts, total))
+    size, extra = divmod(total, parts)
+    ranges = []
+    position = start
+    for i in range(parts):
+        end = position + size + (1 if i < extra else 0)
+        ranges.append((position, end))
+        position = end
+    return ranges
+
+
+def _collect(futures) -> List[str]:
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def _extract_pages_parallel(pdf: PdfSource, start: int, stop: int) -> List[str]:
+    pool = _get_pool()
+    ranges = _page_ranges(start, stop, PDF_EXTRACT_WORKERS * 2)
+    if isinstance(pdf, (str, os.PathLike)):
+        # Workers open the file themselves; nothing is copied.
+        path = os.fspath(pdf)
+        return _collect([pool.submit(_extract_page_range_from_path, path, a, b) for a, b in ranges])
+
+    # The bytes are shared once instead of being pickled into every task.
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(pdf)))
+    try:
+        shm.buf[:len(pdf)] = pdf
+        return _collect([pool.submit(_extract_page_range, shm.name, len(pdf), a, b) for a, b in ranges])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def extract_pdf_pages(pdf: PdfSource, start: int = 0, stop: Optional[int] = None, doc=None) -> List[str]:
+    """
+    Returns the text of pages [start, stop) as a list, one string per page.
+    Large ranges are split across a process pool; small ones stay in-process.
+    `pdf` is the PDF's bytes or a file path; `doc` may be an already-open
+    fitz document for it.
+    """
+    own_doc = doc is None
+    if own_doc:
+        doc = open_pdf(pdf)
+    try:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        if stop - start >= PDF_PARALLEL_PAGE_THRESHOLD and PDF_EXTRACT_WORKERS > 1:
+            try:
+                return _extract_pages_parallel(pdf, start, stop)
+            except Exception as e:
+                print(f"⚠️ Parallel PDF extraction failed, falling back to single process: {e}")
+        return [doc.load_page(i).get_text() for i in range(start, stop)]
+    finally:
+        if own_doc:
+            doc.close()
+
+
+def iter_pdf_pages(pdf: PdfSource = None, start: int = 0, doc=None):
+    """
+    Yields the text of each page in order, starting at `start`, parsing
+    lazily so callers can act on the first pages before the rest are read.
+    """
+    own_doc = doc is None
+    if own_doc:
+        doc = open_pdf(pdf)
+    try:
+        for i in range(start, doc.page_count):
+            yield doc.load_page(i).get_text()
+    finally:
+        if own_doc:
+            doc.close()
+
+
+def extract_pdf_head(pdf: PdfSource, min_chars: int) -> List[str]:
+    """
+    Returns the text of the first pages, stopping once at least `min_chars`
+    characters have been read (or at the end of the document).
+    """
+    pages = []
+    total = 0
+    for page_text in iter_pdf_pages(pdf):
+        pages.append(page_text)
+        total += len(page_text)
+        if total >= min_chars:
+            break
+    return pages
+
+
+def extract_pdf_text(pdf: PdfSource) -> ExtractedText:
+    """
+    Extracts all pages of a PDF and joins them once, keeping per-page offsets.
+    """
+    return ExtractedText(extract_pdf_pages(pdf))
@@ -5,11 +5,10 @@ from qdrant_client.http.models import PointStruct
 import time
 from datetime import date, timedelta, datetime
 from typing import List, Dict, Any, Union
-from dotenv import load_dotenv
-import os
+from django.conf import settings
 from .s3_service import generate_presigned_viewable_url
-
-load_dotenv()
+from . import resource_registry
+from .pdf_extraction import page_for_offset
 
 ALERT_MAX_DAYS = 20         # 0-20 days
 REMINDER_MIN_DAYS = 21      # 21-60 days (1 day after alert window ends)
@@ -31,11 +30,32 @@ DATE_FIELD_MAP = {
     "ndas": {"end_date": "END_DATE"},
 }
 
-QDRANT_CLUSTER_URL = os.getenv("QDRANT_CLUSTER_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_CLUSTER_URL = getattr(settings, "QDRANT_CLUSTER_URL", None)
+QDRANT_API_KEY = getattr(settings, "QDRANT_API_KEY", None)
 
 VECTOR_SIZE = 384
 
+# --- Chunked (multi-vector) contracts ---
+# Each contract is stored as one parent point plus one child point per chunk.
+# Child points carry `point_type = "chunk"` and a `parent_id` back-reference.
+CHUNK_POINT_TYPE = "chunk"
+CHUNK_SCORE_AGGREGATION = os.getenv("CHUNK_SCORE_AGGREGATION", "max")
+CHUNK_SEARCH_OVERSAMPLE = int(os.getenv("CHUNK_SEARCH_OVERSAMPLE", 4))
+# Max points per upsert request (a contract plus its chunks, or a bulk batch).
+QDRANT_UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", 256))
+
+# SHA-256 of the uploaded file's bytes, used to skip re-ingesting the same file.
+CONTENT_HASH_FIELD = "content_sha256"
+
+# Excludes child chunk points from list / alert queries.
+EXCLUDE_CHUNKS_CONDITION = models.FieldCondition(
+    key="point_type", match=models.MatchValue(value=CHUNK_POINT_TYPE)
+)
+# Excludes parent points whose text is already covered by their chunks.
+EXCLUDE_CHUNKED_PARENTS_CONDITION = models.FieldCondition(
+    key="has_chunks", match=models.MatchValue(value=True)
+)
+
 COLLECTION_FIELDS = {
     'loan_agreements': [
         "lender_name", "borrower_name", "loan_amount", "interest_rate", "due_date", "category",
@@ -48,19 +68,15 @@ COLLECTION_FIELDS = {
     ]
 }
 
-try:
-    qdrant_client = QdrantClient(url=QDRANT_CLUSTER_URL, api_key=QDRANT_API_KEY)
-    print("🚀 Successfully connected to Qdrant.")
-except Exception as e:
-    print(f"❌ Failed to connect to Qdrant: {e}")
-    qdrant_client = None
-
 COLLECTION_NAMES = ["loan_agreements", "ndas", "employee_contracts"]
 
-def initialize_qdrant_collections():
-    if not qdrant_client:
-        print("❌ Qdrant client not available. Skipping collection initialization.")
-        return
+def initialize_qdrant_collections(qdrant_client: QdrantClient = None):
+    if qdrant_client is None:
+        try:
+            qdrant_client = get_qdrant()
+        except ConnectionError:
+            print("❌ Qdrant client not available. Skipping collection initialization.")
+            return
 
     print("\nVerifying Qdrant collections...")
     for collection_name in COLLECTION_NAMES:
@@ -78,14 +94,38 @@ def initialize_qdrant_collections():
             except Exception as e:
                 print(f"❌ Could not create collection '{collection_name}': {e}")
 
-initialize_qdrant_collections()
+def _connect_qdrant():
+    # Raising (instead of returning None) leaves the resource unloaded, so
+    # readiness reports the error and the next get() tries again.
+    try:
+        client = QdrantClient(url=QDRANT_CLUSTER_URL, api_key=QDRANT_API_KEY)
+        # The constructor does not connect; one cheap request proves the cluster is reachable.
+        client.get_collections()
+        print("🚀 Successfully connected to Qdrant.")
+    except Exception as e:
+        print(f"❌ Failed to connect to Qdrant: {e}")
+        raise ConnectionError(f"Could not connect to Qdrant: {e}") from e
+    # Collections are verified once per process, on first use.
+    initialize_qdrant_collections(client)
+    return client
+
+# The client holds an HTTP connection pool, so it is rebuilt after a fork.
+qdrant_resource = resource_registry.register(
+    'qdrant',
+    _connect_qdrant,
+    warmup=lambda client: client.get_collections(),
+    fork_safe=False,
+)
+
+def get_qdrant():
+    """
+    Returns the shared, lazily-connected Qdrant client. Raises
+    ConnectionError if it cannot connect; the next call tries again.
+    """
+    return qdrant_resource.get()
 
 def get_qdrant_client():
-    client = QdrantClient(
-        url=QDRANT_CLUSTER_URL,
-        api_key=QDRANT_API_KEY
-    )
-    return client
+    return get_qdrant()
 
 def setup_qdrant_collections():
     client = get_qdrant_client()
@@ -159,51 +199,218 @@ def setup_qdrant_collections():
         except Exception as e:
             print(f"❌ FAILED to process collection {collection_name}: {e}")
 
-def upsert_contract(collection_name: str, point_id: str, vector: list[float], metadata: dict):
-    if not qdrant_client:
-        raise ConnectionError("Qdrant client is not connected.")
-
+def build_chunk_points(parent_id: str, metadata: dict, chunks: list[dict], chunk_vectors: list[list[float]]):
+    """
+    Builds the child points for a chunked contract. Each chunk carries the
+    parent's filterable metadata (without the full text) so payload filters
+    still apply at chunk level.
+    """
+    if len(chunks) != len(chunk_vectors):
+        raise ValueError(f"Got {len(chunks)} chunks but {len(chunk_vectors)} chunk vectors for point ID {parent_id}")
+
+    shared_metadata = {k: v for k, v in metadata.items() if k not in ('contract_text', 'page_offsets')}
+    page_offsets = metadata.get('page_offsets')
+    points = []
+    for chunk, vector in zip(chunks, chunk_vectors):
+        if not vector or len(vector) != VECTOR_SIZE:
+            raise ValueError(f"Embedding size mismatch for chunk {chunk['index']} of point ID {parent_id}")
+        chunk_payload = dict(shared_metadata)
+        chunk_payload.update({
+            "point_type": CHUNK_POINT_TYPE,
+            "parent_id": parent_id,
+            "chunk_index": chunk["index"],
+            "chunk_text": chunk["text"],
+            "chunk_start": chunk["start"],
+            "chunk_end": chunk["end"],
+        })
+        if page_offsets:
+            chunk_payload["chunk_page"] = page_for_offset(page_offsets, chunk["start"]) + 1
+        points.append(PointStruct(
+            id=str(uuid.uuid5(uuid.UUID(parent_id), f"chunk-{chunk['index']}")),
+            vector=vector,
+            payload=chunk_payload,
+        ))
+    return points
+
+def build_contract_points(
+    collection_name: str,
+    point_id: str,
+    vector: list[float],
+    metadata: dict,
+    chunks: list[dict] = None,
+    chunk_vectors: list[list[float]] = None,
+) -> list[PointStruct]:
+    """
+    Validates a contract and returns its parent point followed by its chunk points.
+    """
     if collection_name not in COLLECTION_NAMES:
         raise ValueError(f"'{collection_name}' is not a valid collection name.")
     
     if not vector or len(vector) != VECTOR_SIZE:
         raise ValueError(f"Embedding size mismatch for point ID {point_id}")
 
-    try:
-        qdrant_client.upsert(
-            collection_name=collection_name,
-            points=[PointStruct(id=point_id, vector=vector, payload=metadata)],
-            wait=True
-        )
-        print(f"✅ Successfully upserted point {point_id} into collection '{collection_name}'.")
-    except Exception as e:
-        print(f"❌ Failed to upsert point {point_id} into '{collection_name}': {e}")
-        raise
+    points = []
+    if chunks:
+        metadata = dict(metadata, has_chunks=True, chunk_count=len(chunks))
+        points.extend(build_chunk_points(point_id, metadata, chunks, chunk_vectors or []))
+    points.insert(0, PointStruct(id=point_id, vector=vector, payload=metadata))
+    return points
+
+def upsert_points(collection_name: str, points: list[PointStruct], batch_size: int = QDRANT_UPSERT_BATCH_SIZE):
+    """
+    Writes points in requests of at most `batch_size` points, waiting for each.
+    """
+    qdrant_client = get_qdrant()
+
+    for start in range(0, len(points), batch_size):
+        batch = points[start:start + batch_size]
+        try:
+            qdrant_client.upsert(
+                collection_name=collection_name,
+                points=batch,
+                wait=True
+            )
+        except Exception as e:
+            print(f"❌ Failed to upsert {len(batch)} points into '{collection_name}': {e}")
+            raise
+    print(f"✅ Upserted {len(points)} points into collection '{collection_name}'.")
+
+def upsert_contract(
+    collection_name: str,
+    point_id: str,
+    vector: list[float],
+    metadata: dict,
+    chunks: list[dict] = None,
+    chunk_vectors: list[list[float]] = None,
+):
+    points = build_contract_points(collection_name, point_id, vector, metadata, chunks, chunk_vectors)
+    upsert_points(collection_name, points)
+    print(f"✅ Successfully upserted point {point_id} ({len(points) - 1} chunks) into collection '{collection_name}'.")
+
+def find_contract_by_hash(collection_name: str, content_sha256: str):
+    """
+    Returns the parent point (with payload) of a contract ingested from the
+    same file bytes, or None.
+    """
+    qdrant_client = get_qdrant()
+
+    records, _ = qdrant_client.scroll(
+        collection_name=collection_name,
+        scroll_filter=models.Filter(
+            must=[models.FieldCondition(key=CONTENT_HASH_FIELD, match=models.MatchValue(value=content_sha256))],
+            must_not=[EXCLUDE_CHUNKS_CONDITION],
+        ),
+        limit=1,
+        with_payload=True,
+        with_vectors=False
+    )
+    return records[0] if records else None
+
+def delete_contract(collection_name: str, point_id: str):
+    """
+    Deletes a contract's parent point and all of its chunk points.
+    """
+    qdrant_client = get_qdrant()
+
+    qdrant_client.delete(
+        collection_name=collection_name,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(should=[
+                models.HasIdCondition(has_id=[point_id]),
+                models.FieldCondition(key="parent_id", match=models.MatchValue(value=str(point_id))),
+            ])
+        ),
+        wait=True
+    )
+    print(f"🗑️ Deleted point {point_id} and its chunks from '{collection_name}'.")
+
+def aggregate_chunk_hits(results, limit: int, aggregation: str = CHUNK_SCORE_AGGREGATION):
+    """
+    Folds chunk hits into one result per parent contract.
+
+    The parent score is the max (or sum) of its chunk scores, and the payload
+    records which chunk matched best. Hits on legacy, un-chunked parent points
+    pass through unchanged.
+    """
+    grouped = {}
+    for hit in results:
+        payload = hit.payload or {}
+        parent_id = payload.get("parent_id") if payload.get("point_type") == CHUNK_POINT_TYPE else None
+        key = parent_id or hit.id
+
+        group = grouped.get(key)
+        if group is None:
+            group = grouped[key] = {"best": hit, "scores": []}
+        elif hit.score > group["best"].score:
+            group["best"] = hit
+        group["scores"].append(hit.score)
+
+    aggregated = []
+    for key, group in grouped.items():
+        best = group["best"]
+        payload = dict(best.payload or {})
+        if aggregation == "sum":
+            score = sum(group["scores"])
+        else:
+            score = max(group["scores"])
+
+        if payload.get("point_type") == CHUNK_POINT_TYPE:
+            payload["matched_chunk"] = {
+                "index": payload.pop("chunk_index", None),
+                "text": payload.pop("chunk_text", None),
+                "start": payload.pop("chunk_start", None),
+                "end": payload.pop("chunk_end", None),
+                "page": payload.pop("chunk_page", None),
+                "score": best.score,
+            }
+            payload["matched_chunk_count"] = len(group["scores"])
+            for field in ("point_type", "parent_id"):
+                payload.pop(field, None)
+
+        aggregated.append(models.ScoredPoint(
+            id=key,
+            version=best.version,
+            score=score,
+            payload=payload,
+        ))
+
+    aggregated.sort(key=lambda r: r.score, reverse=True)
+    return aggregated[:limit]
 
 def search_contracts(
     collection_name: str,
     query_vector: list[float], 
     query_filter: models.Filter = None, 
     limit: int = 100, 
-    score_threshold: float = 0.30
+    score_threshold: float = 0.30,
+    aggregation: str = CHUNK_SCORE_AGGREGATION
 ):
     if not query_vector or len(query_vector) != VECTOR_SIZE:
         raise ValueError(f"Invalid query vector size: {len(query_vector)} (expected {VECTOR_SIZE})")
 
+    # Search chunks and legacy single-vector contracts, but not the parents
+    # of chunked contracts (their chunks already cover them).
+    search_filter = models.Filter(
+        must=[query_filter] if query_filter else None,
+        must_not=[EXCLUDE_CHUNKED_PARENTS_CONDITION],
+    )
+
     print(f"\n🔎 Searching collection '{collection_name}'...")
     try:
+        qdrant_client = get_qdrant()
         results = qdrant_client.search(
             collection_name=collection_name,
             query_vector=query_vector,
-            query_filter=query_filter,
-            limit=limit,
+            query_filter=search_filter,
+            limit=limit * CHUNK_SEARCH_OVERSAMPLE,
             with_payload=True,
             score_threshold=score_threshold,
         )
         confident_results = [r for r in results if r.score and r.score >= score_threshold]
         if not confident_results:
             print(f"⚠️ No results met the minimum score of {score_threshold}.")
-            return results 
+            return aggregate_chunk_hits(results, limit, aggregation)
+        confident_results = aggregate_chunk_hits(confident_results, limit, aggregation)
         print(f"✅ Found {len(confident_results)} relevant results.")
         return confident_results
     except Exception as e:
@@ -213,12 +420,14 @@ def search_contracts(
 def get_contracts_by_collection(collection_name: str, limit: int = 100):
     print(f"\n📄 Fetching up to {limit} contracts from '{collection_name}'...")
     try:
+        qdrant_client = get_qdrant()
         if not qdrant_client.collection_exists(collection_name):
              print(f"⚠️ Collection '{collection_name}' does not exist. Skipping.")
              return []
 
         records, _ = qdrant_client.scroll(
             collection_name=collection_name,
+            scroll_filter=models.Filter(must_not=[EXCLUDE_CHUNKS_CONDITION]),
             limit=limit,
             with_payload=True,
             with_vectors=False
@@ -229,6 +438,29 @@ def get_contracts_by_collection(collection_name: str, limit: int = 100):
         print(f"❌ Failed to scroll collection '{collection_name}': {e}")
         return []
 
+def iter_contract_payloads(collection_name: str, fields: List[str], batch_size: int = 1000):
+    """
+    Yields the given payload fields of every contract (parent points only),
+    scrolling the whole collection page by page.
+    """
+    qdrant_client = get_qdrant()
+    if not qdrant_client.collection_exists(collection_name):
+        return
+    offset = None
+    while True:
+        records, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            scroll_filter=models.Filter(must_not=[EXCLUDE_CHUNKS_CONDITION]),
+            limit=batch_size,
+            offset=offset,
+            with_payload=models.PayloadSelectorInclude(include=fields),
+            with_vectors=False
+        )
+        for record in records:
+            yield record.payload or {}
+        if offset is None:
+            break
+
 def get_all_contracts(limit_per_collection: int = 50):
     print(f"\n📄 Fetching up to {limit_per_collection} contracts from ALL collections...")
     all_records = []
@@ -267,6 +499,22 @@ def setup_qdrant_collections():
                     print(f"   ⚠️ Index for '{date_field}' already exists. Continuing.")
                 else:
                     print(f"   ❌ FAILED to create index for '{date_field}': {e}")
+
+        # Keyword indexes used to separate chunk points from their parents,
+        # and to find an already ingested file by its content hash
+        for chunk_field in ("point_type", "parent_id", CONTENT_HASH_FIELD):
+            try:
+                client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=chunk_field,
+                    field_schema=models.PayloadSchemaType.KEYWORD
+                )
+                print(f"   ✅ Index created for '{chunk_field}' as KEYWORD.")
+            except Exception as e:
+                if "already exists" in str(e):
+                    print(f"   ⚠️ Index for '{chunk_field}' already exists. Continuing.")
+                else:
+                    print(f"   ❌ FAILED to create index for '{chunk_field}': {e}")
     return True
 
 def get_all_points_with_dates(client: QdrantClient, collection_name: str, date_field: str):
@@ -275,7 +523,8 @@ def get_all_points_with_dates(client: QdrantClient, collection_name: str, date_f
         must_not=[
             models.IsNullCondition(
                 is_null=models.PayloadField(key=date_field)
-            )
+            ),
+            EXCLUDE_CHUNKS_CONDITION,
         ]
     )
 
@@ -391,5 +640,3 @@ def get_contract_alerts_and_reminders() -> Dict[str, List[Dict[str, Any]]]:
         "alerts": alerts,
         "reminders": reminders
     }
-
-initialize_qdrant_collections()
@@ -0,0 +1,175 @@
+# backend/resume/services/resource_registry.py
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyResource:
+    """
+    A heavy resource (model, client, connection) that is only built the first
+    time it is requested.
+
+    `fork_safe=False` marks resources that hold sockets or threads: a process
+    that was forked after they were built gets a fresh instance on next use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warmup: Optional[Callable[[Any], Any]] = None,
+        fork_safe: bool = True,
+    ):
+        self.name = name
+        self.factory = factory
+        self.warmup_fn = warmup
+        self.fork_safe = fork_safe
+
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+        self._pid = None
+        self._load_seconds = None
+        self._loaded_at = None
+        self._warmed = False
+        self._error = None
+
+    def _is_current(self) -> bool:
+        return self._loaded and (self.fork_safe or self._pid == os.getpid())
+
+    def get(self):
+        if self._is_current():
+            return self._value
+        with self._lock:
+            if self._is_current():
+                return self._value
+            print(f"⏳ Loading resource '{self.name}'...")
+            started = time.perf_counter()
+            try:
+                self._value = self.factory()
+            except Exception as e:
+                self._error = str(e)
+                print(f"❌ Failed to load resource '{self.name}': {e}")
+                raise
+            self._load_seconds = time.perf_counter() - started
+            self._loaded_at = time.time()
+            self._pid = os.getpid()
+            self._loaded = True
+            self._warmed = False
+            self._error = None
+            print(f"✅ Resource '{self.name}' loaded in {self._load_seconds:.2f}s.")
+            return self._value
+
+    def warmup(self):
+        value = self.get()
+        if self.warmup_fn is not None:
+            self.warmup_fn(value)
+        self._warmed = True
+        return value
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._loaded = False
+            self._warmed = False
+            self._pid = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._is_current()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.is_loaded,
+            "warmed": self._warmed and self.is_loaded,
+            "fork_safe": self.fork_safe,
+            "load_seconds": round(self._load_seconds, 3) if self._load_seconds is not None else None,
+            "loaded_at": self._loaded_at,
+            "error": self._error,
+        }
+
+
+_resources: Dict[str, LazyResource] = {}
+_registry_lock = threading.Lock()
+
+
+def register(
+    name: str,
+    factory: Callable[[], Any],
+    warmup: Optional[Callable[[Any], Any]] = None,
+    fork_safe: bool = True,
+) -> LazyResource:
+    """
+    Registers a lazily-built resource. Registering the same name twice
+    returns the existing entry (safe under module reloads).
+    """
+    with _registry_lock:
+        if name not in _resources:
+            _resources[name] = LazyResource(name, factory, warmup=warmup, fork_safe=fork_safe)
+        return _resources[name]
+
+
+def get_resource(name: str):
+    return _resources[name].get()
+
+
+def load(names=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds registered resources (or only `names`) without running their
+    warmup hooks. Used to load models in a pre-fork master process, where
+    running inference would start thread pools that do not survive fork.
+    """
+    results = {}
+    for name, resource in list(_resources.items()):
+        if names and name not in names:
+            continue
+        started = time.perf_counter()
+        try:
+            resource.get()
+            results[name] = {"ok": True, "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            results[name] = {"ok": False, "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+    return results
+
+
+def warmup(names=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds and warms up every registered resource (or only `names`).
+    Failures are reported, not raised, so one unavailable backend does not
+    stop the others from loading.
+
+    Resources register themselves when their service module is imported,
+    so import the services (e.g. `resume.views`) before calling this.
+    """
+    results = {}
+    for name, resource in list(_resources.items()):
+        if names and name not in names:
+            continue
+        started = time.perf_counter()
+        try:
+            resource.warmup()
+            results[name] = {"ok": True, "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            results[name] = {"ok": False, "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+    return results
+
+
+def reset_after_fork():
+    """
+    Drops every resource that is not fork-safe so the child process
+    rebuilds it on first use.
+    """
+    for resource in _resources.values():
+        if not resource.fork_safe:
+            resource.reset()
+
+
+def readiness_report() -> Dict[str, Any]:
+    resources = {name: resource.status() for name, resource in _resources.items()}
+    return {
+        "ready": bool(resources) and all(r["loaded"] for r in resources.values()),
+        "pid": os.getpid(),
+        "resources": resources,
+    }
@@ -1,23 +1,31 @@
-import boto3
 import uuid
+from boto3.s3.transfer import TransferConfig
 from django.conf import settings
 from botocore.exceptions import ClientError
 from urllib.parse import urlparse
 import io # Make sure to import io
+from . import aws_clients
+
+# Files above the threshold are sent as a streamed multipart upload, so only
+# `max_concurrency` parts of `multipart_chunksize` bytes are in memory at once.
+S3_MULTIPART_THRESHOLD = getattr(settings, 'S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024)
+S3_MULTIPART_CHUNKSIZE = getattr(settings, 'S3_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024)
+S3_MULTIPART_CONCURRENCY = getattr(settings, 'S3_MULTIPART_CONCURRENCY', 4)
+
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+    max_concurrency=S3_MULTIPART_CONCURRENCY,
+    use_threads=True,
+)
 
 def get_s3_client():
     """
-    Initializes and returns an S3 client.
+    Returns the process-wide S3 client (see aws_clients).
     Consolidates client creation logic.
     """
     try:
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION_NAME
-        )
-        return s3_client
+        return aws_clients.get_s3_client()
     except AttributeError:
         print("❌ ERROR: Make sure AWS keys, region, and bucket name are in your settings.py.")
         raise # Re-raise the exception
@@ -27,13 +35,14 @@ def get_s3_client():
 
 # --- 1. NEW SIGNATURE ---
 # It now accepts bucket_name and file_key from the view
-def upload_contract_to_s3(file_buffer: io.BytesIO, bucket_name: str, file_key: str, content_type: str):
+def upload_contract_to_s3(file_buffer: io.BufferedIOBase, bucket_name: str, file_key: str, content_type: str):
     """
     Uploads a file buffer from a Django request to your S3 bucket.
     The bucket name and object key are provided by the caller.
+    The file is streamed (multipart above S3_MULTIPART_THRESHOLD), never read whole.
 
     Args:
-        file_buffer (io.BytesIO): The in-memory binary file.
+        file_buffer: A readable binary file object (in-memory or on disk).
         bucket_name (str): The S3 bucket to upload to (from settings).
         file_key (str): The full S3 object key (e.g., "contracts/uuid.pdf").
         content_type (str): The MIME type (e.g., "application/pdf").
@@ -41,15 +50,10 @@ def upload_contract_to_s3(file_buffer: io.BytesIO, bucket_name: str, file_key: s
     Returns:
         str: The S3 URI (s3://...) of the uploaded file, or None if fails.
     """
-    # 1. Initialize S3 client (this part was perfect)
+    # 1. Get the shared S3 client
     try:
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION_NAME
-        )
-    except AttributeError:
+        s3_client = get_s3_client()
+    except Exception:
         print("❌ ERROR: Make sure AWS keys, region, and bucket name are in your settings.py.")
         return None
 
@@ -71,7 +75,8 @@ def upload_contract_to_s3(file_buffer: io.BytesIO, bucket_name: str, file_key: s
             Key=file_key,       # <-- Uses the parameter
             ExtraArgs={
                 'ContentType': content_type,
-            }
+            },
+            Config=S3_TRANSFER_CONFIG
         )
 
         # --- 5. CRITICAL CHANGE: Return S3 URI ---
@@ -89,11 +94,20 @@ def upload_contract_to_s3(file_buffer: io.BytesIO, bucket_name: str, file_key: s
         print(f"❌ An unexpected error occurred during upload: {e}")
         return None
 
-def get_s3_bytes_from_url(s3_url: str) -> bytes:
+def _parse_s3_url(s3_url: str):
+    parsed_url = urlparse(s3_url)
+    bucket_name = parsed_url.netloc
+    object_key = parsed_url.path.lstrip('/')
+    if not bucket_name or not object_key:
+        raise ValueError(f"Invalid S3 URL format: {s3_url}")
+    return bucket_name, object_key
+
+def get_s3_object_from_url(s3_url: str):
     """
-    Downloads the raw binary content (bytes) from a given S3 URL.
-    
-    Expects an s3_url like "s3://bucket-name/path/to/key.pdf"
+    Downloads an object from a given S3 URL.
+
+    Returns:
+        tuple: (raw bytes, ETag)
     """
     try:
         s3_client = get_s3_client()
@@ -102,13 +116,7 @@ def get_s3_bytes_from_url(s3_url: str) -> bytes:
         raise e
 
     try:
-        # Parse the S3 URL
-        parsed_url = urlparse(s3_url)
-        bucket_name = parsed_url.netloc
-        object_key = parsed_url.path.lstrip('/')
-        
-        if not bucket_name or not object_key:
-            raise ValueError(f"Invalid S3 URL format: {s3_url}")
+        bucket_name, object_key = _parse_s3_url(s3_url)
 
         print(f"Fetching s3://{bucket_name}/{object_key}")
         
@@ -117,7 +125,7 @@ def get_s3_bytes_from_url(s3_url: str) -> bytes:
         
         # Read and return the raw bytes
         content = response['Body'].read()
-        return content
+        return content, response.get('ETag', '').strip('"')
     
     except ClientError as e:
         print(f"FATAL: Failed to get content from {s3_url}. Error: {e}")
@@ -126,6 +134,32 @@ def get_s3_bytes_from_url(s3_url: str) -> bytes:
         print(f"FATAL: An unexpected error occurred fetching S3 content: {e}")
         raise e
 
+def get_s3_bytes_from_url(s3_url: str) -> bytes:
+    """
+    Downloads the raw binary content (bytes) from a given S3 URL.
+    
+    Expects an s3_url like "s3://bucket-name/path/to/key.pdf"
+    """
+    content, _ = get_s3_object_from_url(s3_url)
+    return content
+
+def get_s3_etag(s3_url: str) -> str:
+    """
+    Returns the ETag of an S3 object with a HEAD request (no download).
+    """
+    s3_client = get_s3_client()
+    bucket_name, object_key = _parse_s3_url(s3_url)
+    response = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+    return response.get('ETag', '').strip('"')
+
+def delete_s3_object(s3_url: str):
+    """
+    Deletes the object at an s3:// URL (e.g. the file of a replaced contract).
+    """
+    bucket_name, object_key = _parse_s3_url(s3_url)
+    get_s3_client().delete_object(Bucket=bucket_name, Key=object_key)
+    print(f"🗑️ Deleted {s3_url}")
+
 # --- ✅ ADDED THIS NEW FUNCTION ---
 def generate_presigned_viewable_url(s3_url: str, expiration: int = 3600) -> str:
     """
@@ -0,0 +1,181 @@
+# backend/resume/services/search_plan_cache.py
+
+import copy
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+
+SEARCH_PLAN_CACHE_MAX_ENTRIES = getattr(settings, 'SEARCH_PLAN_CACHE_MAX_ENTRIES', 2048)
+SEARCH_PLAN_CACHE_TIMEOUT = getattr(settings, 'SEARCH_PLAN_CACHE_TIMEOUT', 60 * 60 * 24)  # 1 day
+SEARCH_PLAN_CACHE_ALIAS = getattr(settings, 'SEARCH_PLAN_CACHE_ALIAS', 'default')
+# Bump when the router prompt or model changes, so old plans are not reused.
+SEARCH_PLAN_CACHE_VERSION = getattr(settings, 'SEARCH_PLAN_CACHE_VERSION', 1)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case, unicode form, whitespace and trailing punctuation do not change
+    the plan, so "Termination clauses?" and "termination  clauses" share an entry.
+    """
+    query = unicodedata.normalize("NFKC", query or "").casefold()
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.rstrip("?!. ")
+
+
+class SearchPlanCache:
+    """
+    Caches router plans ({semantic_query, filters}) by normalized query + category.
+
+    Two tiers, like the embedding cache:
+      1. an in-process LRU of at most `max_entries` plans (expires with `timeout`)
+      2. the shared Django cache (Redis in production), so every worker
+         benefits from a plan computed by any of them
+
+    Each entry remembers how long the Bedrock call that produced it took, so
+    hits can report the latency they saved.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SEARCH_PLAN_CACHE_MAX_ENTRIES,
+        timeout: int = SEARCH_PLAN_CACHE_TIMEOUT,
+        shared_alias: str = SEARCH_PLAN_CACHE_ALIAS,
+        version: int = SEARCH_PLAN_CACHE_VERSION,
+    ):
+        self.max_entries = int(max_entries)
+        self.timeout = timeout
+        self.shared_alias = shared_alias
+        self.version = version
+
+        self._lru: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # --- Counters ---
+        self._lru_hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._uncached_fallbacks = 0
+        self._evictions = 0
+        self._shared_errors = 0
+        self._computed_seconds = 0.0
+        self._saved_seconds = 0.0
+
+    def make_key(self, query: str, category: Optional[str]) -> str:
+        raw = f"{self.version}\x00{category or ''}\x00{normalize_query(query)}"
+        return f"plan:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    # ------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------
+    def _lru_get(self, key: str) -> Optional[Dict]:
+        item = self._lru.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.monotonic():
+            del self._lru[key]
+            return None
+        self._lru.move_to_end(key)
+        return entry
+
+    def _lru_put(self, key: str, entry: Dict):
+        self._lru.pop(key, None)
+        self._lru[key] = (time.monotonic() + self.timeout, entry)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self._evictions += 1
+
+    def _shared_get(self, key: str) -> Optional[Dict]:
+        try:
+            return caches[self.shared_alias].get(key)
+        except Exception as e:
+            with self._lock:
+                self._shared_errors += 1
+            print(f"⚠️ Shared search-plan cache read failed: {e}")
+            return None
+
+    def _shared_set(self, key: str, entry: Dict):
+        try:
+            caches[self.shared_alias].set(key, entry, timeout=self.timeout)
+        except Exception as e:
+            with self._lock:
+                self._shared_errors += 1
+            print(f"⚠️ Shared search-plan cache write failed: {e}")
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    def get_or_compute(
+        self,
+        query: str,
+        category: Optional[str],
+        compute_fn: Callable[[], Tuple[Dict, bool]],
+    ) -> Dict:
+        """
+        Returns the cached plan, or calls `compute_fn` -> (plan, cacheable).
+        Fallback plans (the router failed) come back with cacheable=False and
+        are not stored, so the next call retries Bedrock.
+        """
+        key = self.make_key(query, category)
+
+        with self._lock:
+            entry = self._lru_get(key)
+            if entry is not None:
+                self._lru_hits += 1
+                self._saved_seconds += entry["seconds"]
+        if entry is None:
+            entry = self._shared_get(key)
+            if entry is not None:
+                with self._lock:
+                    self._shared_hits += 1
+                    self._saved_seconds += entry["seconds"]
+                    self._lru_put(key, entry)
+        if entry is not None:
+            print(f"✅ Search plan cache HIT for '{query}'")
+            return copy.deepcopy(entry["plan"])
+
+        started = time.perf_counter()
+        plan, cacheable = compute_fn()
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self._misses += 1
+            self._computed_seconds += seconds
+            if not cacheable:
+                self._uncached_fallbacks += 1
+        if cacheable:
+            entry = {"plan": copy.deepcopy(plan), "seconds": round(seconds, 4)}
+            with self._lock:
+                self._lru_put(key, entry)
+                self._stores += 1
+            self._shared_set(key, entry)
+        return plan
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            hits = self._lru_hits + self._shared_hits
+            lookups = hits + self._misses
+            return {
+                "lru_entries": len(self._lru),
+                "lru_max_entries": self.max_entries,
+                "timeout": self.timeout,
+                "lru_hits": self._lru_hits,
+                "shared_hits": self._shared_hits,
+                "shared_errors": self._shared_errors,
+                "misses": self._misses,
+                "stores": self._stores,
+                "uncached_fallbacks": self._uncached_fallbacks,
+                "evictions": self._evictions,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "avg_bedrock_seconds": round(self._computed_seconds / self._misses, 4) if self._misses else None,
+                "saved_bedrock_seconds": round(self._saved_seconds, 3),
+            }
+
+
+search_plan_cache = SearchPlanCache()
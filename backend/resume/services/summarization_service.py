@@ -0,0 +1,192 @@
+# backend/resume/services/summarization_service.py
+
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from .bedrock_service import BedrockService
+from .fanout import map_concurrently
+from .text_store import get_contract_text
+
+# Characters of contract text per "map" call (~3k tokens, well inside Llama 3's 8k context).
+SUMMARY_CHUNK_CHARS = getattr(settings, 'SUMMARY_CHUNK_CHARS', 12000)
+# Bedrock summarization calls in flight at once, per process.
+SUMMARY_MAX_CONCURRENCY = getattr(settings, 'SUMMARY_MAX_CONCURRENCY', 4)
+SUMMARY_DOCUMENT_TIMEOUT = getattr(settings, 'SUMMARY_DOCUMENT_TIMEOUT', 180)
+SUMMARY_CACHE_TIMEOUT = getattr(settings, 'SUMMARY_CACHE_TIMEOUT', 60 * 60 * 24 * 30)  # 30 days
+# Bump when the prompts or the model change, so old summaries are not reused.
+SUMMARY_CACHE_VERSION = getattr(settings, 'SUMMARY_CACHE_VERSION', 1)
+
+MAP_QUERY = (
+    "Summarize this part of a contract. List the parties, obligations, key dates, amounts,"
+    " termination and renewal terms, and any unusual clauses. Use short bullet points."
+)
+DOCUMENT_REDUCE_QUERY = (
+    "These are summaries of consecutive parts of one contract. Merge them into a single summary"
+    " of the whole contract, keeping every party, date, amount and key obligation."
+)
+FINAL_REDUCE_QUERY = "Please provide a comprehensive summary of all these documents."
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SUMMARY_MAX_CONCURRENCY, thread_name_prefix="summarize")
+        return _executor
+
+
+def _cache_key(kind: str, digest: str) -> str:
+    return f"summary:v{SUMMARY_CACHE_VERSION}:{kind}:{digest}"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_for_summary(text: str, max_chars: int = SUMMARY_CHUNK_CHARS) -> List[str]:
+    """
+    Packs paragraphs into pieces of at most `max_chars`; a paragraph longer
+    than that is cut at the last whitespace before the limit.
+    """
+    pieces, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            cut = cut if cut > max_chars // 2 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(paragraph[:cut])
+            paragraph = paragraph[cut:].strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            pieces.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+class MapReduceSummarizer:
+    """
+    Summarizes many contracts without packing them into one prompt:
+
+      map     each document is split into SUMMARY_CHUNK_CHARS pieces, summarized
+              in parallel (at most SUMMARY_MAX_CONCURRENCY Bedrock calls)
+      reduce  piece summaries -> one summary per document (cached in the Django
+              cache by the document's content hash), then document summaries
+              -> the final summary
+
+    A document summarized once is never re-read by the model, so cost and
+    latency grow with the number of *new* documents, not total text size.
+    """
+
+    def __init__(self, bedrock_service: Optional[BedrockService] = None,
+                 chunk_chars: int = SUMMARY_CHUNK_CHARS):
+        self.bedrock_service = bedrock_service or BedrockService()
+        self.chunk_chars = chunk_chars
+
+    def _summarize(self, text: str, query: str) -> str:
+        return self.bedrock_service.get_answer_from_context(context=text, query=query, call_site="summarize").strip()
+
+    def _reduce(self, summaries: List[str], query: str) -> str:
+        """
+        Merges summaries in one call, or level by level while they do not fit in one.
+        """
+        while True:
+            combined = "\n\n=== PART SEPARATOR ===\n\n".join(summaries)
+            if len(combined) <= self.chunk_chars or len(summaries) == 1:
+                return self._summarize(combined, query)
+            groups = split_for_summary("\n\n".join(summaries), self.chunk_chars)
+            summaries = list(_get_executor().map(lambda group: self._summarize(group, query), groups))
+
+    def summarize_document(self, text: str) -> Tuple[str, bool]:
+        """
+        Returns (summary, cached) for one document's text.
+        """
+        key = _cache_key("doc", content_hash(text))
+        summary = cache.get(key)
+        if summary is not None:
+            return summary, True
+
+        pieces = split_for_summary(text, self.chunk_chars)
+        partials = list(_get_executor().map(lambda piece: self._summarize(piece, MAP_QUERY), pieces))
+        summary = partials[0] if len(partials) == 1 else self._reduce(partials, DOCUMENT_REDUCE_QUERY)
+        cache.set(key, summary, timeout=SUMMARY_CACHE_TIMEOUT)
+        return summary, False
+
+    def summarize_s3_documents(self, s3_urls: List[str]) -> Dict:
+        """
+        Fetches and summarizes every document concurrently, then reduces them
+        into one summary. Documents that cannot be read are skipped; raises
+        ValueError when none could be, or the summarization error when every
+        readable document failed.
+        """
+        started = time.perf_counter()
+
+        def _one(s3_url: str):
+            print(f"   -> Processing: {s3_url}")
+            try:
+                full_text = get_contract_text(s3_url)
+            except Exception as e:
+                raise ValueError(f"Could not read document: {e}")
+            if not full_text:
+                raise ValueError("No text extracted")
+            return content_hash(full_text), self.summarize_document(full_text)
+
+        outcomes = map_concurrently(_one, s3_urls, max_concurrency=SUMMARY_MAX_CONCURRENCY,
+                                    timeout=SUMMARY_DOCUMENT_TIMEOUT)
+
+        doc_names, doc_hashes, doc_summaries = [], [], []
+        cached_documents = 0
+        summary_errors = []
+        for s3_url, (ok, outcome) in zip(s3_urls, outcomes):
+            if not ok:
+                print(f"   ❌ Error processing {s3_url}: {outcome}")
+                if not isinstance(outcome, ValueError):
+                    summary_errors.append(outcome)
+                continue
+            digest, (summary, cached) = outcome
+            doc_name = s3_url.split('/')[-1].replace('.pdf', '')
+            doc_names.append(doc_name)
+            doc_hashes.append(digest)
+            doc_summaries.append(summary)
+            cached_documents += int(cached)
+            print(f"   ✅ {'Cached' if cached else 'New'} summary for: {doc_name}")
+
+        if not doc_summaries:
+            if summary_errors:
+                raise summary_errors[0]
+            raise ValueError("Could not extract content from any documents")
+
+        # The final summary names each document, so names are part of the key.
+        final_key = _cache_key("set", content_hash("\x00".join(f"{n}:{h}" for n, h in zip(doc_names, doc_hashes))))
+        summary = cache.get(final_key)
+        if summary is None:
+            combined = "\n\n=== DOCUMENT SEPARATOR ===\n\n".join(
+                f"Document {i + 1}: {name}\n\n{doc_summary}"
+                for i, (name, doc_summary) in enumerate(zip(doc_names, doc_summaries))
+            )
+            summary = self._summarize(combined, FINAL_REDUCE_QUERY) if len(combined) <= self.chunk_chars \
+                else self._reduce(doc_summaries, FINAL_REDUCE_QUERY)
+            cache.set(final_key, summary, timeout=SUMMARY_CACHE_TIMEOUT)
+
+        return {
+            "summary": summary,
+            "documents_processed": len(doc_summaries),
+            "document_names": doc_names,
+            "cached_documents": cached_documents,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
@@ -0,0 +1,146 @@
+# backend/resume/services/task_graph.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from django.conf import settings
+
+# Shared by every graph run; stages are I/O-bound (S3, Bedrock, Qdrant) or
+# release the GIL (PyMuPDF, torch), so threads overlap them well.
+_executor = None
+_executor_lock = threading.Lock()
+TASK_GRAPH_WORKERS = getattr(settings, 'TASK_GRAPH_WORKERS', 16)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TASK_GRAPH_WORKERS, thread_name_prefix="task-graph")
+        return _executor
+
+
+class TaskFailed(Exception):
+    """
+    A task in the graph raised. `task` is its name, `cause` the original error.
+    """
+
+    def __init__(self, task: str, cause: Exception):
+        self.task = task
+        self.cause = cause
+        super().__init__(f"{task}: {cause}")
+
+
+class TaskGraph:
+    """
+    A tiny dependency-graph runner. Each task is a function that receives the
+    results of its dependencies as keyword arguments; it starts as soon as all
+    of them have finished, so independent tasks run concurrently.
+
+        graph = TaskGraph()
+        graph.add("a", lambda: 1)
+        graph.add("b", lambda: 2)
+        graph.add("c", lambda a, b: a + b, deps=["a", "b"])
+        results = graph.run()   # {"a": 1, "b": 2, "c": 3}
+
+    After `run()`, `timings()` has each task's start offset and duration and
+    `critical_path()` the chain of tasks that determined the total time.
+    """
+
+    def __init__(self, on_start: Optional[Callable[[str], None]] = None,
+                 on_finish: Optional[Callable[[str, Dict], None]] = None):
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self._started_at = None
+        self._timings: Dict[str, Dict[str, Any]] = {}
+        self._abandoned = []
+        self.total_seconds = None
+
+    def add(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = ()):
+        for dep in deps:
+            if dep not in self._tasks:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'.")
+        self._tasks[name] = {"fn": fn, "deps": list(deps)}
+        return self
+
+    def _call(self, name: str, kwargs: Dict[str, Any]):
+        started = time.perf_counter()
+        self._timings[name] = {"start": round(started - self._started_at, 3), "status": "running"}
+        if self.on_start is not None:
+            self.on_start(name)
+        try:
+            return self._tasks[name]["fn"](**kwargs)
+        finally:
+            finished = time.perf_counter()
+            self._timings[name].update(
+                end=round(finished - self._started_at, 3),
+                seconds=round(finished - started, 3),
+            )
+
+    def run(self) -> Dict[str, Any]:
+        executor = _get_executor()
+        self._started_at = time.perf_counter()
+        results: Dict[str, Any] = {}
+        pending = dict(self._tasks)
+        running = {}
+        try:
+            while pending or running:
+                for name in [n for n, t in pending.items() if all(d in results for d in t["deps"])]:
+                    task = pending.pop(name)
+                    kwargs = {dep: results[dep] for dep in task["deps"]}
+                    running[executor.submit(self._call, name, kwargs)] = name
+                if not running:
+                    raise ValueError(f"Task graph has a cycle: {sorted(pending)}")
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        self._timings[name]["status"] = "failed"
+                        self._timings[name]["error"] = str(e)
+                        if self.on_finish is not None:
+                            self.on_finish(name, dict(self._timings[name]))
+                        raise TaskFailed(name, e) from e
+                    self._timings[name]["status"] = "done"
+                    if self.on_finish is not None:
+                        self.on_finish(name, dict(self._timings[name]))
+        except TaskFailed:
+            # Nothing downstream can run; let in-flight siblings finish on their own.
+            for future in running:
+                future.cancel()
+            self._abandoned = list(running)
+            raise
+        finally:
+            self.total_seconds = round(time.perf_counter() - self._started_at, 3)
+        return results
+
+    def wait_for_abandoned(self, timeout: Optional[float] = None):
+        """
+        After a failed `run()`, waits for the sibling tasks that were still
+        running, e.g. before cleaning up what they may have written.
+        """
+        if self._abandoned:
+            wait(self._abandoned, timeout=timeout)
+
+    def timings(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(timing) for name, timing in self._timings.items()}
+
+    def critical_path(self) -> List[str]:
+        """
+        Walks back from the task that finished last, each time following the
+        dependency that finished last (the one the task was waiting on).
+        """
+        finished = {n: t for n, t in self._timings.items() if "end" in t}
+        if not finished:
+            return []
+        path = [max(finished, key=lambda n: finished[n]["end"])]
+        while True:
+            deps = [d for d in self._tasks[path[-1]]["deps"] if d in finished]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda d: finished[d]["end"]))
+        return list(reversed(path))
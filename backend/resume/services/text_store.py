@@ -0,0 +1,158 @@
+# backend/resume/services/text_store.py
+
+import hashlib
+import os
+import threading
+import zlib
+from typing import Dict, Optional
+from django.conf import settings
+from .s3_service import get_s3_etag, get_s3_object_from_url
+from .extract_data import ContractExtractor
+
+TEXT_STORE_DIR = getattr(settings, 'TEXT_STORE_DIR', os.path.join('data', 'text_store'))
+TEXT_STORE_MAX_BYTES = getattr(settings, 'TEXT_STORE_MAX_BYTES', 512 * 1024 * 1024)
+
+_STORE_SUFFIX = ".txt.z"
+
+
+class TextStore:
+    """
+    Extracted contract text on local disk, keyed by S3 URI + ETag.
+
+    Entries are zlib-compressed files. When the directory grows past
+    `max_bytes`, the least recently read entries are deleted (reads bump
+    the file's mtime). Several worker processes can share one directory.
+    """
+
+    def __init__(self, directory: str = TEXT_STORE_DIR, max_bytes: int = TEXT_STORE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._bytes = None  # Lazily measured from disk
+
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+
+    def _path(self, s3_uri: str, etag: str) -> str:
+        digest = hashlib.sha256(f"{s3_uri}\x00{etag}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}{_STORE_SUFFIX}")
+
+    def _entries(self):
+        try:
+            with os.scandir(self.directory) as it:
+                return [e for e in it if e.is_file() and e.name.endswith(_STORE_SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    def get(self, s3_uri: str, etag: str) -> Optional[str]:
+        path = self._path(s3_uri, etag)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # LRU: mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return None
+        except OSError as e:
+            print(f"⚠️ Text store read failed for {s3_uri}: {e}")
+            return None
+
+        with self._lock:
+            self._hits += 1
+        return zlib.decompress(data).decode("utf-8")
+
+    def put(self, s3_uri: str, etag: str, text: str):
+        if not text or not etag:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(s3_uri, etag)
+        data = zlib.compress(text.encode("utf-8"), 6)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes += 1
+            if self._bytes is None:
+                self._bytes = sum(e.stat().st_size for e in self._entries())
+            else:
+                self._bytes += len(data)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Re-measure from disk: other workers write to the same directory.
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        target = int(self.max_bytes * 0.9)
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+                self._evictions += 1
+            except FileNotFoundError:
+                continue
+        self._bytes = total
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "directory": self.directory,
+                "max_bytes": self.max_bytes,
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "writes": self._writes,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+text_store = TextStore()
+
+
+def store_contract_text(s3_url: str, contract_text: str, etag: str = None):
+    """
+    Saves text that was already extracted at ingest, so QnA never has to
+    download and parse the PDF again.
+    """
+    try:
+        text_store.put(s3_url, etag or get_s3_etag(s3_url), contract_text)
+    except Exception as e:
+        print(f"⚠️ Failed to save extracted text for {s3_url}: {e}")
+
+
+def get_contract_text(s3_url: str) -> str:
+    """
+    Returns the extracted text of a contract in S3: from the local text store
+    if present, otherwise by downloading and parsing it (and storing the result).
+    """
+    try:
+        etag = get_s3_etag(s3_url)
+        text = text_store.get(s3_url, etag)
+        if text is not None:
+            print(f"✅ Text store HIT for {s3_url}")
+            return text
+    except Exception as e:
+        print(f"⚠️ Text store lookup failed for {s3_url}: {e}")
+
+    raw_pdf_bytes, etag = get_s3_object_from_url(s3_url)
+    full_text = ContractExtractor.extract_text_from_pdf_bytes(raw_pdf_bytes)
+    if full_text and not full_text.startswith("Error: Could not parse PDF content."):
+        try:
+            text_store.put(s3_url, etag, full_text)
+        except Exception as e:
+            print(f"⚠️ Failed to save extracted text for {s3_url}: {e}")
+    return full_text
+
+
+def get_text_store_stats() -> Dict:
+    return text_store.get_stats()
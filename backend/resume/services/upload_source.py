@@ -0,0 +1,86 @@
+# backend/resume/services/upload_source.py
+
+import hashlib
+import io
+import os
+import shutil
+from typing import Optional, Union
+from django.conf import settings
+
+# Uploads (and zip members) larger than this are kept on disk, not in memory.
+# Django uses the same limit to decide when an upload spills to a temp file.
+UPLOAD_SPOOL_MAX_MEMORY = getattr(settings, 'FILE_UPLOAD_MAX_MEMORY_SIZE', 2621440)
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadSource:
+    """
+    One uploaded contract, held once: either small in-memory bytes or a file
+    on disk. Every pipeline stage reads from it instead of its own copy:
+
+    - `open()` gives a fresh read-only file object (streamed to S3),
+    - `pdf` is what the PDF parser opens (the path itself for files on disk,
+      so MuPDF reads the file directly),
+    - `sha256()` hashes it in fixed-size chunks.
+    """
+
+    def __init__(self, data: Optional[bytes] = None, path: Optional[str] = None):
+        if (data is None) == (path is None):
+            raise ValueError("UploadSource needs exactly one of `data` or `path`.")
+        self._data = data
+        self.path = path
+        self._sha256 = None
+
+    @classmethod
+    def from_uploaded_file(cls, uploaded_file) -> "UploadSource":
+        """
+        Wraps a Django upload without copying it: large uploads are already
+        spooled to a temp file by Django's TemporaryFileUploadHandler.
+        """
+        if hasattr(uploaded_file, "temporary_file_path"):
+            return cls(path=uploaded_file.temporary_file_path())
+        uploaded_file.seek(0)
+        return cls(data=uploaded_file.read())
+
+    @classmethod
+    def from_path(cls, path: str) -> "UploadSource":
+        return cls(path=path)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "UploadSource":
+        return cls(data=data)
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path) if self.path else len(self._data)
+
+    @property
+    def pdf(self) -> Union[bytes, str]:
+        return self.path or self._data
+
+    def open(self):
+        if self.path:
+            return open(self.path, "rb")
+        # BytesIO over existing bytes shares the buffer until it is written to.
+        return io.BytesIO(self._data)
+
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            if self.path:
+                with open(self.path, "rb") as f:
+                    for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+            else:
+                digest.update(self._data)
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+    def save_to(self, path: str):
+        """
+        Writes the upload to `path` (atomically), streaming from disk if needed.
+        """
+        tmp_path = f"{path}.tmp"
+        with self.open() as src, open(tmp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, _HASH_CHUNK_SIZE)
+        os.replace(tmp_path, path)
@@ -1 +1,1109 @@
-from django.test import TestCase
\ No newline at end of file
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from qdrant_client import models
+
+
+class _WhitespaceTokenizer:
+    """
+    Stands in for the MiniLM tokenizer: one token per whitespace-separated word.
+    """
+
+    def __call__(self, text, **kwargs):
+        return {"offset_mapping": [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]}
+
+
+def _words(n, prefix="w"):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+# --- Chunking and chunk-hit aggregation ---
+
+@mock.patch("resume.services.chunking_service.get_tokenizer", lambda: _WhitespaceTokenizer())
+class SplitIntoChunksTests(SimpleTestCase):
+    def test_empty_text_has_no_chunks(self):
+        from resume.services.chunking_service import split_into_chunks
+        self.assertEqual(split_into_chunks(""), [])
+        self.assertEqual(split_into_chunks("   \n"), [])
+
+    def test_short_text_is_one_chunk(self):
+        from resume.services.chunking_service import split_into_chunks
+        chunks = split_into_chunks("alpha beta gamma", max_tokens=10, overlap_tokens=2)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0]["text"], "alpha beta gamma")
+        self.assertEqual(chunks[0]["token_count"], 3)
+
+    def test_windows_overlap_and_slice_the_original_text(self):
+        from resume.services.chunking_service import split_into_chunks
+        text = _words(25)
+        chunks = split_into_chunks(text, max_tokens=10, overlap_tokens=3)
+
+        self.assertEqual([c["index"] for c in chunks], [0, 1, 2, 3])
+        for chunk in chunks:
+            self.assertEqual(text[chunk["start"]:chunk["end"]], chunk["text"])
+            self.assertLessEqual(chunk["token_count"], 10)
+        # Each window starts 7 tokens after the previous one.
+        self.assertTrue(chunks[1]["text"].startswith("w7 "))
+        self.assertTrue(chunks[2]["text"].startswith("w14 "))
+        self.assertTrue(chunks[-1]["text"].endswith("w24"))
+
+    def test_overlap_is_capped_below_window(self):
+        from resume.services.chunking_service import split_into_chunks
+        chunks = split_into_chunks(_words(5), max_tokens=2, overlap_tokens=10)
+        self.assertEqual(len(chunks), 4)
+
+
+def _hit(point_id, score, **payload):
+    return models.ScoredPoint(id=point_id, version=1, score=score, payload=payload)
+
+
+class AggregateChunkHitsTests(SimpleTestCase):
+    def _chunk(self, point_id, parent_id, index, score):
+        return _hit(point_id, score, point_type="chunk", parent_id=parent_id, chunk_index=index,
+                    chunk_text=f"chunk {index}", chunk_start=index * 10, chunk_end=index * 10 + 9,
+                    chunk_page=1, file_name=f"{parent_id}.pdf")
+
+    def test_chunks_fold_into_their_parent_with_best_chunk(self):
+        from resume.services.qdrant_service import aggregate_chunk_hits
+        results = aggregate_chunk_hits([
+            self._chunk("c1", "p1", 0, 0.5),
+            self._chunk("c2", "p1", 3, 0.9),
+            self._chunk("c3", "p2", 1, 0.7),
+        ], limit=10)
+
+        self.assertEqual([r.id for r in results], ["p1", "p2"])
+        top = results[0]
+        self.assertEqual(top.score, 0.9)
+        self.assertEqual(top.payload["matched_chunk"]["index"], 3)
+        self.assertEqual(top.payload["matched_chunk_count"], 2)
+        self.assertNotIn("parent_id", top.payload)
+        self.assertNotIn("chunk_text", top.payload)
+
+    def test_sum_aggregation_and_limit(self):
+        from resume.services.qdrant_service import aggregate_chunk_hits
+        results = aggregate_chunk_hits([
+            self._chunk("c1", "p1", 0, 0.4),
+            self._chunk("c2", "p1", 1, 0.4),
+            self._chunk("c3", "p2", 0, 0.7),
+        ], limit=1, aggregation="sum")
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].id, "p1")
+        self.assertAlmostEqual(results[0].score, 0.8)
+
+    def test_legacy_parent_points_pass_through(self):
+        from resume.services.qdrant_service import aggregate_chunk_hits
+        results = aggregate_chunk_hits([_hit("legacy", 0.6, file_name="old.pdf")], limit=5)
+        self.assertEqual(results[0].id, "legacy")
+        self.assertEqual(results[0].payload, {"file_name": "old.pdf"})
+
+
+# --- Embedding cache ---
+
+class EmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.calls = []
+
+    def _compute(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 0.5] for t in texts]
+
+    def test_only_distinct_misses_are_computed(self):
+        from resume.services.embedding_cache import EmbeddingCache
+        embedding_cache = EmbeddingCache("test-model")
+
+        vectors = embedding_cache.get_or_compute(["a b", "a  b", "ccc", "ccc"], self._compute)
+        self.assertEqual(self.calls, [["a b", "ccc"]])
+        self.assertEqual(vectors, [[3.0, 0.5], [3.0, 0.5], [3.0, 0.5], [3.0, 0.5]])
+
+        embedding_cache.get_or_compute(["ccc", "dd"], self._compute)
+        self.assertEqual(self.calls[-1], ["dd"])
+        stats = embedding_cache.get_stats()
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["lru_hits"], 1)
+
+    def test_keys_depend_on_model(self):
+        from resume.services.embedding_cache import EmbeddingCache
+        self.assertNotEqual(EmbeddingCache("a").make_key("text"), EmbeddingCache("b").make_key("text"))
+        self.assertEqual(EmbeddingCache("a").make_key("text "), EmbeddingCache("a").make_key(" text"))
+
+    def test_lru_evicts_oldest_within_byte_budget(self):
+        from resume.services.embedding_cache import EmbeddingCache, _ENTRY_OVERHEAD_BYTES
+        embedding_cache = EmbeddingCache("test-model", max_bytes=2 * (8 + _ENTRY_OVERHEAD_BYTES))
+
+        embedding_cache.get_or_compute(["one", "two", "three"], self._compute)
+        stats = embedding_cache.get_stats()
+        self.assertEqual(stats["lru_entries"], 2)
+        self.assertEqual(stats["evictions"], 1)
+
+        embedding_cache.get_or_compute(["one"], self._compute)
+        self.assertEqual(self.calls[-1], ["one"])
+
+    def test_shared_tier_serves_other_instances(self):
+        from resume.services.embedding_cache import EmbeddingCache
+        EmbeddingCache("test-model", shared=True).get_or_compute(["shared text"], self._compute)
+        other = EmbeddingCache("test-model", shared=True)
+
+        self.assertEqual(other.get_or_compute(["shared text"], self._compute), [[11.0, 0.5]])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(other.get_stats()["shared_hits"], 1)
+
+
+# --- Background ingestion job queue ---
+
+class JobQueueTests(SimpleTestCase):
+    def setUp(self):
+        from resume.services.job_queue import JobQueue
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.queue = JobQueue(path=os.path.join(self.tmp_dir, "jobs.sqlite3"))
+
+    def test_claims_oldest_job_of_requested_kind(self):
+        from resume.services.job_queue import JOB_RUNNING
+        first = self.queue.enqueue("upload", {"n": 1})
+        self.queue.enqueue("bulk_upload", {"n": 2})
+        self.queue.enqueue("upload", {"n": 3})
+
+        job = self.queue.claim("worker-a", kinds=["upload"])
+        self.assertEqual(job["id"], first)
+        self.assertEqual(job["status"], JOB_RUNNING)
+        self.assertEqual(job["payload"], {"n": 1})
+        self.assertEqual(job["attempts"], 1)
+        self.assertEqual(self.queue.claim("worker-a", kinds=["upload"])["payload"], {"n": 3})
+        self.assertIsNone(self.queue.claim("worker-a", kinds=["upload"]))
+
+    def test_each_job_is_claimed_once_across_threads(self):
+        for n in range(20):
+            self.queue.enqueue("upload", {"n": n})
+        claimed, lock = [], threading.Lock()
+
+        def _drain():
+            while True:
+                job = self.queue.claim(threading.current_thread().name)
+                if job is None:
+                    return
+                with lock:
+                    claimed.append(job["id"])
+
+        threads = [threading.Thread(target=_drain) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(claimed), 20)
+        self.assertEqual(len(set(claimed)), 20)
+
+    def test_stages_result_and_counts(self):
+        job_id = self.queue.enqueue("upload", {})
+        self.queue.claim("worker-a")
+        self.queue.update_stage(job_id, "extract_text", {"state": "done", "seconds": 0.1})
+        self.queue.complete(job_id, {"qdrant_id": "abc"})
+
+        job = self.queue.get(job_id)
+        self.assertEqual(job["stages"]["extract_text"]["state"], "done")
+        self.assertEqual(job["result"], {"qdrant_id": "abc"})
+        self.assertIsNone(job["current_stage"])
+        self.assertEqual(self.queue.counts(), {"succeeded": 1})
+
+    def test_stale_jobs_are_requeued_then_failed(self):
+        from resume.services.job_queue import JOB_FAILED, JOB_QUEUED
+        job_id = self.queue.enqueue("upload", {})
+        self.queue.claim("worker-a")
+
+        self.assertEqual(self.queue.requeue_stale(stale_seconds=3600, max_attempts=2), 0)
+        self.assertEqual(self.queue.requeue_stale(stale_seconds=-1, max_attempts=2), 1)
+        self.assertEqual(self.queue.get(job_id)["status"], JOB_QUEUED)
+
+        self.queue.claim("worker-b")
+        self.assertEqual(self.queue.requeue_stale(stale_seconds=-1, max_attempts=2), 1)
+        job = self.queue.get(job_id)
+        self.assertEqual(job["status"], JOB_FAILED)
+        self.assertEqual(job["attempts"], 2)
+
+    def test_retried_job_waits_for_its_delay(self):
+        from resume.services.job_queue import JOB_QUEUED
+        job_id = self.queue.enqueue("upload", {})
+        self.queue.claim("worker-a")
+        self.queue.retry(job_id, "throttled", delay=3600)
+
+        job = self.queue.get(job_id)
+        self.assertEqual((job["status"], job["error"]), (JOB_QUEUED, "throttled"))
+        self.assertIsNone(self.queue.claim("worker-a"))
+
+        self.queue.retry(job_id, "throttled", delay=0)
+        self.assertEqual(self.queue.claim("worker-b")["attempts"], 2)
+
+
+# --- Ingestion task graph ---
+
+class TaskGraphTests(SimpleTestCase):
+    def test_results_flow_to_dependents(self):
+        from resume.services.task_graph import TaskGraph
+        graph = TaskGraph()
+        graph.add("a", lambda: 1)
+        graph.add("b", lambda: 2)
+        graph.add("c", lambda a, b: a + b, deps=["a", "b"])
+        self.assertEqual(graph.run(), {"a": 1, "b": 2, "c": 3})
+        self.assertEqual({t["status"] for t in graph.timings().values()}, {"done"})
+
+    def test_wait_for_abandoned_siblings_after_a_failure(self):
+        from resume.services.task_graph import TaskGraph, TaskFailed
+        finished = threading.Event()
+
+        def _slow():
+            time.sleep(0.05)
+            finished.set()
+
+        def _fail():
+            raise ValueError("boom")
+
+        graph = TaskGraph()
+        graph.add("slow", _slow)
+        graph.add("fail", _fail)
+        with self.assertRaises(TaskFailed):
+            graph.run()
+        graph.wait_for_abandoned(timeout=5)
+        self.assertTrue(finished.is_set())
+
+    def test_independent_tasks_run_concurrently(self):
+        from resume.services.task_graph import TaskGraph
+        barrier = threading.Barrier(2, timeout=5)
+        graph = TaskGraph()
+        # Each waits for the other: only passes if both run at the same time.
+        graph.add("left", lambda: barrier.wait())
+        graph.add("right", lambda: barrier.wait())
+        graph.run()
+
+    def test_unknown_dependency_is_rejected(self):
+        from resume.services.task_graph import TaskGraph
+        with self.assertRaises(ValueError):
+            TaskGraph().add("b", lambda a: a, deps=["a"])
+
+    def test_failure_names_the_task_and_skips_dependents(self):
+        from resume.services.task_graph import TaskFailed, TaskGraph
+        ran = []
+        finished = {}
+        graph = TaskGraph(on_finish=lambda name, timing: finished.update({name: timing["status"]}))
+        graph.add("extract", lambda: 1 / 0)
+        graph.add("build", lambda extract: ran.append("build"), deps=["extract"])
+
+        with self.assertRaises(TaskFailed) as ctx:
+            graph.run()
+        self.assertEqual(ctx.exception.task, "extract")
+        self.assertIsInstance(ctx.exception.cause, ZeroDivisionError)
+        self.assertEqual(ran, [])
+        self.assertEqual(finished, {"extract": "failed"})
+
+    def test_critical_path_follows_slowest_dependency(self):
+        from resume.services.task_graph import TaskGraph
+        graph = TaskGraph()
+        graph.add("fast", lambda: None)
+        graph.add("slow", lambda: time.sleep(0.05))
+        graph.add("join", lambda fast, slow: time.sleep(0.01), deps=["fast", "slow"])
+        graph.run()
+        self.assertEqual(graph.critical_path(), ["slow", "join"])
+
+
+# --- Search-plan cache ---
+
+class SearchPlanCacheTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.calls = 0
+
+    def _router(self, plan=None, cacheable=True):
+        def compute():
+            self.calls += 1
+            return plan or {"semantic_query": "termination clauses", "filters": {}}, cacheable
+        return compute
+
+    def test_normalized_queries_share_an_entry(self):
+        from resume.services.search_plan_cache import SearchPlanCache, normalize_query
+        self.assertEqual(normalize_query("  Termination   Clauses?! "), "termination clauses")
+
+        plan_cache = SearchPlanCache()
+        first = plan_cache.get_or_compute("Termination clauses?", "nda", self._router())
+        second = plan_cache.get_or_compute("termination  clauses", "nda", self._router())
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(plan_cache.get_stats()["lru_hits"], 1)
+
+    def test_category_is_part_of_the_key(self):
+        from resume.services.search_plan_cache import SearchPlanCache
+        plan_cache = SearchPlanCache()
+        plan_cache.get_or_compute("salary", "employee_contract", self._router())
+        plan_cache.get_or_compute("salary", None, self._router())
+        self.assertEqual(self.calls, 2)
+
+    def test_fallback_plans_are_not_cached(self):
+        from resume.services.search_plan_cache import SearchPlanCache
+        plan_cache = SearchPlanCache()
+        plan_cache.get_or_compute("q", None, self._router(cacheable=False))
+        plan_cache.get_or_compute("q", None, self._router(cacheable=False))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(plan_cache.get_stats()["uncached_fallbacks"], 2)
+
+    def test_returned_plans_are_copies(self):
+        from resume.services.search_plan_cache import SearchPlanCache
+        plan_cache = SearchPlanCache()
+        plan = plan_cache.get_or_compute("q", None, self._router({"semantic_query": "q", "filters": {}}))
+        plan["filters"]["category"] = "nda"
+        self.assertEqual(plan_cache.get_or_compute("q", None, self._router())["filters"], {})
+
+    def test_shared_tier_and_lru_eviction(self):
+        from resume.services.search_plan_cache import SearchPlanCache
+        SearchPlanCache().get_or_compute("shared", None, self._router())
+        other = SearchPlanCache(max_entries=1)
+        other.get_or_compute("shared", None, self._router())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(other.get_stats()["shared_hits"], 1)
+
+        other.get_or_compute("another", None, self._router())
+        self.assertEqual(other.get_stats()["evictions"], 1)
+
+
+# --- Local query planner ---
+
+PLANNER_FIELDS = {
+    'loan_agreement': ["lender_name", "borrower_name", "loan_amount", "renewal_date", "category"],
+    'nda': ["disclosing_party", "receiving_party", "effective_date", "category"],
+    'employee_contract': ["employer_name", "employee_name", "job_title", "start_date", "end_date", "category"],
+}
+
+PLANNER_PAYLOADS = {
+    'loan_agreements': [{"lender_name": "Acme Holdings", "borrower_name": "Globex"}],
+    'ndas': [{"disclosing_party": "Globex", "receiving_party": "Initech"}],
+    'employee_contracts': [{"employer_name": "Initech", "employee_name": "Jane Doe", "job_title": "the employee"}],
+}
+
+
+@mock.patch("resume.services.local_planner.iter_contract_payloads",
+            lambda collection, fields: iter(PLANNER_PAYLOADS.get(collection, [])))
+class LocalQueryPlannerTests(SimpleTestCase):
+    def _planner(self):
+        from resume.services.local_planner import LocalQueryPlanner, PartyIndex
+        index = PartyIndex(PLANNER_FIELDS)
+        index._rebuild()
+        return LocalQueryPlanner(PLANNER_FIELDS, party_index=index, query_log="")
+
+    def test_category_and_known_name_become_filters(self):
+        plan, reason = self._planner().plan("loan agreements with Acme Holdings")
+        self.assertEqual(reason, "handled")
+        self.assertEqual(plan["filters"], {"category": "loan_agreement", "lender_name": "Acme Holdings"})
+
+    def test_role_word_picks_the_field(self):
+        plan, reason = self._planner().plan("NDAs where the recipient is Initech")
+        self.assertEqual(reason, "handled")
+        self.assertEqual(plan["filters"], {"category": "nda", "receiving_party": "Initech"})
+
+        plan, reason = self._planner().plan("contracts with Globex")
+        self.assertIsNone(plan)
+        self.assertEqual(reason, "ambiguous_name")
+
+    def test_full_date_next_to_its_field(self):
+        plan, reason = self._planner().plan("NDA with effective date March 5, 2024")
+        self.assertEqual(reason, "handled")
+        self.assertEqual(plan["filters"], {"category": "nda", "effective_date": "03/05/2024"})
+
+    def test_defers_what_the_rules_cannot_place(self):
+        planner = self._planner()
+        self.assertEqual(planner.plan("loans with Umbrella Corp")[1], "unknown_name")
+        self.assertEqual(planner.plan("loans over 50000")[1], "number")
+        self.assertEqual(planner.plan("NDAs signed last month")[1], "date")
+        self.assertEqual(planner.plan('contracts mentioning "force majeure"')[1], "quoted_text")
+        self.assertEqual(planner.plan("employee contracts", category="nda")[1], "category_conflict")
+        self.assertEqual(planner.get_stats()["sent_to_bedrock"], 5)
+
+    def test_generic_values_are_not_indexed(self):
+        index = self._planner().party_index
+        self.assertEqual(index.match(["the", "employee"]), [])
+
+    def test_first_build_runs_in_the_background(self):
+        from resume.services.local_planner import LocalQueryPlanner, PartyIndex
+        release = threading.Event()
+        index = PartyIndex(PLANNER_FIELDS)
+        real_load = index._load
+        index._load = lambda: (release.wait(5), real_load())[1]
+        planner = LocalQueryPlanner(PLANNER_FIELDS, party_index=index, query_log="")
+
+        self.assertEqual(planner.plan("loans with Acme Holdings"), (None, "index_unavailable"))
+        release.set()
+        for _ in range(100):
+            if index.get_stats()["ready"]:
+                break
+            time.sleep(0.01)
+        self.assertEqual(planner.plan("loans with Acme Holdings")[1], "handled")
+
+    def test_query_log_is_rotated(self):
+        from resume.services.local_planner import LocalQueryPlanner, read_query_log
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "queries.jsonl")
+        planner = LocalQueryPlanner(PLANNER_FIELDS, party_index=self._planner().party_index, query_log=path)
+        with mock.patch("resume.services.local_planner.LOCAL_PLANNER_QUERY_LOG_MAX_BYTES", 200), \
+                mock.patch("resume.services.local_planner.LOCAL_PLANNER_QUERY_LOG_BACKUPS", 2):
+            for i in range(20):
+                planner.record(f"query {i}", None, "local", "handled")
+            self.assertFalse(os.path.exists(path + ".3"))
+            self.assertTrue(os.path.exists(path + ".2"))
+            queries = [e["query"] for e in read_query_log(path)]
+        self.assertEqual(queries[-1], "query 19")
+        self.assertLess(len(queries), 20)
+        self.assertEqual(queries, sorted(queries, key=lambda q: int(q.split()[1])))
+
+    def _planner_report(self, index):
+        from io import StringIO
+        from django.core.management import call_command
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "queries.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for query in ["loan agreements with Acme Holdings", "loans with Umbrella Corp"]:
+                f.write(json.dumps({"query": query, "category": None, "planner": "bedrock"}) + "\n")
+        out = StringIO()
+        with mock.patch("resume.services.bedrock_service.local_planner.party_index", index):
+            call_command("planner_report", log=path, stdout=out)
+        return out.getvalue()
+
+    def test_planner_report_builds_the_index_before_replaying(self):
+        from resume.services.bedrock_service import CATEGORY_SPECIFIC_FIELDS
+        from resume.services.local_planner import PartyIndex
+        output = self._planner_report(PartyIndex(CATEGORY_SPECIFIC_FIELDS))
+        self.assertIn("Handled locally:  1 (50.0%)", output)
+        self.assertIn("unknown_name", output)
+        self.assertNotIn("index_unavailable", output)
+
+    def test_planner_report_fails_when_the_index_cannot_be_built(self):
+        from django.core.management.base import CommandError
+        from resume.services.bedrock_service import CATEGORY_SPECIFIC_FIELDS
+        from resume.services.local_planner import PartyIndex
+        with mock.patch("resume.services.local_planner.iter_contract_payloads",
+                        side_effect=ConnectionError("Qdrant down")):
+            with self.assertRaises(CommandError):
+                self._planner_report(PartyIndex(CATEGORY_SPECIFIC_FIELDS))
+
+
+# --- Concurrent fan-out ---
+
+class MapConcurrentlyTests(SimpleTestCase):
+    def test_results_keep_item_order_and_errors(self):
+        from resume.services.fanout import map_concurrently
+
+        def _fn(n):
+            if n == 2:
+                raise ValueError("bad item")
+            time.sleep(0.01 * (5 - n))
+            return n * 10
+
+        outcomes = map_concurrently(_fn, [1, 2, 3, 4], max_concurrency=4, timeout=5)
+        self.assertEqual([ok for ok, _ in outcomes], [True, False, True, True])
+        self.assertEqual([r for ok, r in outcomes if ok], [10, 30, 40])
+        self.assertIsInstance(outcomes[1][1], ValueError)
+
+    def test_slow_item_times_out_without_holding_the_others(self):
+        from resume.services.fanout import map_concurrently, FanOutTimeout
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def _fn(n):
+            if n == 0:
+                release.wait(5)
+            return n
+
+        started = time.perf_counter()
+        outcomes = map_concurrently(_fn, [0, 1, 2], max_concurrency=3, timeout=0.1)
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertIsInstance(outcomes[0][1], FanOutTimeout)
+        self.assertEqual(outcomes[1:], [(True, 1), (True, 2)])
+
+    def test_deadline_bounds_items_queued_behind_stuck_ones(self):
+        from resume.services.fanout import map_concurrently, FanOutTimeout
+        release = threading.Event()
+        self.addCleanup(release.set)
+        ran = []
+
+        def _fn(n):
+            ran.append(n)
+            release.wait(5)
+            return n
+
+        # One thread, so item 1 only starts once item 0's thread is free again.
+        started = time.perf_counter()
+        outcomes = map_concurrently(_fn, [0, 1, 2], max_concurrency=1, timeout=0.1, deadline=0.3)
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertTrue(all(not ok and isinstance(r, FanOutTimeout) for ok, r in outcomes))
+        self.assertEqual(ran, [0])
+
+
+# --- Map-reduce summarization ---
+
+class SplitForSummaryTests(SimpleTestCase):
+    def test_paragraphs_are_packed_up_to_the_limit(self):
+        from resume.services.summarization_service import split_for_summary
+        text = "\n\n".join(["a" * 30, "b" * 30, "c" * 30])
+        self.assertEqual(split_for_summary(text, max_chars=70), ["a" * 30 + "\n\n" + "b" * 30, "c" * 30])
+
+    def test_long_paragraph_is_cut_at_whitespace(self):
+        from resume.services.summarization_service import split_for_summary
+        paragraph = " ".join(["word"] * 50)
+        pieces = split_for_summary(f"intro\n\n{paragraph}", max_chars=60)
+        self.assertEqual(pieces[0], "intro")
+        self.assertTrue(all(len(p) <= 60 for p in pieces))
+        self.assertTrue(all(not p.startswith(" ") and not p.endswith("wor") for p in pieces))
+        self.assertEqual(" ".join(pieces[1:]).split(), paragraph.split())
+
+    def test_text_without_spaces_is_cut_hard(self):
+        from resume.services.summarization_service import split_for_summary
+        self.assertEqual(split_for_summary("x" * 25, max_chars=10), ["x" * 10, "x" * 10, "x" * 5])
+
+    def test_blank_text_has_no_pieces(self):
+        from resume.services.summarization_service import split_for_summary
+        self.assertEqual(split_for_summary("\n\n  \n\n"), [])
+
+
+# --- Answer cache ---
+
+class AnswerCacheTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.calls = 0
+
+    def _compute(self, answer="The term is two years."):
+        def _fn():
+            self.calls += 1
+            return answer
+        return _fn
+
+    def test_second_lookup_is_a_hit(self):
+        from resume.services.answer_cache import AnswerCache
+        answer_cache = AnswerCache()
+        answer, provenance = answer_cache.get_or_compute("ctx", "What is the term?", "model", self._compute())
+        self.assertEqual(provenance["status"], "miss")
+        answer, provenance = answer_cache.get_or_compute("ctx", "what is  the term", "model", self._compute("other"))
+        self.assertEqual(answer, "The term is two years.")
+        self.assertEqual(provenance["status"], "hit")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(answer_cache.get_stats()["hit_rate"], 0.5)
+
+    def test_provenance_does_not_expose_the_cache_key(self):
+        from resume.services.answer_cache import AnswerCache
+        answer_cache = AnswerCache()
+        _, miss = answer_cache.get_or_compute("ctx", "q", "model", self._compute())
+        _, hit = answer_cache.get_or_compute("ctx", "q", "model", self._compute())
+        self.assertNotIn("key", miss)
+        self.assertNotIn("key", hit)
+        self.assertEqual(set(hit), {"status", "cached_at", "age_seconds", "original_seconds"})
+
+    def test_context_model_and_version_are_part_of_the_key(self):
+        from resume.services.answer_cache import AnswerCache
+        answer_cache = AnswerCache()
+        answer_cache.get_or_compute("ctx", "q", "model", self._compute())
+        answer_cache.get_or_compute("other ctx", "q", "model", self._compute())
+        answer_cache.get_or_compute("ctx", "q", "other model", self._compute())
+        AnswerCache(version=2).get_or_compute("ctx", "q", "model", self._compute())
+        self.assertEqual(self.calls, 4)
+
+    def test_bypass_always_computes_and_stores_nothing(self):
+        from resume.services.answer_cache import AnswerCache
+        answer_cache = AnswerCache()
+        _, provenance = answer_cache.get_or_compute("ctx", "q", "model", self._compute(), use_cache=False)
+        self.assertEqual(provenance, {"status": "bypass"})
+        answer_cache.get_or_compute("ctx", "q", "model", self._compute())
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(answer_cache.get_stats()["bypasses"], 1)
+
+    def test_cache_errors_fall_back_to_the_model(self):
+        from resume.services.answer_cache import AnswerCache
+        answer_cache = AnswerCache()
+        with mock.patch("django.core.cache.backends.locmem.LocMemCache.get", side_effect=RuntimeError("down")):
+            answer, provenance = answer_cache.get_or_compute("ctx", "q", "model", self._compute())
+        self.assertEqual(provenance["status"], "miss")
+        self.assertEqual(answer_cache.get_stats()["errors"], 1)
+
+
+# --- Context assembly ---
+
+class Bm25Tests(SimpleTestCase):
+    def test_passages_with_the_query_terms_score_higher(self):
+        from resume.services.context_assembly import _bm25, _terms
+        passages = [_terms(p) for p in (
+            "The employee may terminate this agreement with notice.",
+            "Salary is paid monthly.",
+            "Termination requires thirty days written notice to the employer.",
+        )]
+        scores = _bm25(_terms("What notice is needed for termination?"), passages)
+        self.assertEqual(scores[1], 0.0)
+        self.assertGreater(scores[2], scores[0])
+        self.assertGreater(scores[0], 0.0)
+
+    def test_rare_terms_weigh_more(self):
+        from resume.services.context_assembly import _bm25
+        passages = [["notice", "payment"], ["notice", "arbitration"], ["notice", "salary"]]
+        scores = _bm25(["notice", "arbitration"], passages)
+        self.assertEqual(max(range(3), key=lambda i: scores[i]), 1)
+        self.assertAlmostEqual(scores[0], scores[2])
+
+    def test_no_passages(self):
+        from resume.services.context_assembly import _bm25
+        self.assertEqual(_bm25(["notice"], []), [])
+
+    def test_stopwords_are_not_terms(self):
+        from resume.services.context_assembly import _terms
+        self.assertEqual(_terms("What is the Notice period?"), ["notice", "period"])
+
+
+def _fake_embeddings(texts):
+    # One dimension per word that matters in these tests.
+    return [[float("alpha" in t), float("omega" in t), 1.0] for t in texts]
+
+
+@mock.patch("resume.services.chunking_service.get_tokenizer", lambda: _WhitespaceTokenizer())
+@mock.patch("resume.services.context_assembly.get_text_embeddings", _fake_embeddings)
+class ContextAssemblerTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_passages_match_the_ingestion_chunks(self):
+        from resume.services.chunking_service import split_into_chunks
+        from resume.services.context_assembly import ContextAssembler
+        text = _words(50)
+        assembler = ContextAssembler(passage_tokens=10, passage_overlap=3)
+        self.assertEqual(
+            assembler._passage_bounds(text),
+            [(c["start"], c["end"], c["token_count"]) for c in split_into_chunks(text, 10, 3)],
+        )
+
+    def test_short_documents_are_sent_whole(self):
+        from resume.services.context_assembly import ContextAssembler
+        text = _words(25)
+        # 4 overlapping passages, but only 25 distinct tokens.
+        context, info = ContextAssembler(token_budget=25, passage_tokens=10, passage_overlap=5).assemble(text, "q")
+        self.assertEqual(context, text)
+        self.assertEqual(info["full_tokens"], 25)
+
+    def test_relevant_passages_are_kept_within_budget(self):
+        from resume.services.context_assembly import ContextAssembler, PASSAGE_SEPARATOR
+        text = " ".join([_words(10, "a"), "alpha " + _words(9, "b"), _words(10, "c"), "omega " + _words(9, "d")])
+        assembler = ContextAssembler(token_budget=20, passage_tokens=10, passage_overlap=0, dense_weight=1.0)
+        context, info = assembler.assemble(text, "alpha omega")
+        self.assertEqual(context.split(PASSAGE_SEPARATOR), ["alpha " + _words(9, "b"), "omega " + _words(9, "d")])
+        self.assertEqual((info["selected"], info["tokens"]), (2, 20))
+
+    def test_cache_context_depends_on_the_settings(self):
+        from resume.services.context_assembly import ContextAssembler
+        self.assertEqual(ContextAssembler().cache_context("t"), ContextAssembler().cache_context("t"))
+        self.assertNotEqual(ContextAssembler().cache_context("t"), ContextAssembler(token_budget=10).cache_context("t"))
+
+    def test_cached_answers_skip_assembly(self):
+        from resume.services.bedrock_service import BedrockService
+        from resume.services.context_assembly import context_assembler
+        from resume.services.llm_usage import llm_usage
+        service = object.__new__(BedrockService)
+        text = _words(400)
+        with mock.patch.object(llm_usage, "enabled", False), \
+                mock.patch.object(BedrockService, "_answer_with_bedrock", return_value="Two years.") as model, \
+                mock.patch.object(context_assembler, "assemble", wraps=context_assembler.assemble) as assemble:
+            answer, provenance, info = service.answer_from_document(text, "term?")
+            self.assertEqual((answer, provenance["status"]), ("Two years.", "miss"))
+            self.assertIsNotNone(info)
+            answer, provenance, info = service.answer_from_document(text, "term?")
+        self.assertEqual((answer, provenance["status"], info), ("Two years.", "hit", None))
+        self.assertEqual((assemble.call_count, model.call_count), (1, 1))
+
+
+# --- Bedrock gateway ---
+
+class AdaptiveLimiterTests(SimpleTestCase):
+    def test_limit_halves_on_throttle_and_grows_on_success(self):
+        from resume.services.bedrock_gateway import AdaptiveLimiter
+        limiter = AdaptiveLimiter(initial=8, minimum=1, maximum=32, cooldown=60)
+        for _ in range(2):
+            self.assertTrue(limiter.acquire(0, timeout=1))
+        limiter.release("throttled")
+        self.assertEqual(limiter.limit, 4)
+        # A burst of throttles within the cooldown counts once.
+        limiter.release("throttled")
+        self.assertEqual(limiter.limit, 4)
+
+        limiter.acquire(0, timeout=1)
+        limiter.release("ok")
+        self.assertEqual(limiter.limit, 4.25)
+        limiter.acquire(0, timeout=1)
+        limiter.release("error")
+        self.assertEqual((limiter.limit, limiter.in_flight), (4.25, 0))
+
+    def test_limit_stays_within_bounds(self):
+        from resume.services.bedrock_gateway import AdaptiveLimiter
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=2, cooldown=0)
+        for outcome in ("throttled", "ok", "ok", "ok", "ok"):
+            limiter.acquire(0, timeout=1)
+            limiter.release(outcome)
+            self.assertTrue(1 <= limiter.limit <= 2)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_interactive_waiters_are_admitted_before_bulk(self):
+        from resume.services.bedrock_gateway import AdaptiveLimiter, PRIORITY_BULK, PRIORITY_INTERACTIVE
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+        limiter.acquire(PRIORITY_BULK, timeout=1)
+        admitted = []
+
+        def _wait(priority):
+            limiter.acquire(priority, timeout=5)
+            admitted.append(priority)
+            limiter.release("ok")
+
+        bulk = threading.Thread(target=_wait, args=(PRIORITY_BULK,))
+        bulk.start()
+        while limiter.queued()["bulk"] != 1:
+            time.sleep(0.001)
+        interactive = threading.Thread(target=_wait, args=(PRIORITY_INTERACTIVE,))
+        interactive.start()
+        while limiter.queued()["interactive"] != 1:
+            time.sleep(0.001)
+
+        limiter.release("ok")
+        bulk.join()
+        interactive.join()
+        self.assertEqual(admitted, [PRIORITY_INTERACTIVE, PRIORITY_BULK])
+
+    def test_acquire_times_out_when_full(self):
+        from resume.services.bedrock_gateway import AdaptiveLimiter
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+        limiter.acquire(0, timeout=1)
+        self.assertFalse(limiter.acquire(0, timeout=0.05))
+        self.assertEqual(limiter.queued(), {"interactive": 0, "bulk": 0})
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_rate(self):
+        from resume.services.bedrock_gateway import TokenBucket
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+
+class BedrockGatewayTests(SimpleTestCase):
+    MODEL_ID = "meta.llama3-70b-instruct-v1:0"
+
+    def setUp(self):
+        from resume.services.llm_usage import llm_usage
+        patcher = mock.patch.object(llm_usage, "enabled", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client(self, stub, gateway):
+        from resume.services.bedrock_gateway import GatedBedrockClient, PRIORITY_INTERACTIVE
+        return GatedBedrockClient(stub, gateway, PRIORITY_INTERACTIVE)
+
+    def test_successful_call(self):
+        from resume.services.bedrock_gateway import BedrockGateway
+        from resume.services.bedrock_stub import StubBedrockRuntime
+        gateway = BedrockGateway()
+        response = self._client(StubBedrockRuntime(latency=0), gateway).invoke_model(
+            body=json.dumps({"prompt": "hi"}), modelId=self.MODEL_ID,
+        )
+        self.assertIn("generation", json.loads(response["body"].read()))
+        self.assertEqual(gateway.get_stats()[self.MODEL_ID]["by_priority"]["interactive"]["ok"], 1)
+
+    def test_throttles_are_retried_then_raise(self):
+        from resume.services.bedrock_gateway import BedrockGateway, BedrockThrottled
+        from resume.services.bedrock_stub import StubBedrockRuntime
+        stub = StubBedrockRuntime(latency=0, throttle_rate=1.0)
+        gateway = BedrockGateway(max_attempts=3, backoff_base=0.001, backoff_cap=0.001)
+        with self.assertRaises(BedrockThrottled):
+            self._client(stub, gateway).invoke_model(body=json.dumps({"prompt": "hi"}), modelId=self.MODEL_ID)
+
+        self.assertEqual(stub.calls, 3)
+        stats = gateway.get_stats()[self.MODEL_ID]
+        counters = stats["by_priority"]["interactive"]
+        self.assertEqual((counters["throttles"], counters["retries"], counters["gave_up"]), (3, 2, 1))
+        self.assertLess(stats["concurrency_limit"], 8)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_other_errors_are_not_retried(self):
+        from resume.services.bedrock_gateway import BedrockGateway
+        gateway = BedrockGateway(max_attempts=3)
+        calls = []
+
+        def _invoke():
+            calls.append(1)
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            gateway.call(self.MODEL_ID, 0, _invoke)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(gateway.get_stats()[self.MODEL_ID]["concurrency_limit"], 8)
+
+
+class IngestionRetryTests(SimpleTestCase):
+    def setUp(self):
+        from resume.services.job_queue import JobQueue
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        self.queue = JobQueue(path=os.path.join(tmp_dir, "jobs.sqlite3"))
+        self.spool_path = os.path.join(tmp_dir, "upload")
+        open(self.spool_path, "wb").close()
+        patcher = mock.patch("resume.services.ingestion_service.job_queue", self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, error):
+        from resume.services.ingestion_service import IngestionWorkerPool, IngestionError
+
+        def _handler(job):
+            raise IngestionError("extract_fields", error)
+
+        job = self.queue.claim("worker-a")
+        with mock.patch.dict("resume.services.ingestion_service.JOB_HANDLERS", {"ingest_contract": _handler}):
+            IngestionWorkerPool(1)._process(job)
+        return self.queue.get(job["id"])
+
+    def test_throttled_job_is_retried_and_keeps_its_upload(self):
+        from resume.services.bedrock_gateway import BedrockThrottled
+        from resume.services.job_queue import JOB_FAILED, JOB_QUEUED
+        self.queue.enqueue("ingest_contract", {"spool_path": self.spool_path, "s3_key": "ndas/a.pdf"})
+        with mock.patch("resume.services.ingestion_service.INGESTION_THROTTLE_RETRY_DELAY", 0):
+            job = self._run(BedrockThrottled("busy"))
+            self.assertEqual(job["status"], JOB_QUEUED)
+            self.assertTrue(os.path.exists(self.spool_path))
+
+            # The last attempt fails for good: the spooled upload goes.
+            job = self._run(BedrockThrottled("busy"))
+        self.assertEqual((job["status"], job["attempts"]), (JOB_FAILED, 2))
+        self.assertFalse(os.path.exists(self.spool_path))
+
+    def test_other_failures_are_final(self):
+        from resume.services.job_queue import JOB_FAILED
+        self.queue.enqueue("ingest_contract", {"spool_path": self.spool_path, "s3_key": "ndas/a.pdf"})
+        job = self._run(ValueError("not a PDF"))
+        self.assertEqual(job["status"], JOB_FAILED)
+        self.assertFalse(os.path.exists(self.spool_path))
+
+
+# --- LLM usage log ---
+
+class LLMUsageLogTests(SimpleTestCase):
+    def _log(self, **kwargs):
+        from resume.services.llm_usage import LLMUsageLog
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        # A long interval, so only explicit flushes write.
+        return LLMUsageLog(path=os.path.join(tmp_dir, "usage.sqlite3"), enabled=True, flush_interval=3600, **kwargs)
+
+    def test_record_only_buffers(self):
+        log = self._log()
+        with mock.patch.object(log, "_connection", side_effect=AssertionError("wrote on the request thread")):
+            log.record("model", "qna_answer", latency=0.5)
+        self.assertEqual(len(log._buffer), 1)
+
+    def test_flush_writes_and_summary_includes_buffered_rows(self):
+        from resume.services.llm_usage import CACHE_HIT
+        log = self._log()
+        log.record("model", "qna_answer", input_tokens=100, output_tokens=20, latency=0.5)
+        log.record("model", "qna_answer", CACHE_HIT)
+        rows = log.summary(days=1, group_by=("call_site",))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]["calls"], rows[0]["input_tokens"], rows[0]["cache_hit_rate"]), (2, 100, 0.5))
+        self.assertEqual(log.flush(), 0)
+        stats = log.get_stats()
+        self.assertEqual((stats["recorded"], stats["written"], stats["buffered"]), (2, 2, 0))
+
+    def test_stats_do_not_touch_the_database(self):
+        log = self._log()
+        log.record("model", "qna_answer", input_tokens=100, latency=0.5)
+        with mock.patch.object(log, "_connection", side_effect=AssertionError("queried on a metrics scrape")):
+            stats = log.get_stats()
+        self.assertEqual((stats["recorded"], stats["buffered"]), (1, 1))
+        self.assertNotIn("last_24h", stats)
+
+    def test_failed_write_keeps_rows_for_the_next_flush(self):
+        log = self._log()
+        log.record("model", "document_chat")
+        with mock.patch.object(log, "_connection", side_effect=OSError("disk full")):
+            self.assertEqual(log.flush(), 0)
+        log.record("model", "document_chat")
+        self.assertEqual(log.flush(), 2)
+        self.assertEqual(log.get_stats()["write_errors"], 1)
+
+    def test_full_buffer_drops_the_oldest_rows(self):
+        log = self._log(buffer_max=2)
+        for call_site in ("a", "b", "c"):
+            log.record("model", call_site)
+        self.assertEqual(log.get_stats()["dropped"], 1)
+        rows = log.summary(days=None, group_by=("call_site",))
+        self.assertEqual(sorted(r["call_site"] for r in rows), ["b", "c"])
+
+
+# --- Contract ingestion pipeline ---
+
+class _StubExtractor:
+    def extract_fields(self, head_text, contract_category):
+        return {"disclosing_party": "Acme"}
+
+    def build_payload(self, contract_category, s3_url, fields, extracted):
+        return dict(fields, s3_url=s3_url, category=contract_category)
+
+
+@override_settings(S3_CONTRACTS_BUCKET="contracts")
+class IngestContractTests(SimpleTestCase):
+    """
+    The real ingestion graph with S3, Qdrant, Bedrock and the model stubbed out.
+    """
+
+    def setUp(self):
+        self.uploaded, self.deleted, self.upserted, self.deleted_points = [], [], [], []
+        self.existing = None
+        self.upsert_error = None
+        stubs = {
+            "find_contract_by_hash": lambda collection, sha: self.existing,
+            "upload_contract_to_s3": self._upload,
+            "delete_s3_object": self.deleted.append,
+            "delete_contract": self._delete_contract,
+            "ContractExtractor": _StubExtractor,
+            "extract_pdf_head": lambda pdf, chars: ["Acme NDA text"],
+            "extract_pdf_pages": lambda pdf, start=0: [],
+            "split_into_chunks": lambda text: [],
+            "get_text_embedding": lambda text: [0.1, 0.2],
+            "build_contract_points": lambda collection, point_id, *args: [point_id],
+            "upsert_points": self._upsert,
+            "store_contract_text": lambda s3_url, text: None,
+            "invalidate_contract_caches": lambda categories: None,
+        }
+        for name, stub in stubs.items():
+            patcher = mock.patch(f"resume.services.ingestion_service.{name}", stub)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _upload(self, file_obj, bucket, key, content_type):
+        self.uploaded.append(key)
+        return f"s3://{bucket}/{key}"
+
+    def _upsert(self, collection, points, **kwargs):
+        if self.upsert_error:
+            raise self.upsert_error
+        self.upserted.extend(points)
+
+    def _delete_contract(self, collection, point_id):
+        if point_id == "locked":
+            raise RuntimeError("Qdrant unavailable")
+        self.deleted_points.append(point_id)
+
+    def _ingest(self, data=b"%PDF-1.4 contract", **kwargs):
+        from resume.services.ingestion_service import ingest_contract
+        from resume.services.upload_source import UploadSource
+        return ingest_contract(UploadSource.from_bytes(data), "nda.pdf", "application/pdf", "nda",
+                               s3_key="ndas/new-nda.pdf", **kwargs)
+
+    def test_successful_upload_is_kept(self):
+        result = self._ingest()
+        self.assertEqual(result["s3_url"], "s3://contracts/ndas/new-nda.pdf")
+        self.assertEqual(len(self.upserted), 1)
+        self.assertEqual(self.deleted, [])
+
+    def test_failed_upsert_deletes_the_uploaded_object(self):
+        from resume.services.ingestion_service import IngestionError
+        self.upsert_error = RuntimeError("Qdrant down")
+        with self.assertRaises(IngestionError) as raised:
+            self._ingest()
+        self.assertEqual(raised.exception.stage, "upsert")
+        self.assertEqual(self.deleted, ["s3://contracts/ndas/new-nda.pdf"])
+
+    def test_failure_after_upsert_keeps_the_object(self):
+        from resume.services.ingestion_service import IngestionError
+        with mock.patch("resume.services.ingestion_service.store_contract_text", side_effect=OSError("disk full")):
+            with self.assertRaises(IngestionError):
+                self._ingest()
+        self.assertEqual(len(self.upserted), 1)
+        self.assertEqual(self.deleted, [])
+
+    def _bulk(self, *contents, **kwargs):
+        from resume.services.ingestion_service import bulk_ingest
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        items = []
+        for i, data in enumerate(contents):
+            path = os.path.join(tmp, f"nda-{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(data)
+            items.append({"path": path, "file_name": f"nda-{i}.pdf", "content_type": "application/pdf",
+                          "contract_category": "nda"})
+        return bulk_ingest(items, concurrency=1, **kwargs)
+
+    def test_bulk_file_failing_after_its_upload_deletes_the_object(self):
+        with mock.patch("resume.services.ingestion_service.get_text_embedding", lambda text: []):
+            report = self._bulk(b"%PDF-1.4 one")
+        self.assertEqual(report["results"][0]["status"], "failed")
+        self.assertEqual(len(self.uploaded), 1)
+        self.assertEqual(self.deleted, [f"s3://contracts/{self.uploaded[0]}"])
+
+    def test_bulk_failed_batch_upsert_deletes_every_object_of_the_batch(self):
+        self.upsert_error = RuntimeError("Qdrant down")
+        report = self._bulk(b"%PDF-1.4 one", b"%PDF-1.4 two")
+        self.assertEqual([r["status"] for r in report["results"]], ["failed", "failed"])
+        self.assertEqual(sorted(self.deleted), sorted(f"s3://contracts/{key}" for key in self.uploaded))
+        self.assertEqual([r["s3_url"] for r in report["results"]], [None, None])
+
+    def test_bulk_success_keeps_the_objects(self):
+        report = self._bulk(b"%PDF-1.4 one", b"%PDF-1.4 two")
+        self.assertEqual(report["summary"]["succeeded"], 2)
+        self.assertEqual(self.deleted, [])
+
+    # --- Duplicate detection ---
+    def _existing(self, point_id="old-point"):
+        return models.Record(id=point_id, payload={"s3_url": "s3://contracts/ndas/old-nda.pdf", "chunk_count": 3})
+
+    def test_find_duplicate_treats_a_failed_lookup_as_new(self):
+        from resume.services.ingestion_service import find_duplicate
+        with mock.patch("resume.services.ingestion_service.find_contract_by_hash",
+                        side_effect=ConnectionError("Qdrant down")):
+            self.assertIsNone(find_duplicate("ndas", "abc"))
+
+    def test_duplicate_upload_returns_the_existing_point(self):
+        self.existing = self._existing()
+        result = self._ingest()
+        self.assertTrue(result["duplicate"])
+        self.assertEqual(result["qdrant_id"], "old-point")
+        self.assertEqual(result["s3_url"], "s3://contracts/ndas/old-nda.pdf")
+        self.assertEqual(result["chunks"], 3)
+        self.assertEqual((self.uploaded, self.upserted, self.deleted), ([], [], []))
+
+    def test_forced_reingest_replaces_the_old_point_and_object(self):
+        self.existing = self._existing()
+        result = self._ingest(force=True)
+        self.assertFalse(result["duplicate"])
+        self.assertEqual(self.uploaded, ["ndas/new-nda.pdf"])
+        self.assertEqual(self.deleted_points, ["old-point"])
+        self.assertEqual(self.deleted, ["s3://contracts/ndas/old-nda.pdf"])
+
+    def test_forced_reingest_keeps_the_old_object_when_the_point_delete_fails(self):
+        self.existing = self._existing("locked")
+        self._ingest(force=True)
+        self.assertEqual(self.deleted_points, [])
+        self.assertEqual(self.deleted, [])
+
+    def test_bulk_repeats_within_the_upload_are_duplicates(self):
+        report = self._bulk(b"%PDF-1.4 one", b"%PDF-1.4 one", b"%PDF-1.4 two")
+        self.assertEqual([r["status"] for r in report["results"]], ["succeeded", "duplicate", "succeeded"])
+        self.assertEqual(report["results"][1]["duplicate_of"], "nda-0.pdf")
+        self.assertEqual(report["summary"]["duplicates"], 1)
+        self.assertEqual(len(self.uploaded), 2)
+
+    def test_bulk_skips_files_already_ingested(self):
+        self.existing = self._existing()
+        report = self._bulk(b"%PDF-1.4 one")
+        self.assertEqual(report["results"][0]["status"], "duplicate")
+        self.assertEqual(report["results"][0]["qdrant_id"], "old-point")
+        self.assertEqual(self.uploaded, [])
@@ -1,6 +1,8 @@
 from django.urls import path
 from .views import (
     ContractUploadView,
+    ContractBulkUploadView,
+    IngestionJobStatusView,
     ContractSearchView,
     AllContractsListView,
     ContractByCategoryView,
@@ -10,6 +12,9 @@ from .views import (
     ChatHistorySaveView,
     AlertsRemindersView,
     SetupQdrantView,
+    ServiceMetricsView,
+    ReadinessView,
+    LLMUsageView,
     summarize_multiple_documents  # ✅ ADD THIS IMPORT
 )
 
@@ -20,6 +25,16 @@ urlpatterns = [
     path('upload/', ContractUploadView.as_view(), name='contract-upload'),
 
 
+    # --- Bulk Contract Upload (many files or a zip archive) ---
+    # Example: POST /api/contracts/upload/bulk/
+    path('upload/bulk/', ContractBulkUploadView.as_view(), name='contract-bulk-upload'),
+
+
+    # --- Background Ingestion Job Status (upload with async=true) ---
+    # Example: GET /api/contracts/jobs/<job_id>/
+    path('jobs/<uuid:job_id>/', IngestionJobStatusView.as_view(), name='ingestion-job-status'),
+
+
     # --- Contract Search ---
     # Example: POST /api/contracts/search/
     path('search/', ContractSearchView.as_view(), name='contract-search'),
@@ -61,6 +76,21 @@ urlpatterns = [
     path('setup-qdrant/', SetupQdrantView.as_view(), name='setup-qdrant'),
 
 
+    # --- Service Metrics (embedding batcher queue depth / batch sizes) ---
+    # Example: GET /api/contracts/metrics/
+    path('metrics/', ServiceMetricsView.as_view(), name='service-metrics'),
+
+
+    # --- Readiness (which lazily-loaded resources are loaded / warmed up) ---
+    # Example: GET /api/contracts/ready/
+    path('ready/', ReadinessView.as_view(), name='readiness'),
+
+
+    # --- LLM usage (tokens / latency per call site and model; staff only) ---
+    # Example: GET /api/contracts/llm-usage/?days=7&group_by=call_site,cache
+    path('llm-usage/', LLMUsageView.as_view(), name='llm-usage'),
+
+
     # ✅ NEW: Summarize Multiple Documents
     # Example: POST /api/contracts/summarize-multiple/
     path('summarize-multiple/', summarize_multiple_documents, name='summarize-multiple'),
@@ -3,11 +3,16 @@ import io
 import os
 import re
 import json
+import shutil
+import time
+import zipfile
 from qdrant_client.http import models
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
 from django.conf import settings
 from django.core.cache import cache
+from django.http import StreamingHttpResponse
 from rest_framework import status
 import boto3
 from botocore.exceptions import ClientError
@@ -25,9 +30,33 @@ CONTRACT_CATEGORY_MAP = {
  
 from .services.s3_service import upload_contract_to_s3, get_s3_bytes_from_url, generate_presigned_viewable_url
 from .services.extract_data import ContractExtractor
-from .services.embedding_service import get_text_embedding
+from .services.embedding_service import get_text_embedding, get_embedding_metrics, get_embedding_cache_stats
+from .services import resource_registry
+from .services.text_store import get_contract_text, get_text_store_stats
+from .services.ingestion_service import (
+    ingest_contract,
+    enqueue_contract_ingestion,
+    spool_bulk_upload,
+    bulk_ingest,
+    enqueue_bulk_ingestion,
+    BULK_INGEST_MAX_FILES,
+    format_job,
+    IngestionError,
+    ALL_CONTRACTS_CACHE_KEY,
+    ALERTS_CACHE_KEY,
+    CATEGORY_CACHE_KEY_PREFIX,
+)
+from .services.job_queue import job_queue
+from .services.fanout import map_concurrently, QNA_MAX_CONCURRENCY, QNA_DOCUMENT_TIMEOUT
+from .services.summarization_service import MapReduceSummarizer
+from .services.upload_source import UploadSource
 from .services.qdrant_service import upsert_contract, search_contracts, get_all_contracts, setup_qdrant_collections, get_contract_alerts_and_reminders
-from .services.bedrock_service import BedrockService
+from .services.bedrock_service import BedrockService, local_planner, answer_stream_metrics
+from .services.search_plan_cache import search_plan_cache
+from .services.answer_cache import answer_cache
+from .services.context_assembly import context_assembler
+from .services.bedrock_gateway import bedrock_gateway, BedrockThrottled
+from .services.llm_usage import llm_usage, CACHE_MISS, CACHE_BYPASS, GROUP_COLUMNS
 from .services.qdrant_service import (
     get_all_contracts,
     get_contracts_by_collection,
@@ -41,14 +70,6 @@ CONTRACT_CATEGORY_MAP = {
 }
  
 class ContractUploadView(APIView):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.s3_bucket_name = settings.S3_CONTRACTS_BUCKET
-        try:
-            self.extractor = ContractExtractor()
-        except Exception as e:
-            raise Exception(f"Failed to initialize ContractExtractor: {e}")
- 
     def post(self, request, *args, **kwargs):
         contract_file = request.FILES.get('contract_file')
         contract_category = request.POST.get('contract_category')
@@ -64,65 +85,132 @@ class ContractUploadView(APIView):
             )
  
         collection_name = CONTRACT_CATEGORY_MAP[contract_category]
-        file_content = contract_file.read()
-       
-        s3_buffer = io.BytesIO(file_content)
-        parser_buffer = io.BytesIO(file_content)
-       
-        s3_key = f"{collection_name}/{uuid.uuid4()}-{contract_file.name}"
-        try:
-            s3_url = upload_contract_to_s3(
-                s3_buffer,
-                self.s3_bucket_name,
-                s3_key,
-                contract_file.content_type
-            )
-            if not s3_url:
-                raise Exception("S3 upload returned no URL.")
-        except Exception as e:
-            return Response({'error': f'S3 upload failed: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
- 
+        # One copy of the upload: in memory when small, Django's temp file when large.
+        source = UploadSource.from_uploaded_file(contract_file)
+        # Re-uploads of the same file return the existing contract unless force=true.
+        force = str(request.POST.get('force', '')).lower() in ('1', 'true', 'yes')
+
+        # ✅ Opt-in background ingestion: persist the file, return 202 + job id,
+        # and let an ingestion worker run the pipeline. Poll GET /jobs/<id>/.
+        if str(request.POST.get('async', '')).lower() in ('1', 'true', 'yes'):
+            try:
+                job_id = enqueue_contract_ingestion(
+                    source,
+                    contract_file.name,
+                    contract_file.content_type,
+                    contract_category,
+                    force=force
+                )
+            except Exception as e:
+                return Response({'error': f'Failed to queue contract: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({
+                'message': f'Contract queued for processing into "{collection_name}" collection.',
+                'job_id': job_id,
+                'status_url': request.build_absolute_uri(f'../jobs/{job_id}/'),
+            }, status=status.HTTP_202_ACCEPTED)
+
         try:
-            payload, contract_text = self.extractor.process_contract(
-                parser_buffer,
+            result = ingest_contract(
+                source,
+                contract_file.name,
+                contract_file.content_type,
                 contract_category,
-                s3_url
+                force=force
             )
-            if not contract_text:
-                raise ValueError("Fitz failed to extract any text.")
-        except Exception as e:
-            return Response({'error': f'Failed to process contract: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except IngestionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
  
+        if result['duplicate']:
+            return Response({
+                'message': f'This file was already uploaded to "{collection_name}". Send force=true to process it again.',
+                'qdrant_id': result['qdrant_id'],
+                'chunks': result['chunks'],
+                'data': result['data'],
+                'duplicate': True,
+            }, status=status.HTTP_200_OK)
+
+        return Response({
+            'message': f'Contract processed and saved to "{collection_name}" collection!',
+            'qdrant_id': result['qdrant_id'],
+            'chunks': result['chunks'],
+            'data': result['data'],
+            'timings': result['timings'],
+            'critical_path': result['critical_path'],
+            'total_seconds': result['total_seconds'],
+            'duplicate': False,
+        }, status=status.HTTP_201_CREATED)
+
+class ContractBulkUploadView(APIView):
+    """
+    Many contracts in one request: repeated 'contract_files' (with a matching
+    'contract_categories' list, or one 'contract_category' for all), and/or a
+    zip 'archive' (categories from the optional 'categories' JSON map, the
+    top-level folder name, or 'contract_category').
+    """
+    def post(self, request, *args, **kwargs):
+        contract_files = request.FILES.getlist('contract_files')
+        archive = request.FILES.get('archive')
+        if not contract_files and not archive:
+            return Response({'error': "Provide 'contract_files' and/or a zip 'archive'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            archive_categories = json.loads(request.POST.get('categories') or '{}')
+            if not isinstance(archive_categories, dict):
+                raise ValueError("must be a JSON object")
+        except ValueError as e:
+            return Response({'error': f"Invalid 'categories': {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            embedding = get_text_embedding(contract_text)
-            if not embedding:
-                raise ValueError("Failed to generate text embedding.")
+            spool_dir, items, errors = spool_bulk_upload(
+                contract_files,
+                request.POST.getlist('contract_categories'),
+                archive=archive,
+                archive_categories=archive_categories,
+                default_category=request.POST.get('contract_category'),
+            )
+        except zipfile.BadZipFile:
+            return Response({'error': 'The archive is not a valid zip file.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            return Response({'error': f'Embedding generation failed: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
- 
-        point_id = str(uuid.uuid4())
+            return Response({'error': f'Failed to read the upload: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        force = str(request.POST.get('force', '')).lower() in ('1', 'true', 'yes')
+        if len(items) + len(errors) > BULK_INGEST_MAX_FILES:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+            return Response(
+                {'error': f'Too many files ({len(items) + len(errors)}). The limit is {BULK_INGEST_MAX_FILES} per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if str(request.POST.get('async', '')).lower() in ('1', 'true', 'yes'):
+            try:
+                job_id = enqueue_bulk_ingestion(spool_dir, items, errors, force=force)
+            except Exception as e:
+                shutil.rmtree(spool_dir, ignore_errors=True)
+                return Response({'error': f'Failed to queue contracts: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({
+                'message': f'{len(items)} contracts queued for processing.',
+                'job_id': job_id,
+                'status_url': request.build_absolute_uri(f'../../jobs/{job_id}/'),
+                'rejected': errors,
+            }, status=status.HTTP_202_ACCEPTED)
+
         try:
-            upsert_contract(collection_name, point_id, embedding, payload)
+            report = bulk_ingest(items, errors, force=force)
         except Exception as e:
-            return Response({'error': f'Failed to save data to Qdrant: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({'error': f'Bulk ingestion failed: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+        return Response(report, status=status.HTTP_200_OK)
+
+class IngestionJobStatusView(APIView):
+    def get(self, request, job_id):
         try:
-            print("Invalidating caches due to new upload...")
-            keys_to_delete = [
-                AllContractsListView.CACHE_KEY,
-                AlertsRemindersView.CACHE_KEY,
-                f"{ContractByCategoryView.CACHE_KEY_PREFIX}_{contract_category}"
-            ]
-            cache.delete_many(keys_to_delete)
-            print("✅ Caches invalidated.")
+            job = job_queue.get(str(job_id))
         except Exception as e:
-            # Don't fail the upload, just log the warning
-            print(f"⚠️ Warning: Failed to invalidate cache: {e}")
- 
-        return Response({
-            'message': f'Contract processed and saved to "{collection_name}" collection!',
-            'qdrant_id': point_id,
-            'data': payload,
-        }, status=status.HTTP_201_CREATED)
+            return Response({'error': f'Failed to read job status: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if job is None:
+            return Response({'error': 'Job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(format_job(job), status=status.HTTP_200_OK)
  
 class ContractSearchView(APIView):
     def __init__(self, **kwargs):
@@ -198,7 +286,7 @@ class ContractSearchView(APIView):
                 'score': round(match.score, 4),
                 'data': {
                     k: v for k, v in match.payload.items()
-                    if k != 'contract_text'
+                    if k not in ('contract_text', 'page_offsets')
                 }
             }
             for match in all_results
@@ -267,7 +355,7 @@ def refresh_viewable_urls(contract_list):
     return updated_list    
  
 class AllContractsListView(APIView):
-    CACHE_KEY = "all_contracts_list"
+    CACHE_KEY = ALL_CONTRACTS_CACHE_KEY
     CACHE_TIMEOUT = 60 * 60 * 24 # 24 hours
  
     def get(self, request, *args, **kwargs):
@@ -304,7 +392,7 @@ class AllContractsListView(APIView):
             )        
  
 class AlertsRemindersView(APIView):
-    CACHE_KEY = "alerts_reminders"
+    CACHE_KEY = ALERTS_CACHE_KEY
     CACHE_TIMEOUT = 60 * 30 # 30 minutes
    
     def get(self, request, *args, **kwargs):
@@ -335,6 +423,12 @@ class AlertsRemindersView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
  
+def _viewable_url_or_raw(s3_url):
+    try:
+        return generate_presigned_viewable_url(s3_url)
+    except Exception:
+        return s3_url
+ 
 class ContractQnAView(APIView):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -343,12 +437,36 @@ class ContractQnAView(APIView):
         self.RAG_CONTEXT_LIMIT = 4
         self.default_threshold = 0.3
         self.hybrid_threshold = 0.1
+        self.max_concurrency = QNA_MAX_CONCURRENCY
+        self.document_timeout = QNA_DOCUMENT_TIMEOUT
+ 
+    def _answer_document(self, s3_url, query, use_cache=True):
+        """
+        Reads one contract and answers `query` from it.
+        Returns (answer, viewable_url, cache provenance).
+        """
+        print(f"   -> Processing: {s3_url}")
+        full_text = get_contract_text(s3_url)
+ 
+        if not full_text:
+            raise ValueError("Fitz failed to extract any text from the S3 file.")
+ 
+        # Only the passages relevant to the question go to the model.
+        answer, provenance, _ = self.bedrock_service.answer_from_document(
+            full_text,
+            query,
+            use_cache=use_cache,
+            call_site="qna_answer",
+        )
+        return answer.strip(), generate_presigned_viewable_url(s3_url), provenance
  
     def post(self, request, *args, **kwargs):
         natural_query = request.data.get('query', '')
         category = request.data.get('category', None)
         scoped_search = request.data.get('scoped_search', False)
         s3_urls = request.data.get('s3_urls', [])
+        # no_cache=true always asks the model instead of reusing cached answers.
+        use_cache = not _is_true(request.data.get('no_cache'))
  
         if not natural_query:
             return Response({'error': 'A query is required.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -359,48 +477,29 @@ class ContractQnAView(APIView):
             structured_answers = []
            
             try:
-                for s3_url in s3_urls:
-                    try:
-                        print(f"   -> Processing: {s3_url}")
-                       
-                        raw_pdf_bytes = get_s3_bytes_from_url(s3_url)
-                        full_text = ContractExtractor.extract_text_from_pdf_bytes(raw_pdf_bytes)
-                       
-                        if not full_text:
-                            raise ValueError("Failed to extract text")
-                       
-                        answer = self.bedrock_service.get_answer_from_context(
-                            context=full_text,
-                            query=natural_query
-                        )
-                       
-                        doc_name = s3_url.split('/')[-1].replace('.pdf', '')
-                        viewable_url = generate_presigned_viewable_url(s3_url)
-                       
-                        structured_answers.append({
-                            'id': str(uuid.uuid4()),
-                            'source_name': doc_name,
-                            's3_url': s3_url,
-                            'viewable_url': viewable_url,
-                            'answer': answer.strip()
-                        })
-                       
+                outcomes = map_concurrently(
+                    lambda s3_url: self._answer_document(s3_url, natural_query, use_cache),
+                    s3_urls,
+                    max_concurrency=self.max_concurrency,
+                    timeout=self.document_timeout,
+                )
+                for s3_url, (ok, outcome) in zip(s3_urls, outcomes):
+                    doc_name = s3_url.split('/')[-1].replace('.pdf', '')
+                    provenance = None
+                    if ok:
+                        answer, viewable_url, provenance = outcome
                         print(f"   ✅ Generated answer for: {doc_name}")
-                       
-                    except Exception as e:
-                        print(f"   ❌ Error processing {s3_url}: {e}")
-                        doc_name = s3_url.split('/')[-1].replace('.pdf', '')
-                        try:
-                            viewable_url = generate_presigned_viewable_url(s3_url)
-                        except:
-                            viewable_url = s3_url
-                        structured_answers.append({
-                            'id': str(uuid.uuid4()),
-                            'source_name': doc_name,
-                            's3_url': s3_url,
-                            'viewable_url': viewable_url,
-                            'answer': f"Error reading document: {e}"
-                        })
+                    else:
+                        print(f"   ❌ Error processing {s3_url}: {outcome}")
+                        answer, viewable_url = f"Error reading document: {outcome}", _viewable_url_or_raw(s3_url)
+                    structured_answers.append({
+                        'id': str(uuid.uuid4()),
+                        'source_name': doc_name,
+                        's3_url': s3_url,
+                        'viewable_url': viewable_url,
+                        'answer': answer,
+                        'cache': provenance
+                    })
                
                 try:
                     user_id = str(request.user.id) if request.user.is_authenticated else "anonymous_user_session"
@@ -428,7 +527,7 @@ class ContractQnAView(APIView):
        
         # === REGULAR SEARCH LOGIC ===
         try:
-            plan = self.bedrock_service.get_search_plan(natural_query, category=category)
+            plan = self.bedrock_service.get_search_plan(natural_query, category=category, call_site="qna_plan")
             semantic_query = plan.get('semantic_query', natural_query)
             payload_filters = plan.get('filters', {})
             search_threshold = self.default_threshold
@@ -488,60 +587,41 @@ class ContractQnAView(APIView):
  
         print(f"--- Augmenting & Generating answers for {len(top_k_results)} documents ---")
  
-        for result in top_k_results:
-            if not hasattr(result, 'payload') or not result.payload:
-                continue
+        documents = [
+            result for result in top_k_results
+            if getattr(result, 'payload', None) and result.payload.get('s3_url')
+        ]
+        # Documents are answered concurrently; results keep their ranking order.
+        outcomes = map_concurrently(
+            lambda result: self._answer_document(result.payload['s3_url'], natural_query, use_cache),
+            documents,
+            max_concurrency=self.max_concurrency,
+            timeout=self.document_timeout,
+        )
  
-            s3_url = result.payload.get('s3_url')
+        for result, (ok, outcome) in zip(documents, outcomes):
+            s3_url = result.payload['s3_url']
             doc_name = result.payload.get('file_name', s3_url)
  
-            if not s3_url:
-                continue
- 
-            try:
-                print(f"   -> Processing doc: {doc_name}")
-                raw_pdf_bytes = get_s3_bytes_from_url(s3_url)
-                full_text = ContractExtractor.extract_text_from_pdf_bytes(raw_pdf_bytes)
- 
-                if not full_text:
-                    raise ValueError("Fitz failed to extract any text from the S3 file.")
- 
-                answer_for_this_doc = self.bedrock_service.get_answer_from_context(
-                    context=full_text,
-                    query=natural_query
-                )
- 
-                # ✅ ADDED: Generate viewable URL
-                viewable_url = generate_presigned_viewable_url(s3_url)
- 
-                structured_answers.append({
-                    'id': result.id,
-                    'source_name': doc_name,
-                    's3_url': s3_url,
-                    'viewable_url': viewable_url,  # ✅ ADDED
-                    'retrieval_score': round(result.score, 4),
-                    'collection': result.payload.get('category'),
-                    'answer': answer_for_this_doc.strip()
-                })
- 
-            except Exception as e:
-                print(f"❌ Failed to process {s3_url}: {e}")
-               
-                # ✅ ADDED: Generate viewable URL for errors
-                try:
-                    viewable_url = generate_presigned_viewable_url(s3_url)
-                except:
-                    viewable_url = s3_url
-               
-                structured_answers.append({
-                    'id': result.id,
-                    'source_name': doc_name,
-                    's3_url': s3_url,
-                    'viewable_url': viewable_url,  # ✅ ADDED
-                    'retrieval_score': round(result.score, 4),
-                    'collection': result.payload.get('category'),
-                    'answer': f"Error reading document: {e}"
-                })
+            provenance = None
+            if ok:
+                answer_for_this_doc, viewable_url, provenance = outcome
+                print(f"   ✅ Generated answer for: {doc_name}")
+            else:
+                print(f"❌ Failed to process {s3_url}: {outcome}")
+                answer_for_this_doc = f"Error reading document: {outcome}"
+                viewable_url = _viewable_url_or_raw(s3_url)
+ 
+            structured_answers.append({
+                'id': result.id,
+                'source_name': doc_name,
+                's3_url': s3_url,
+                'viewable_url': viewable_url,  # ✅ ADDED
+                'retrieval_score': round(result.score, 4),
+                'collection': result.payload.get('category'),
+                'answer': answer_for_this_doc,
+                'cache': provenance
+            })
  
         try:
             user_id = str(request.user.id) if request.user.is_authenticated else "anonymous_user_session"
@@ -562,9 +642,39 @@ class DocumentChatView(APIView):
         self.bedrock_service = BedrockService()
         self.history_manager = ChatHistoryManager()
  
+    def perform_content_negotiation(self, request, force=False):
+        # Streaming clients send Accept: text/event-stream; errors still go out as JSON.
+        return super().perform_content_negotiation(request, force=True)
+ 
+    def _save_history(self, request, query, answer, s3_url):
+        try:
+            user_id = (
+                str(request.user.id)
+                if request.user and request.user.is_authenticated
+                else "anonymous_user_session"
+            )
+ 
+            self.history_manager.save_interaction(
+                user_id=user_id,
+                query=query,
+                response=answer,
+                doc_s3_url=s3_url,
+            )
+            print("✅ Document chat interaction saved successfully.")
+        except Exception as save_err:
+            print(f"⚠️ Failed to save document chat history: {save_err}")
+ 
     def post(self, request, *args, **kwargs):
+        started = time.perf_counter()
         query = request.data.get("query", "").strip()
         s3_url = request.data.get("viewable_url", "").strip()
+        # stream=true (or Accept: text/event-stream) sends the answer as Server-Sent Events.
+        stream = (
+            _is_true(request.data.get("stream"))
+            or "text/event-stream" in request.headers.get("Accept", "")
+        )
+        # no_cache=true always asks the model instead of reusing a cached answer.
+        use_cache = not _is_true(request.data.get("no_cache"))
  
         if not query or not s3_url:
             return Response(
@@ -575,43 +685,49 @@ class DocumentChatView(APIView):
         print(f"--- 📄 Document Chat Query: '{query}' for doc: '{s3_url}' ---")
  
         try:
-            raw_pdf_bytes = get_s3_bytes_from_url(s3_url)
-            full_text = ContractExtractor.extract_text_from_pdf_bytes(raw_pdf_bytes)
+            full_text = get_contract_text(s3_url)
  
             if not full_text:
                 raise ValueError("Failed to extract text from the S3 file.")
  
-            answer = self.bedrock_service.get_answer_from_context(
-                context=full_text,
-                query=query,
+            if stream:
+                response = StreamingHttpResponse(
+                    self._stream_answer(request, full_text, query, s3_url, started, use_cache),
+                    content_type="text/event-stream",
+                )
+                response["Cache-Control"] = "no-cache"
+                # Stops nginx from buffering the events.
+                response["X-Accel-Buffering"] = "no"
+                return response
+ 
+            # Only the passages relevant to the question go to the model.
+            answer, provenance, context_info = self.bedrock_service.answer_from_document(
+                full_text,
+                query,
+                use_cache=use_cache,
+                call_site="document_chat",
             )
  
-            try:
-                user_id = (
-                    str(request.user.id)
-                    if request.user and request.user.is_authenticated
-                    else "anonymous_user_session"
-                )
- 
-                self.history_manager.save_interaction(
-                    user_id=user_id,
-                    query=query,
-                    response=answer,
-                    doc_s3_url=s3_url,
-                )
-                print("✅ Document chat interaction saved successfully.")
-            except Exception as save_err:
-                print(f"⚠️ Failed to save document chat history: {save_err}")
+            self._save_history(request, query, answer, s3_url)
  
             return Response(
                 {
                     "answer": answer.strip(),
                     "query": query,
                     "viewable_url": s3_url,
+                    "cache": provenance,
+                    "context": context_info,
                 },
                 status=status.HTTP_200_OK,
             )
  
+        except BedrockThrottled as e:
+            print(f"⚠️ Bedrock busy in DocumentChatView: {e}")
+            return Response(
+                {"error": "The model is busy right now, please try again shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "5"},
+            )
         except Exception as e:
             print(f"❌ Error in DocumentChatView: {e}")
             return Response(
@@ -619,6 +735,79 @@ class DocumentChatView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
  
+    def _stream_answer(self, request, full_text, query, s3_url, started, use_cache=True):
+        """
+        Yields SSE events: one `token` event per generated piece, then `done`
+        with the full answer and timings (or `error`). History is saved only
+        once the whole answer has been generated. A cached answer is sent as
+        a single `token` event, before any context is assembled.
+        """
+        cache_context = context_assembler.cache_context(full_text)
+        cached = self.bedrock_service.lookup_cached_answer(cache_context, query, "document_chat") if use_cache else None
+        if cached is not None:
+            answer, provenance = cached
+            first_token_seconds = round(time.perf_counter() - started, 3)
+            yield _sse_event("token", {"text": answer})
+            self._save_history(request, query, answer, s3_url)
+            yield _sse_event("done", {
+                "answer": answer,
+                "query": query,
+                "viewable_url": s3_url,
+                "cache": provenance,
+                "context": None,
+                "time_to_first_token": first_token_seconds,
+                "total_seconds": first_token_seconds,
+            })
+            return
+ 
+        parts = []
+        first_token_seconds = None
+        generation_started = time.perf_counter()
+        try:
+            # Only the passages relevant to the question go to the model.
+            context, context_info = context_assembler.assemble(full_text, query)
+            stream = self.bedrock_service.stream_answer_from_context(
+                context=context,
+                query=query,
+                call_site="document_chat",
+                cache_status=CACHE_MISS if use_cache else CACHE_BYPASS,
+            )
+            for text in stream:
+                if first_token_seconds is None:
+                    first_token_seconds = round(time.perf_counter() - started, 3)
+                    print(f"⏱️ Document chat first token after {first_token_seconds}s")
+                parts.append(text)
+                yield _sse_event("token", {"text": text})
+        except Exception as e:
+            print(f"❌ Error in DocumentChatView stream: {e}")
+            yield _sse_event("error", {"error": f"Failed to get answer: {e}"})
+            return
+ 
+        answer = "".join(parts).strip()
+        if use_cache:
+            provenance = self.bedrock_service.cache_answer(
+                cache_context, query, answer, time.perf_counter() - generation_started
+            )
+        else:
+            answer_cache.record_bypass()
+            provenance = {"status": "bypass"}
+        self._save_history(request, query, answer, s3_url)
+        yield _sse_event("done", {
+            "answer": answer,
+            "query": query,
+            "viewable_url": s3_url,
+            "cache": provenance,
+            "context": context_info,
+            "time_to_first_token": first_token_seconds,
+            "total_seconds": round(time.perf_counter() - started, 3),
+        })
+ 
+def _is_true(value):
+    return str(value or "").lower() in ("1", "true", "yes")
+ 
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+ 
 class ChatHistoryView(APIView):
     def get(self, request):
         user_id = (
@@ -667,7 +856,7 @@ class ChatHistorySaveView(APIView):
             return Response({"error": f"Failed to save chat interaction: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
  
 class ContractByCategoryView(APIView):
-    CACHE_KEY_PREFIX = "contracts_list"
+    CACHE_KEY_PREFIX = CATEGORY_CACHE_KEY_PREFIX
     CACHE_TIMEOUT = 60 * 60 * 24
    
     def get(self, request, category):
@@ -714,6 +903,54 @@ class SetupQdrantView(APIView):
                 "error": f"❌ Failed to set up Qdrant: {str(e)}"
             }, status=500)
  
+class ServiceMetricsView(APIView):
+    def get(self, request):
+        return Response({
+            "embedding": get_embedding_metrics(),
+            "embedding_cache": get_embedding_cache_stats(),
+            "text_store": get_text_store_stats(),
+            "ingestion_jobs": job_queue.counts(),
+            "search_plan_cache": search_plan_cache.get_stats(),
+            "local_planner": local_planner.get_stats(),
+            "document_chat_stream": answer_stream_metrics.get_stats(),
+            "answer_cache": answer_cache.get_stats(),
+            "context_assembly": context_assembler.get_stats(),
+            "bedrock_gateway": bedrock_gateway.get_stats(),
+            "llm_usage": llm_usage.get_stats(),
+        }, status=status.HTTP_200_OK)
+ 
+class ReadinessView(APIView):
+    def get(self, request):
+        report = resource_registry.readiness_report()
+        http_status = status.HTTP_200_OK if report["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(report, status=http_status)
+ 
+class LLMUsageView(APIView):
+    """
+    Token / latency totals of LLM calls (staff only).
+    Query params: days (default 1, 0 = all time), group_by (comma separated,
+    default call_site,model_id), call_site.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            days = float(request.query_params.get("days", 1))
+        except ValueError:
+            return Response({"error": "days must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        group_by = [c.strip() for c in request.query_params.get("group_by", "call_site,model_id").split(",") if c.strip()]
+
+        try:
+            rows = llm_usage.summary(
+                days=days or None,
+                group_by=group_by,
+                call_site=request.query_params.get("call_site"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e), "group_by_choices": GROUP_COLUMNS}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"days": days or None, "group_by": group_by, "results": rows}, status=status.HTTP_200_OK)
+ 
 class DocumentChatHistoryView(APIView):
     def get(self, request):
         user_id = str(request.user.id) if request.user.is_authenticated else "anonymous_user_session"
@@ -766,59 +1003,13 @@ def summarize_multiple_documents(request):
        
         print(f"📄 Summarizing {len(s3_urls)} documents...")
        
-        all_contents = []
-        doc_names = []
-       
-        for s3_url in s3_urls:
-            try:
-                print(f"   -> Processing: {s3_url}")
-               
-                pdf_bytes = get_s3_bytes_from_url(s3_url)
-                full_text = ContractExtractor.extract_text_from_pdf_bytes(pdf_bytes)
-               
-                if full_text:
-                    all_contents.append(full_text)
-                   
-                    doc_name = s3_url.split('/')[-1].replace('.pdf', '')
-                    doc_names.append(doc_name)
-                   
-                    print(f"   ✅ Successfully extracted text from: {doc_name}")
-                else:
-                    print(f"   ⚠️ No text extracted from: {s3_url}")
-               
-            except Exception as e:
-                print(f"   ❌ Error processing {s3_url}: {str(e)}")
-                continue
-       
-        if not all_contents:
+        try:
+            result = MapReduceSummarizer().summarize_s3_documents(s3_urls)
+        except ValueError as e:
             return Response(
-                {"error": "Could not extract content from any documents"},
+                {"error": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
-       
-        print(f"✅ Successfully processed {len(all_contents)} documents")
-       
-        combined_text = "\n\n=== DOCUMENT SEPARATOR ===\n\n".join(
-            [f"Document {i+1}: {name}\n\n{content[:5000]}"
-             for i, (name, content) in enumerate(zip(doc_names, all_contents))]
-        )
-       
-        try:
-            bedrock_service = BedrockService()
-           
-            summary = bedrock_service.get_answer_from_context(
-                context=combined_text,
-                query="Please provide a comprehensive summary of all these documents."
-            )
-           
-            print("✅ Summary generated successfully")
-           
-            return Response({
-                "summary": summary,
-                "documents_processed": len(all_contents),
-                "document_names": doc_names
-            }, status=status.HTTP_200_OK)
-           
         except Exception as e:
             print(f"❌ Error generating summary: {str(e)}")
             return Response(
@@ -826,6 +1017,9 @@ def summarize_multiple_documents(request):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
        
+        print(f"✅ Summary generated successfully ({result['cached_documents']}/{result['documents_processed']} documents from cache)")
+        return Response(result, status=status.HTTP_200_OK)
+       
     except Exception as e:
         print(f"❌ Error in summarize_multiple_documents: {str(e)}")
         import traceback